@@ -1,3 +1,42 @@
-from .graph import get_analysis_graph, run_analysis
+from .clients import get_client_pool
+from .hedging import get_hedge_policy
+from .ratelimit import get_rate_limiter
+from .router import get_model_router
+from .registry import close_graph_registry, graph_registry_stats, is_ready, readiness, warm_up
 
-__all__ = ["get_analysis_graph", "run_analysis"]
+# The graph module pulls in LangGraph and langchain; load it on first use, not at import.
+_GRAPH_EXPORTS = (
+    "get_analysis_graph",
+    "get_cached_graph",
+    "run_analysis",
+    "arun_analysis",
+    "astream_analysis",
+    "warm_graph_registry",
+)
+
+
+def __getattr__(name: str):
+    if name in _GRAPH_EXPORTS:
+        from . import graph
+
+        return getattr(graph, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = [
+    "get_client_pool",
+    "get_hedge_policy",
+    "get_rate_limiter",
+    "get_model_router",
+    "get_analysis_graph",
+    "get_cached_graph",
+    "run_analysis",
+    "arun_analysis",
+    "astream_analysis",
+    "warm_graph_registry",
+    "warm_up",
+    "is_ready",
+    "readiness",
+    "close_graph_registry",
+    "graph_registry_stats",
+]
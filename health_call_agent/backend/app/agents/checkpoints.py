@@ -0,0 +1,171 @@
+"""Checkpointer options for the analysis graph."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.sqlite import SqliteSaver
+
+CHECKPOINTER_NONE = "none"
+CHECKPOINTER_MEMORY = "memory"
+CHECKPOINTER_SQLITE = "sqlite"
+CHECKPOINTER_KINDS = (CHECKPOINTER_NONE, CHECKPOINTER_MEMORY, CHECKPOINTER_SQLITE)
+
+# Retention is enforced every this many checkpoint writes rather than on each one.
+_PRUNE_EVERY_PUTS = 64
+
+
+class BoundedMemorySaver(MemorySaver):
+    """In-memory checkpointer that keeps at most `max_threads` threads (oldest evicted first)."""
+
+    def __init__(self, max_threads: int = 256, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_threads = max(1, max_threads)
+        self._threads: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        evicted: list[str] = []
+        with self._lock:
+            self._threads[thread_id] = None
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > self.max_threads:
+                old_thread, _ = self._threads.popitem(last=False)
+                evicted.append(old_thread)
+            self.evictions += len(evicted)
+        for old_thread in evicted:
+            super().delete_thread(old_thread)
+        return result
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._threads.pop(thread_id, None)
+        super().delete_thread(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": CHECKPOINTER_MEMORY,
+                "threads": len(self._threads),
+                "max_threads": self.max_threads,
+                "evictions": self.evictions,
+            }
+
+
+class RetainingSqliteSaver(SqliteSaver):
+    """SQLite checkpointer that survives restarts, keeps at most `max_threads` threads and
+    drops threads not written to for `ttl_seconds`.
+
+    The async methods run the sync ones in a worker thread, so one saver serves both
+    `invoke` and `ainvoke` of the same compiled graph.
+    """
+
+    def __init__(self, db_path: str, max_threads: int = 256, ttl_seconds: float = 86400, **kwargs: Any):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint_threads (thread_id TEXT PRIMARY KEY, updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+        super().__init__(conn, **kwargs)
+        self.db_path = db_path
+        self.max_threads = max(1, max_threads)
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._puts = 0
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)"
+                " ON CONFLICT DO UPDATE SET updated_at = excluded.updated_at",
+                (str(config["configurable"]["thread_id"]), time.time()),
+            )
+            self._puts += 1
+            prune = self._puts % _PRUNE_EVERY_PUTS == 0
+        if prune:
+            self.prune()
+        return result
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (str(thread_id),))
+
+    def prune(self) -> int:
+        """Delete expired threads and the oldest ones beyond `max_threads`."""
+        with self.lock:
+            expired = []
+            if self.ttl_seconds > 0:
+                expired = self.conn.execute(
+                    "SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?",
+                    (time.time() - self.ttl_seconds,),
+                ).fetchall()
+            excess = self.conn.execute(
+                "SELECT thread_id FROM checkpoint_threads ORDER BY updated_at DESC LIMIT -1 OFFSET ?",
+                (self.max_threads,),
+            ).fetchall()
+        thread_ids = {row[0] for row in expired + excess}
+        for thread_id in thread_ids:
+            self.delete_thread(thread_id)
+        self.evictions += len(thread_ids)
+        return len(thread_ids)
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None) -> AsyncIterator[Any]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+    def stats(self) -> dict[str, Any]:
+        with self.lock:
+            threads = self.conn.execute("SELECT COUNT(*) FROM checkpoint_threads").fetchone()[0]
+        return {
+            "kind": CHECKPOINTER_SQLITE,
+            "db_path": self.db_path,
+            "threads": threads,
+            "max_threads": self.max_threads,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+        }
+
+
+def create_checkpointer(kind: str, max_threads: int, db_path: str = "", ttl_seconds: float = 86400):
+    """Return a checkpointer for `kind`, or None when checkpointing is disabled."""
+    kind = (kind or CHECKPOINTER_NONE).lower()
+    if kind == CHECKPOINTER_NONE:
+        return None
+    if kind == CHECKPOINTER_MEMORY:
+        return BoundedMemorySaver(max_threads=max_threads)
+    if kind == CHECKPOINTER_SQLITE:
+        return RetainingSqliteSaver(db_path, max_threads=max_threads, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown graph checkpointer {kind!r}. Use one of: {', '.join(CHECKPOINTER_KINDS)}.")
@@ -0,0 +1,178 @@
+"""Process-wide pool of Gemini chat clients, reused across nodes and requests."""
+
+import asyncio
+import inspect
+import logging
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[str, str, int, int], Any]
+
+
+def create_gemini_client(
+    api_key: str,
+    model_name: str,
+    timeout_seconds: int,
+    max_retries: int,
+) -> Any:
+    """Create Gemini LLM instance."""
+    # Imported here: langchain_google_genai takes most of a second to import.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    return ChatGoogleGenerativeAI(
+        model=model_name,
+        google_api_key=api_key,
+        temperature=0.2,
+        timeout=timeout_seconds,
+        max_retries=max_retries,
+    )
+
+
+async def _close_client(client: Any) -> None:
+    close = getattr(client, "aclose", None)
+    if close is not None:
+        await close()
+        return
+    # Older langchain-google-genai releases wrap gRPC service clients without `aclose`;
+    # close their transports directly.
+    for name in ("async_client", "client"):
+        transport = getattr(getattr(client, name, None), "transport", None)
+        result = transport.close() if hasattr(transport, "close") else None
+        if inspect.isawaitable(result):
+            await result
+
+
+class LLMClientPool:
+    """One long-lived client per (model, key, timeout, retries).
+
+    Each client owns its HTTP transport, so reusing it keeps connections alive
+    instead of paying connection setup on every node and fallback attempt.
+    `warm` only constructs the clients; `awarm_connections` opens their async
+    transports with a cheap model lookup so the first analysis skips TLS setup.
+    """
+
+    def __init__(self, factory: ClientFactory | None = None):
+        self._factory = factory or create_gemini_client
+        self._clients: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._created = 0
+        self._reused = 0
+        self._uses: Counter[str] = Counter()
+        self._warmed: list[str] = []
+        self._connected: list[str] = []
+
+    def get(
+        self,
+        api_key: str,
+        model_name: str,
+        timeout_seconds: int,
+        max_retries: int,
+    ) -> Any:
+        """Return the pooled client for this model, creating it on first use."""
+        return self._client_for(api_key, model_name, timeout_seconds, max_retries, use=True)
+
+    def warm(
+        self,
+        api_key: str,
+        model_names: list[str],
+        timeout_seconds: int,
+        max_retries: int,
+    ) -> list[str]:
+        """Create clients for all models up front; failures are logged, not raised."""
+        warmed = []
+        for model_name in model_names:
+            try:
+                self._client_for(api_key, model_name, timeout_seconds, max_retries)
+                warmed.append(model_name)
+            except Exception as e:
+                logger.warning("Could not warm Gemini client for %s: %s", model_name, e)
+        self._warmed = warmed
+        return warmed
+
+    async def awarm_connections(
+        self,
+        api_key: str,
+        model_names: list[str],
+        timeout_seconds: int,
+        max_retries: int,
+    ) -> list[str]:
+        """Open each client's async transport on the running loop with a models.get call (no tokens used).
+
+        Must run on the loop that serves analyses, since the async transport belongs to it.
+        Clients without a google-genai async client (e.g. the benchmarks' fake) are skipped;
+        failures are logged, not raised.
+        """
+        connected = []
+        for model_name in model_names:
+            client = self._client_for(api_key, model_name, timeout_seconds, max_retries)
+            try:
+                models = getattr(getattr(client, "async_client", None), "models", None)
+                if models is None or not hasattr(models, "get"):
+                    continue
+                await asyncio.wait_for(models.get(model=model_name), timeout_seconds)
+                connected.append(model_name)
+            except Exception as e:
+                logger.warning("Could not open a connection for %s: %s", model_name, e)
+        with self._lock:
+            self._connected = connected
+        return connected
+
+    def _client_for(
+        self, api_key: str, model_name: str, timeout_seconds: int, max_retries: int, use: bool = False
+    ) -> Any:
+        key = (model_name, api_key, timeout_seconds, max_retries)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._factory(api_key, model_name, timeout_seconds, max_retries)
+                self._clients[key] = client
+                self._created += 1
+            else:
+                self._reused += 1
+            if use:
+                self._uses[model_name] += 1
+        return client
+
+    def reset(self, factory: ClientFactory | None = None) -> None:
+        """Drop all pooled clients (optionally switching the factory, e.g. to a fake LLM)."""
+        with self._lock:
+            self._clients.clear()
+            if factory is not None:
+                self._factory = factory
+            self._created = 0
+            self._reused = 0
+            self._uses.clear()
+            self._warmed = []
+            self._connected = []
+
+    async def aclose(self) -> None:
+        """Close pooled clients' transports (called at app shutdown)."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            try:
+                await _close_client(client)
+            except Exception as e:
+                logger.debug("Ignoring error while closing Gemini client: %s", e)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "models": sorted({key[0] for key in self._clients}),
+                "warmed": list(self._warmed),
+                "connected": list(self._connected),
+                "created": self._created,
+                "reused": self._reused,
+                "uses": dict(self._uses),
+            }
+
+
+@lru_cache
+def get_client_pool() -> LLMClientPool:
+    return LLMClientPool()
@@ -1,24 +1,71 @@
-"""LangGraph definition: purpose -> failure reason -> action plan."""
+"""LangGraph definition: [rules] -> purpose -> failure reason -> action plan (or one fused call).
 
-from typing import Any, TypedDict
+The parallel topology runs purpose and a speculative failure analysis side by side, re-runs the
+failure analysis only if their purposes disagree, and joins both into the action plan.
+"""
 
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
 
-from app.agents.nodes import classify_purpose, analyze_failure_reason, generate_action_plan
+from app.config import get_settings
+from app.metrics import NODE_LATENCY
+from app.agents.checkpoints import create_checkpointer
+from app.agents.registry import graph_registry, registry_lock
+from app.agents.state import (
+    PIPELINE_FUSED,
+    PIPELINE_GRAPH,
+    PIPELINE_PARALLEL,
+    PIPELINES,
+    RESTORED_UPDATE,
+    SPECULATION_RERUN,
+    CallAnalysisState,
+)
+from app.agents.nodes import (
+    pre_classify,
+    check_speculation,
+    classify_purpose,
+    analyze_failure_reason,
+    speculate_failure_reason,
+    generate_action_plan,
+    fused_analysis,
+)
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint threads with a run in progress; a concurrent run of the same call gets its own thread.
+_active_threads: set[str] = set()
+_active_lock = threading.Lock()
+
+
+def _next_after_purpose(state: CallAnalysisState) -> str:
+    """Skip failure analysis when the rules already filled it."""
+    return "generate_action_plan" if state.get("failure_reason_result") else "analyze_failure_reason"
+
+
+def _next_after_pre_classify(state: CallAnalysisState) -> str:
+    if not state.get("purpose_result"):
+        return "classify_purpose"
+    return _next_after_purpose(state)
+
 
+def _fan_out(state: CallAnalysisState) -> str | list[str]:
+    """Parallel topology: purpose and speculative failure analysis at once, unless the rules settled purpose."""
+    if state.get("purpose_result"):
+        return _next_after_purpose(state)
+    return ["classify_purpose", "speculate_failure_reason"]
 
-class CallAnalysisState(TypedDict, total=False):
-    """State passed between nodes."""
 
-    conversation_text: str
-    call_id: str | None
-    purpose_result: dict[str, Any]
-    purpose_summary: str
-    purpose_label: str
-    model_used: str
-    failure_reason_result: dict[str, Any]
-    action_plan_result: dict[str, Any]
+def _next_after_check(state: CallAnalysisState) -> str:
+    return "analyze_failure_reason" if state.get("speculation") == SPECULATION_RERUN else "generate_action_plan"
 
 
 def get_analysis_graph(
@@ -26,52 +73,277 @@ def get_analysis_graph(
     model_candidates: list[str],
     timeout_seconds: int,
     max_retries: int,
+    checkpointer: Any = None,
+    parallel: bool = False,
 ):
-    """Build the analysis graph with three nodes."""
+    """Build and compile the analysis graph: a rule-based pre-classifier and three LLM nodes.
 
-    def classify_node(state: CallAnalysisState) -> dict[str, Any]:
-        return classify_purpose(state, api_key, model_candidates, timeout_seconds, max_retries)
+    With `parallel`, purpose classification and a speculative failure analysis (which infers the
+    purpose itself) fan out together; `check_speculation` joins them and sends the failure
+    analysis back through `analyze_failure_reason` only when the two purposes disagree.
 
-    def failure_node(state: CallAnalysisState) -> dict[str, Any]:
-        return analyze_failure_reason(state, api_key, model_candidates, timeout_seconds, max_retries)
+    Nodes are async only; run the graph with `ainvoke` / `astream` (see `arun_analysis`).
+    """
 
-    def action_plan_node(state: CallAnalysisState) -> dict[str, Any]:
-        return generate_action_plan(state, api_key, model_candidates, timeout_seconds, max_retries)
+    def bind(name: str, node_fn, timing_key: str | None = None) -> RunnableLambda:
+        """Wrap a node with its latency metric; `timing_key` also puts its duration into the state."""
+        latency = NODE_LATENCY.labels(name)
+
+        async def node(state: CallAnalysisState) -> dict[str, Any]:
+            started = time.perf_counter()
+            with latency.time():
+                update = await node_fn(state, api_key, model_candidates, timeout_seconds, max_retries)
+            if timing_key and update:
+                update = {**update, timing_key: time.perf_counter() - started}
+            return update
+
+        return RunnableLambda(node, name=name)
+
+    def bind_cpu(name: str, node_fn) -> RunnableLambda:
+        """Wrap a pure-CPU node in a coroutine, so it runs on the event loop without an executor hop."""
+        latency = NODE_LATENCY.labels(name)
+
+        async def node(state: CallAnalysisState) -> dict[str, Any]:
+            with latency.time():
+                return node_fn(state)
+
+        return RunnableLambda(node, name=name)
 
     graph_builder = StateGraph(CallAnalysisState)
-    graph_builder.add_node("classify_purpose", classify_node)
-    graph_builder.add_node("analyze_failure_reason", failure_node)
-    graph_builder.add_node("generate_action_plan", action_plan_node)
+    graph_builder.add_node("pre_classify", bind_cpu("pre_classify", pre_classify))
+    graph_builder.add_node(
+        "classify_purpose",
+        bind("classify_purpose", classify_purpose, "purpose_seconds" if parallel else None),
+    )
+    graph_builder.add_node("analyze_failure_reason", bind("analyze_failure_reason", analyze_failure_reason))
+    graph_builder.add_node("generate_action_plan", bind("generate_action_plan", generate_action_plan))
+    graph_builder.set_entry_point("pre_classify")
 
-    graph_builder.set_entry_point("classify_purpose")
-    graph_builder.add_edge("classify_purpose", "analyze_failure_reason")
+    if parallel:
+        graph_builder.add_node(
+            "speculate_failure_reason",
+            bind("speculate_failure_reason", speculate_failure_reason, "speculation_seconds"),
+        )
+        graph_builder.add_node("check_speculation", bind_cpu("check_speculation", check_speculation))
+        graph_builder.add_conditional_edges(
+            "pre_classify",
+            _fan_out,
+            ["classify_purpose", "speculate_failure_reason", "analyze_failure_reason", "generate_action_plan"],
+        )
+        # Runs once both branches have finished.
+        graph_builder.add_edge(["classify_purpose", "speculate_failure_reason"], "check_speculation")
+        graph_builder.add_conditional_edges(
+            "check_speculation",
+            _next_after_check,
+            ["analyze_failure_reason", "generate_action_plan"],
+        )
+    else:
+        graph_builder.add_conditional_edges(
+            "pre_classify",
+            _next_after_pre_classify,
+            ["classify_purpose", "analyze_failure_reason", "generate_action_plan"],
+        )
+        graph_builder.add_conditional_edges(
+            "classify_purpose",
+            _next_after_purpose,
+            ["analyze_failure_reason", "generate_action_plan"],
+        )
     graph_builder.add_edge("analyze_failure_reason", "generate_action_plan")
     graph_builder.add_edge("generate_action_plan", END)
 
-    memory = MemorySaver()
-    return graph_builder.compile(checkpointer=memory)
+    return graph_builder.compile(checkpointer=checkpointer)
 
 
-def run_analysis(
-    conversation_text: str,
+def get_cached_graph(
     api_key: str,
     model_candidates: list[str],
     timeout_seconds: int,
     max_retries: int,
-    call_id: str | None = None,
-) -> dict[str, Any]:
-    """Run the full analysis pipeline and return combined result."""
-    graph = get_analysis_graph(api_key, model_candidates, timeout_seconds, max_retries)
-    initial: CallAnalysisState = {
+    parallel: bool = False,
+):
+    """Return the compiled graph for this configuration and topology, compiling it only once."""
+    key = (api_key, tuple(model_candidates), timeout_seconds, max_retries, parallel)
+    graph = graph_registry.get(key)
+    if graph is not None:
+        return graph
+    with registry_lock:
+        graph = graph_registry.get(key)
+        if graph is None:
+            settings = get_settings()
+            checkpointer = create_checkpointer(
+                settings.graph_checkpointer,
+                settings.graph_checkpoint_max_threads,
+                settings.graph_checkpoint_db,
+                settings.graph_checkpoint_ttl_seconds,
+            )
+            graph = get_analysis_graph(
+                api_key,
+                model_candidates,
+                timeout_seconds,
+                max_retries,
+                checkpointer=checkpointer,
+                parallel=parallel,
+            )
+            graph_registry[key] = graph
+    return graph
+
+
+def warm_graph_registry(settings) -> None:
+    """Compile the graph for the configured settings (called at app startup)."""
+    get_cached_graph(
+        settings.google_api_key,
+        settings.gemini_models,
+        settings.gemini_timeout_seconds,
+        settings.gemini_max_retries,
+        parallel=settings.analysis_pipeline == PIPELINE_PARALLEL,
+    )
+
+
+def _initial_state(conversation_text: str, call_id: str | None) -> CallAnalysisState:
+    return {
         "conversation_text": conversation_text,
         "call_id": call_id,
     }
-    config = {"configurable": {"thread_id": "default"}}
-    final_state = graph.invoke(initial, config)
 
+
+def _thread_id(conversation_text: str, call_id: str | None, parallel: bool = False) -> str:
+    """Checkpoint thread of a call: its call_id plus a transcript hash, so an edited transcript starts over.
+
+    The parallel topology has its own threads; its checkpoints cannot resume the serial graph.
+    """
+    if not call_id:
+        return uuid.uuid4().hex
+    digest = hashlib.sha256(conversation_text.encode("utf-8")).hexdigest()[:16]
+    return f"{call_id}:{PIPELINE_PARALLEL}:{digest}" if parallel else f"{call_id}:{digest}"
+
+
+@contextmanager
+def _call_thread(conversation_text: str, call_id: str | None, parallel: bool = False) -> Iterator[dict[str, Any]]:
+    """Run config on the call's checkpoint thread, held for the duration of the run."""
+    thread_id = _thread_id(conversation_text, call_id, parallel)
+    with _active_lock:
+        if thread_id in _active_threads:
+            thread_id = uuid.uuid4().hex
+        _active_threads.add(thread_id)
+    try:
+        yield {"configurable": {"thread_id": thread_id}}
+    finally:
+        with _active_lock:
+            _active_threads.discard(thread_id)
+
+
+async def _resume_point(graph, initial: CallAnalysisState, config: dict[str, Any]) -> tuple[Any, dict[str, Any]]:
+    """Graph input and restored state: (None, state) resumes an interrupted run of this call."""
+    if graph.checkpointer is None:
+        return initial, {}
+    snapshot = await graph.aget_state(config)
+    if snapshot.next:
+        return None, dict(snapshot.values)
+    if snapshot.values:
+        await graph.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+    return initial, {}
+
+
+async def _forget_thread(graph, config: dict[str, Any]) -> None:
+    """Drop a finished call's checkpoints; only failed runs need them."""
+    if graph.checkpointer is not None:
+        await graph.checkpointer.adelete_thread(config["configurable"]["thread_id"])
+
+
+def _final_result(final_state: dict[str, Any], meta: dict[str, Any]) -> dict[str, Any]:
     return {
         "call_id": final_state.get("call_id"),
         "purpose": final_state.get("purpose_result"),
         "failure_reason": final_state.get("failure_reason_result"),
         "action_plan": final_state.get("action_plan_result"),
+        "meta": {
+            **meta,
+            "skipped_nodes": final_state.get("skipped_nodes") or [],
+            "speculation": final_state.get("speculation"),
+        },
     }
+
+
+def _check_pipeline(pipeline: str) -> None:
+    if pipeline not in PIPELINES:
+        raise ValueError(f"Unknown analysis pipeline {pipeline!r}. Use one of: {', '.join(PIPELINES)}.")
+
+
+async def arun_analysis(
+    conversation_text: str,
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+    call_id: str | None = None,
+    pipeline: str = PIPELINE_GRAPH,
+) -> dict[str, Any]:
+    """Run the full analysis pipeline and return combined result.
+
+    With `pipeline="fused"` one combined prompt produces all three results; if its output
+    does not validate, the three-step graph runs instead. `pipeline="parallel"` runs the graph
+    with purpose and failure analysis side by side (see `get_analysis_graph`).
+    """
+    _check_pipeline(pipeline)
+    initial = _initial_state(conversation_text, call_id)
+    if pipeline == PIPELINE_FUSED:
+        try:
+            with NODE_LATENCY.labels("fused_analysis").time():
+                update = await fused_analysis(initial, api_key, model_candidates, timeout_seconds, max_retries)
+            return _final_result({**initial, **update}, {"pipeline": PIPELINE_FUSED})
+        except (ValueError, TypeError, KeyError) as e:
+            logger.info("Fused analysis output invalid, falling back to graph: %s", e)
+    parallel = pipeline == PIPELINE_PARALLEL
+    graph = get_cached_graph(api_key, model_candidates, timeout_seconds, max_retries, parallel)
+    with _call_thread(conversation_text, call_id, parallel) as config:
+        graph_input, restored = await _resume_point(graph, initial, config)
+        final_state = await graph.ainvoke(graph_input, config)
+        await _forget_thread(graph, config)
+    return _final_result(
+        final_state,
+        {
+            "pipeline": PIPELINE_PARALLEL if parallel else PIPELINE_GRAPH,
+            "fused_fallback": pipeline == PIPELINE_FUSED,
+            "resumed": bool(restored),
+        },
+    )
+
+
+def run_analysis(
+    conversation_text: str,
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+    call_id: str | None = None,
+    pipeline: str = PIPELINE_GRAPH,
+) -> dict[str, Any]:
+    """Blocking wrapper around `arun_analysis` for scripts; not for use inside a running event loop."""
+    return asyncio.run(
+        arun_analysis(conversation_text, api_key, model_candidates, timeout_seconds, max_retries, call_id, pipeline)
+    )
+
+
+async def astream_analysis(
+    conversation_text: str,
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+    call_id: str | None = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Run the graph and yield (node name, state update) as each node finishes.
+
+    When an earlier run of this call failed part-way, the state restored from its checkpoint
+    is yielded first under `RESTORED_UPDATE` and only the remaining nodes run.
+    """
+    graph = get_cached_graph(api_key, model_candidates, timeout_seconds, max_retries)
+    initial = _initial_state(conversation_text, call_id)
+    with _call_thread(conversation_text, call_id) as config:
+        graph_input, restored = await _resume_point(graph, initial, config)
+        if restored:
+            yield RESTORED_UPDATE, restored
+        async for chunk in graph.astream(graph_input, config, stream_mode="updates"):
+            for node_name, update in chunk.items():
+                yield node_name, update or {}
+        await _forget_thread(graph, config)
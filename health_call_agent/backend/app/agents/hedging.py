@@ -0,0 +1,144 @@
+"""Hedged model calls: when a call runs past the node's usual latency, send a duplicate and keep the first answer.
+
+The hedge delay is a latency percentile of recent successful calls of the same node, so it
+follows the model's behaviour without tuning. A primary call cancelled because its hedge won
+is kept as a censored sample (its elapsed time, a lower bound on its latency); dropping it
+would leave only the fast calls in the window and pull the delay down. Hedges are paid for from a token bucket that
+earns `max_rate` tokens per call, which caps them at that share of calls.
+"""
+
+import math
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+
+# Hedges that may be fired back to back after a quiet period.
+_BURST = 10.0
+
+
+class _NodeLatency:
+    __slots__ = ("samples", "fired", "won", "censored")
+
+    def __init__(self, window: int):
+        self.samples: deque[float] = deque(maxlen=window)
+        self.fired = 0
+        self.won = 0
+        self.censored = 0
+
+
+class HedgePolicy:
+    """Per-node latency windows, the hedge delay derived from them, and the hedge budget."""
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        window: int = 200,
+        min_samples: int = 20,
+        min_delay_seconds: float = 0.5,
+        max_rate: float = 0.05,
+        target: str = "next",
+    ):
+        self.percentile = min(100.0, max(0.0, percentile))
+        self.window = max(1, window)
+        self.min_samples = max(1, min_samples)
+        self.min_delay_seconds = min_delay_seconds
+        self.max_rate = max(0.0, max_rate)
+        self.target = target
+        self._nodes: dict[str, _NodeLatency] = {}
+        self._budget = 0.0
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _node(self, node: str) -> _NodeLatency:
+        stats = self._nodes.get(node)
+        if stats is None:
+            stats = self._nodes[node] = _NodeLatency(self.window)
+        return stats
+
+    def _delay(self, stats: _NodeLatency) -> float | None:
+        if len(stats.samples) < self.min_samples:
+            return None
+        ordered = sorted(stats.samples)
+        rank = max(0, math.ceil(self.percentile / 100 * len(ordered)) - 1)
+        return max(self.min_delay_seconds, ordered[rank])
+
+    def hedge_delay(self, node: str) -> float | None:
+        """Seconds to wait before hedging a call of `node`; None until enough samples are seen.
+
+        Every call that asks earns the budget its share of a hedge.
+        """
+        with self._lock:
+            self._calls += 1
+            self._budget = min(_BURST, self._budget + self.max_rate)
+            return self._delay(self._node(node))
+
+    def hedge_model(self, model_name: str, candidates: list[str]) -> str:
+        """Model for the duplicate: the candidate after `model_name` (target "next"), else the same model."""
+        if self.target == "next":
+            later = candidates[candidates.index(model_name) + 1 :] if model_name in candidates else candidates
+            others = [name for name in later if name != model_name]
+            if others:
+                return others[0]
+        return model_name
+
+    def try_hedge(self, node: str) -> bool:
+        """Spend one hedge from the budget; False when the hedge rate cap is reached."""
+        with self._lock:
+            if self._budget < 1.0:
+                return False
+            self._budget -= 1.0
+            self._node(node).fired += 1
+            return True
+
+    def observe(self, node: str, seconds: float, censored: bool = False) -> None:
+        """Record the latency of a successful call, or the elapsed time of a cancelled one (`censored`)."""
+        with self._lock:
+            stats = self._node(node)
+            stats.samples.append(seconds)
+            stats.censored += censored
+
+    def record_win(self, node: str) -> None:
+        with self._lock:
+            self._node(node).won += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            nodes = {}
+            for name, stats in self._nodes.items():
+                delay = self._delay(stats)
+                nodes[name] = {
+                    "samples": len(stats.samples),
+                    "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+                    "hedges": stats.fired,
+                    "hedges_won": stats.won,
+                    "censored_samples": stats.censored,
+                }
+            fired = sum(stats.fired for stats in self._nodes.values())
+            return {
+                "percentile": self.percentile,
+                "max_rate": self.max_rate,
+                "target": self.target,
+                "calls": self._calls,
+                "hedge_rate": round(fired / self._calls, 4) if self._calls else 0.0,
+                "budget": round(self._budget, 2),
+                "nodes": nodes,
+            }
+
+
+@lru_cache
+def get_hedge_policy() -> HedgePolicy | None:
+    """Process-wide hedge policy, or None when HEDGE_ENABLED is off."""
+    settings = get_settings()
+    if not settings.hedge_enabled:
+        return None
+    return HedgePolicy(
+        percentile=settings.hedge_percentile,
+        window=settings.hedge_window,
+        min_samples=settings.hedge_min_samples,
+        min_delay_seconds=settings.hedge_min_delay_seconds,
+        max_rate=settings.hedge_max_rate,
+        target=settings.hedge_target,
+    )
@@ -1,20 +1,56 @@
-"""LangGraph nodes: classify purpose and analyze failure reason."""
+"""LangGraph nodes: classify purpose, analyze failure reason (serially or speculatively) and plan actions."""
 
-import json
-from typing import Any
+import asyncio
+import time
+from typing import Any, Callable
 
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
+from app.config import get_settings
+from app.agents.clients import get_client_pool
+from app.agents.hedging import get_hedge_policy
+from app.agents.ratelimit import RateLimitExceeded, Reservation, get_rate_limiter
+from app.agents.router import get_model_router
+from app.agents.repair import JSONRepairError, coerce_to_model, parse_json_response
+from app.agents.rules import get_rule_set
+from app.agents.state import SPECULATION_AGREED, SPECULATION_RERUN
+from app.agents.tokens import DEFAULT_OUTPUT_TOKENS, estimate_prompt_tokens, response_tokens, usage_tokens
 from app.agents.prompts import (
     PURPOSE_CLASSIFY_SYSTEM,
     PURPOSE_CLASSIFY_USER,
     FAILURE_REASON_SYSTEM,
     FAILURE_REASON_USER,
+    SPECULATIVE_FAILURE_SYSTEM,
+    SPECULATIVE_FAILURE_USER,
     ACTION_PLAN_SYSTEM,
     ACTION_PLAN_USER,
+    FUSED_ANALYSIS_SYSTEM,
+    FUSED_ANALYSIS_USER,
+    JSON_REPAIR_USER,
 )
 from app.schemas import PurposeResult, FailureReasonResult, ActionPlanResult
+from app.metrics import (
+    HEDGES,
+    JSON_REPAIRS,
+    MODEL_ATTEMPTS,
+    MODEL_IN_FLIGHT,
+    PARSE_FAILURES,
+    SPECULATION_SECONDS,
+    SPECULATIONS,
+    record_model_error,
+    record_model_tokens,
+)
+
+# Provider-side errors after which the next model candidate is tried.
+_FALLBACK_ERROR_MARKERS = (
+    "429",
+    "RESOURCE_EXHAUSTED",
+    "404",
+    "NOT_FOUND",
+    "400",
+    "INVALID_ARGUMENT",
+    "Developer instruction is not",
+)
 
 
 def _get_llm(
@@ -22,93 +58,240 @@ def _get_llm(
     model_name: str,
     timeout_seconds: int,
     max_retries: int,
-) -> ChatGoogleGenerativeAI:
-    """Create Gemini LLM instance."""
-    return ChatGoogleGenerativeAI(
-        model=model_name,
-        google_api_key=api_key,
-        temperature=0.2,
-        timeout=timeout_seconds,
-        max_retries=max_retries,
-    )
+) -> Any:
+    """Return the pooled Gemini LLM instance for this model."""
+    return get_client_pool().get(api_key, model_name, timeout_seconds, max_retries)
 
 
-def _invoke_with_model_fallback(
+def _should_try_next_model(error: Exception) -> bool:
+    error_text = str(error)
+    return any(code in error_text for code in _FALLBACK_ERROR_MARKERS)
+
+
+async def _call_model(
+    model_name: str,
+    reservation: Reservation,
+    messages: list,
+    api_key: str,
+    timeout_seconds: int,
+    max_retries: int,
+    prompt_tokens: int,
+) -> Any:
+    """One model call on an acquired reservation, with router, metric and budget bookkeeping."""
+    router = get_model_router()
+    MODEL_ATTEMPTS.labels(model_name).inc()
+    in_flight = MODEL_IN_FLIGHT.labels(model_name)
+    in_flight.inc()
+    started = time.perf_counter()
+    try:
+        llm = _get_llm(api_key, model_name, timeout_seconds, max_retries)
+        response = await llm.ainvoke(messages)
+    except Exception as e:
+        router.record_failure(model_name, e)
+        record_model_error(model_name, e, fallback=_should_try_next_model(e))
+        raise
+    finally:
+        in_flight.dec()
+    router.record_success(model_name, time.perf_counter() - started)
+    get_rate_limiter().settle(reservation, response_tokens(response))
+    record_model_tokens(model_name, *usage_tokens(response, prompt_tokens))
+    return response
+
+
+async def _call_hedged(
+    node: str,
+    model_name: str,
+    reservation: Reservation,
+    candidates: list[str],
+    messages: list,
+    api_key: str,
+    timeout_seconds: int,
+    max_retries: int,
+    prompt_tokens: int,
+) -> tuple[Any, str]:
+    """Call `model_name`; if it is slower than the node's hedge delay, race a duplicate against it.
+
+    The duplicate goes to the next candidate (or the same model), only when the hedge budget
+    and that model's rate limit allow it right away. The first successful response wins and
+    the other call is cancelled; if both fail, the primary's error is raised. A cancelled
+    primary still records its elapsed time as a (censored) latency sample.
+    """
+    policy = get_hedge_policy()
+    delay = policy.hedge_delay(node) if policy else None
+
+    async def call(name: str, reserved: Reservation, is_primary: bool = False) -> Any:
+        started = time.perf_counter()
+        try:
+            response = await _call_model(name, reserved, messages, api_key, timeout_seconds, max_retries, prompt_tokens)
+        except asyncio.CancelledError:
+            if policy and is_primary:
+                policy.observe(node, time.perf_counter() - started, censored=True)
+            raise
+        if policy:
+            policy.observe(node, time.perf_counter() - started)
+        return response
+
+    if delay is None:
+        return await call(model_name, reservation, is_primary=True), model_name
+    primary = asyncio.ensure_future(call(model_name, reservation, is_primary=True))
+    tasks = {primary: model_name}
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result(), model_name
+        hedge_model = policy.hedge_model(model_name, candidates)
+        hedge_reservation = get_rate_limiter().try_reserve(hedge_model, reservation.tokens)
+        if hedge_reservation is None or not policy.try_hedge(node):
+            if hedge_reservation is not None:
+                get_rate_limiter().cancel(hedge_reservation)
+            HEDGES.labels(node, "skipped").inc()
+            return await primary, model_name
+        HEDGES.labels(node, "fired").inc()
+        hedge = asyncio.ensure_future(call(hedge_model, hedge_reservation))
+        tasks[hedge] = hedge_model
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        policy.record_win(node)
+                    HEDGES.labels(node, "hedge_won" if task is hedge else "primary_won").inc()
+                    return task.result(), tasks[task]
+        return primary.result(), model_name
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+async def _invoke_with_model_fallback(
     messages: list,
     api_key: str,
     model_candidates: list[str],
     timeout_seconds: int,
     max_retries: int,
+    node: str = "",
 ) -> tuple[Any, str]:
-    """Try model candidates in order and return (response, used_model)."""
+    """Try model candidates in router order and return (response, used_model).
+
+    Models with rate-limit budget left are tried first; each attempt waits for the
+    model's budget without blocking the event loop, and a model whose budget would not
+    free up within RATE_LIMIT_MAX_WAIT_SECONDS is skipped. With HEDGE_ENABLED, slow
+    calls of `node` are hedged (see `_call_hedged`).
+    """
     if not model_candidates:
         raise ValueError("No Gemini models configured.")
 
+    router = get_model_router()
+    limiter = get_rate_limiter()
+    prompt_tokens = estimate_prompt_tokens(messages)
+    tokens = prompt_tokens + DEFAULT_OUTPUT_TOKENS
     last_error: Exception | None = None
-    for model_name in model_candidates:
+    ordered = limiter.prefer_available(router.order(model_candidates), tokens)
+    for model_name in ordered:
+        try:
+            reservation = await limiter.aacquire(model_name, tokens)
+        except RateLimitExceeded as e:
+            # Out of local budget: not a model failure, so the router is not told.
+            record_model_error(model_name, e, fallback=True)
+            last_error = e
+            continue
         try:
-            llm = _get_llm(api_key, model_name, timeout_seconds, max_retries)
-            return llm.invoke(messages), model_name
+            return await _call_hedged(
+                node, model_name, reservation, ordered, messages, api_key, timeout_seconds, max_retries, prompt_tokens
+            )
         except Exception as e:
             last_error = e
-            error_text = str(e)
-            # Try next model for common provider-side issues.
-            if any(
-                code in error_text
-                for code in (
-                    "429",
-                    "RESOURCE_EXHAUSTED",
-                    "404",
-                    "NOT_FOUND",
-                    "400",
-                    "INVALID_ARGUMENT",
-                    "Developer instruction is not",
-                )
-            ):
+            if _should_try_next_model(e):
                 continue
             raise
 
     raise RuntimeError(f"All Gemini model candidates failed: {last_error}")
 
 
-def _parse_json_from_response(text: str) -> dict[str, Any]:
-    """Extract JSON from LLM response (may be wrapped in markdown)."""
-    text = text.strip()
-    if text.startswith("```"):
-        lines = text.split("\n")
-        start = 1 if lines[0].startswith("```json") else 0
-        end = next((i for i, L in enumerate(lines) if L.strip() == "```"), len(lines))
-        text = "\n".join(lines[start:end])
-    return json.loads(text)
+# Unusable responses that a corrective re-prompt may fix (pydantic's ValidationError and
+# JSONRepairError are ValueErrors; KeyError is a missing section of the fused output).
+_REPAIRABLE_ERRORS = (ValueError, KeyError, TypeError)
 
 
-def classify_purpose(
-    state: dict[str, Any],
+def _response_text(response: Any) -> str:
+    return response.content if hasattr(response, "content") else str(response)
+
+
+def _response_data(response: Any, node: str) -> dict[str, Any]:
+    try:
+        data, repaired = parse_json_response(_response_text(response))
+    except JSONRepairError:
+        PARSE_FAILURES.labels(node).inc()
+        raise
+    if repaired:
+        PARSE_FAILURES.labels(node).inc()
+        JSON_REPAIRS.labels(node, "repaired").inc()
+    return data
+
+
+def _reprompt_messages(messages: list, response: Any, error: Exception) -> list:
+    """The original prompt, the unusable reply and a request to correct it."""
+    error_text = " ".join(str(error).split())[:300]
+    return [
+        *messages,
+        AIMessage(content=_response_text(response)),
+        HumanMessage(content=JSON_REPAIR_USER.format(error=error_text)),
+    ]
+
+
+async def _run_node(
+    node: str,
+    messages: list,
+    build_update: Callable[[Any, str], dict[str, Any]],
     api_key: str,
     model_candidates: list[str],
     timeout_seconds: int,
     max_retries: int,
 ) -> dict[str, Any]:
-    """Node: classify the primary purpose of the call."""
+    """Call the model and build the node's update, re-prompting only this node if the reply is unusable."""
+    reprompts = max(0, get_settings().node_reprompt_retries)
+    prompt = messages
+    for attempt in range(reprompts + 1):
+        response, used_model = await _invoke_with_model_fallback(
+            prompt, api_key, model_candidates, timeout_seconds, max_retries, node
+        )
+        try:
+            update = build_update(response, used_model)
+        except _REPAIRABLE_ERRORS as e:
+            if attempt == reprompts:
+                JSON_REPAIRS.labels(node, "failed").inc()
+                raise
+            prompt = _reprompt_messages(messages, response, e)
+            continue
+        if attempt:
+            JSON_REPAIRS.labels(node, "reprompted").inc()
+        return update
+
+
+def _preferred_candidates(state: dict[str, Any], model_candidates: list[str]) -> list[str]:
+    """Put the model that served the previous node first, without duplicates."""
+    preferred_model = state.get("model_used")
+    candidates = [preferred_model] + model_candidates if preferred_model else model_candidates
+    deduped_candidates = []
+    for name in candidates:
+        if name and name not in deduped_candidates:
+            deduped_candidates.append(name)
+    return deduped_candidates
+
+
+def _purpose_messages(state: dict[str, Any]) -> list:
     conversation_text = state["conversation_text"]
-    messages = [
+    return [
         SystemMessage(content=PURPOSE_CLASSIFY_SYSTEM),
         HumanMessage(content=PURPOSE_CLASSIFY_USER.format(conversation_text=conversation_text)),
     ]
-    response, used_model = _invoke_with_model_fallback(
-        messages,
-        api_key,
-        model_candidates,
-        timeout_seconds,
-        max_retries,
-    )
-    raw = response.content if hasattr(response, "content") else str(response)
-    data = _parse_json_from_response(raw)
-    purpose_result = PurposeResult(
-        purpose=data.get("purpose", "other"),
-        confidence=data.get("confidence", "medium"),
-        summary=data.get("summary", ""),
-    )
+
+
+def _purpose_update(response: Any, used_model: str) -> dict[str, Any]:
+    data = _response_data(response, "classify_purpose")
+    purpose_result = coerce_to_model(data, PurposeResult, {"purpose": "other", "confidence": "medium", "summary": ""})
     return {
         "purpose_result": purpose_result.model_dump(),
         "purpose_summary": purpose_result.summary,
@@ -117,47 +300,25 @@ def classify_purpose(
     }
 
 
-def analyze_failure_reason(
-    state: dict[str, Any],
-    api_key: str,
-    model_candidates: list[str],
-    timeout_seconds: int,
-    max_retries: int,
-) -> dict[str, Any]:
-    """Node: analyze why the call purpose was not achieved."""
-    conversation_text = state["conversation_text"]
-    purpose_label = state.get("purpose_label", "other")
-    purpose_summary = state.get("purpose_summary", "")
-    preferred_model = state.get("model_used")
-    candidates = [preferred_model] + model_candidates if preferred_model else model_candidates
-    deduped_candidates = []
-    for name in candidates:
-        if name and name not in deduped_candidates:
-            deduped_candidates.append(name)
-    messages = [
+def _failure_messages(state: dict[str, Any]) -> list:
+    return [
         SystemMessage(content=FAILURE_REASON_SYSTEM),
         HumanMessage(
             content=FAILURE_REASON_USER.format(
-                purpose=purpose_label,
-                summary=purpose_summary,
-                conversation_text=conversation_text,
+                purpose=state.get("purpose_label", "other"),
+                summary=state.get("purpose_summary", ""),
+                conversation_text=state["conversation_text"],
             )
         ),
     ]
-    response, used_model = _invoke_with_model_fallback(
-        messages,
-        api_key,
-        deduped_candidates,
-        timeout_seconds,
-        max_retries,
-    )
-    raw = response.content if hasattr(response, "content") else str(response)
-    data = _parse_json_from_response(raw)
-    failure_result = FailureReasonResult(
-        reason_category=data.get("reason_category", "other"),
-        explanation=data.get("explanation", ""),
-        evidence=data.get("evidence", []),
-        recommendation=data.get("recommendation", ""),
+
+
+def _failure_update(response: Any, used_model: str) -> dict[str, Any]:
+    data = _response_data(response, "analyze_failure_reason")
+    failure_result = coerce_to_model(
+        data,
+        FailureReasonResult,
+        {"reason_category": "other", "explanation": "", "evidence": [], "recommendation": ""},
     )
     return {
         "failure_reason_result": failure_result.model_dump(),
@@ -165,30 +326,35 @@ def analyze_failure_reason(
     }
 
 
-def generate_action_plan(
-    state: dict[str, Any],
-    api_key: str,
-    model_candidates: list[str],
-    timeout_seconds: int,
-    max_retries: int,
-) -> dict[str, Any]:
-    """Node: generate end-to-end actionable plan as a separate output."""
-    purpose_label = state.get("purpose_label", "other")
-    purpose_summary = state.get("purpose_summary", "")
-    failure_reason = state.get("failure_reason_result", {}) or {}
-    preferred_model = state.get("model_used")
-    candidates = [preferred_model] + model_candidates if preferred_model else model_candidates
-    deduped_candidates = []
-    for name in candidates:
-        if name and name not in deduped_candidates:
-            deduped_candidates.append(name)
+def _speculative_failure_messages(state: dict[str, Any]) -> list:
+    return [
+        SystemMessage(content=SPECULATIVE_FAILURE_SYSTEM),
+        HumanMessage(content=SPECULATIVE_FAILURE_USER.format(conversation_text=state["conversation_text"])),
+    ]
+
+
+def _speculative_failure_update(response: Any, used_model: str) -> dict[str, Any]:
+    """Failure reason plus the purpose the model inferred; `model_used` is left to the classifier running alongside."""
+    data = _response_data(response, "speculate_failure_reason")
+    failure_result = coerce_to_model(
+        data,
+        FailureReasonResult,
+        {"reason_category": "other", "explanation": "", "evidence": [], "recommendation": ""},
+    )
+    return {
+        "failure_reason_result": failure_result.model_dump(),
+        "inferred_purpose": str(data.get("purpose") or "other"),
+    }
+
 
-    messages = [
+def _action_plan_messages(state: dict[str, Any]) -> list:
+    failure_reason = state.get("failure_reason_result", {}) or {}
+    return [
         SystemMessage(content=ACTION_PLAN_SYSTEM),
         HumanMessage(
             content=ACTION_PLAN_USER.format(
-                purpose=purpose_label,
-                purpose_summary=purpose_summary,
+                purpose=state.get("purpose_label", "other"),
+                purpose_summary=state.get("purpose_summary", ""),
                 reason_category=failure_reason.get("reason_category", "other"),
                 explanation=failure_reason.get("explanation", ""),
                 recommendation=failure_reason.get("recommendation", ""),
@@ -196,22 +362,177 @@ def generate_action_plan(
             )
         ),
     ]
-    response, used_model = _invoke_with_model_fallback(
-        messages,
-        api_key,
-        deduped_candidates,
-        timeout_seconds,
-        max_retries,
-    )
-    raw = response.content if hasattr(response, "content") else str(response)
-    data = _parse_json_from_response(raw)
-    action_plan_result = ActionPlanResult(
-        goal=data.get("goal", ""),
-        steps=data.get("steps", []),
-        owner=data.get("owner", ""),
-        success_criteria=data.get("success_criteria", ""),
+
+
+def _action_plan_update(response: Any, used_model: str) -> dict[str, Any]:
+    data = _response_data(response, "generate_action_plan")
+    action_plan_result = coerce_to_model(
+        data,
+        ActionPlanResult,
+        {"goal": "", "steps": [], "owner": "", "success_criteria": ""},
     )
     return {
         "action_plan_result": action_plan_result.model_dump(),
         "model_used": used_model,
     }
+
+
+def _fused_messages(state: dict[str, Any]) -> list:
+    return [
+        SystemMessage(content=FUSED_ANALYSIS_SYSTEM),
+        HumanMessage(content=FUSED_ANALYSIS_USER.format(conversation_text=state["conversation_text"])),
+    ]
+
+
+def _fused_update(response: Any, used_model: str) -> dict[str, Any]:
+    """Require all three results; a missing section or required field raises."""
+    data = _response_data(response, "fused_analysis")
+    purpose_result = coerce_to_model(data["purpose"], PurposeResult)
+    failure_result = coerce_to_model(data["failure_reason"], FailureReasonResult)
+    action_plan_result = coerce_to_model(data["action_plan"], ActionPlanResult)
+    return {
+        "purpose_result": purpose_result.model_dump(),
+        "purpose_summary": purpose_result.summary,
+        "purpose_label": purpose_result.purpose,
+        "failure_reason_result": failure_result.model_dump(),
+        "action_plan_result": action_plan_result.model_dump(),
+        "model_used": used_model,
+    }
+
+
+def pre_classify(state: dict[str, Any]) -> dict[str, Any]:
+    """Node: fill obvious results from the fast-path rules so the matching LLM nodes are skipped."""
+    rule_set = get_rule_set()
+    if rule_set is None:
+        return {}
+    update = rule_set.classify(state["conversation_text"])
+    skipped = []
+    if "purpose_result" in update:
+        skipped.append("classify_purpose")
+    if "failure_reason_result" in update:
+        skipped.append("analyze_failure_reason")
+    if skipped:
+        update["skipped_nodes"] = skipped
+    return update
+
+
+def _same_label(a: str | None, b: str | None) -> bool:
+    return (a or "").strip().lower() == (b or "").strip().lower()
+
+
+def check_speculation(state: dict[str, Any]) -> dict[str, Any]:
+    """Node (parallel pipeline): keep the speculative failure analysis if its purpose matches the classifier's.
+
+    Records the outcome and the wall-clock time it saved (both calls overlapped) or lost
+    (the speculative call outlasted the classifier and must be re-run anyway).
+    """
+    inferred = state.get("inferred_purpose")
+    if inferred is None:
+        # The rules filled the failure reason; nothing was speculated.
+        return {}
+    purpose_seconds = state.get("purpose_seconds", 0.0)
+    speculation_seconds = state.get("speculation_seconds", 0.0)
+    if _same_label(inferred, state.get("purpose_label")):
+        SPECULATIONS.labels(SPECULATION_AGREED).inc()
+        SPECULATION_SECONDS.labels("saved").inc(min(purpose_seconds, speculation_seconds))
+        return {"speculation": SPECULATION_AGREED}
+    SPECULATIONS.labels(SPECULATION_RERUN).inc()
+    SPECULATION_SECONDS.labels("lost").inc(max(0.0, speculation_seconds - purpose_seconds))
+    return {"speculation": SPECULATION_RERUN}
+
+
+async def classify_purpose(
+    state: dict[str, Any],
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+) -> dict[str, Any]:
+    """Node: classify the primary purpose of the call."""
+    return await _run_node(
+        "classify_purpose",
+        _purpose_messages(state),
+        _purpose_update,
+        api_key,
+        model_candidates,
+        timeout_seconds,
+        max_retries,
+    )
+
+
+async def analyze_failure_reason(
+    state: dict[str, Any],
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+) -> dict[str, Any]:
+    """Node: analyze why the call purpose was not achieved."""
+    return await _run_node(
+        "analyze_failure_reason",
+        _failure_messages(state),
+        _failure_update,
+        api_key,
+        _preferred_candidates(state, model_candidates),
+        timeout_seconds,
+        max_retries,
+    )
+
+
+async def speculate_failure_reason(
+    state: dict[str, Any],
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+) -> dict[str, Any]:
+    """Node (parallel pipeline): analyze the failure without waiting for the purpose, inferring it instead."""
+    if state.get("failure_reason_result"):
+        return {}
+    return await _run_node(
+        "speculate_failure_reason",
+        _speculative_failure_messages(state),
+        _speculative_failure_update,
+        api_key,
+        model_candidates,
+        timeout_seconds,
+        max_retries,
+    )
+
+
+async def generate_action_plan(
+    state: dict[str, Any],
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+) -> dict[str, Any]:
+    """Node: generate end-to-end actionable plan as a separate output."""
+    return await _run_node(
+        "generate_action_plan",
+        _action_plan_messages(state),
+        _action_plan_update,
+        api_key,
+        _preferred_candidates(state, model_candidates),
+        timeout_seconds,
+        max_retries,
+    )
+
+
+async def fused_analysis(
+    state: dict[str, Any],
+    api_key: str,
+    model_candidates: list[str],
+    timeout_seconds: int,
+    max_retries: int,
+) -> dict[str, Any]:
+    """Purpose, failure reason and action plan from a single LLM call."""
+    return await _run_node(
+        "fused_analysis",
+        _fused_messages(state),
+        _fused_update,
+        api_key,
+        model_candidates,
+        timeout_seconds,
+        max_retries,
+    )
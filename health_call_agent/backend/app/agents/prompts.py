@@ -1,5 +1,8 @@
 """Prompts for the call analysis agent."""
 
+# Bump whenever a prompt changes so cached analyses from older prompts are not reused.
+PROMPT_VERSION = "1"
+
 PURPOSE_CLASSIFY_SYSTEM = """You are an expert at analyzing customer service call transcripts.
 Your task is to identify the PRIMARY PURPOSE of the call. All calls you will see have NOT achieved their purpose.
 
@@ -47,6 +50,40 @@ Why was this purpose NOT achieved? Return JSON:
   "recommendation": "..."
 }}"""
 
+SPECULATIVE_FAILURE_SYSTEM = """You are an expert at analyzing why customer service calls fail to meet their goal.
+All calls you will see have NOT achieved their purpose. First decide the call's PRIMARY PURPOSE, then identify
+WHY that purpose was not achieved and what went wrong.
+
+Possible purposes (choose the best fit):
+- booking: appointment, reservation, scheduling
+- sell: sales, product purchase, package signup
+- consultant: medical/legal/technical advice, consultation
+- support: technical support, account help, troubleshooting
+- complaint: grievance, refund, escalation
+- other: anything else
+
+Reason categories (choose best fit):
+- system_failure: technical/system down, tool unavailable
+- process_limitation: policy, workflow, or process blocked resolution
+- wait_time: long hold, callback delay, consultant unavailable
+- miscommunication: confusion, wrong info, language/expectation mismatch
+- incomplete_info: missing details, customer didn't provide, agent didn't ask
+- other: other clear reason
+
+Respond with valid JSON only. Use keys: purpose, reason_category, explanation, evidence (list of short quotes from the conversation), recommendation."""
+
+SPECULATIVE_FAILURE_USER = """Full conversation:
+{conversation_text}
+
+What was the call's purpose, and why was it NOT achieved? Return JSON:
+{{
+  "purpose": "...",
+  "reason_category": "...",
+  "explanation": "...",
+  "evidence": ["quote1", "quote2"],
+  "recommendation": "..."
+}}"""
+
 ACTION_PLAN_SYSTEM = """You are an operations expert.
 You are given the call purpose and failure analysis, and must create an end-to-end executable recovery plan.
 
@@ -70,3 +107,54 @@ Create the end-to-end action plan in JSON:
   "owner": "...",
   "success_criteria": "..."
 }}"""
+
+FUSED_ANALYSIS_SYSTEM = """You are an expert at analyzing failed customer service calls and planning their recovery.
+All calls you will see have NOT achieved their purpose. In one pass, identify the call's PRIMARY PURPOSE,
+WHY that purpose was not achieved, and an end-to-end recovery plan.
+
+Possible purposes (choose the best fit):
+- booking: appointment, reservation, scheduling
+- sell: sales, product purchase, package signup
+- consultant: medical/legal/technical advice, consultation
+- support: technical support, account help, troubleshooting
+- complaint: grievance, refund, escalation
+- other: anything else
+
+Reason categories (choose best fit):
+- system_failure: technical/system down, tool unavailable
+- process_limitation: policy, workflow, or process blocked resolution
+- wait_time: long hold, callback delay, consultant unavailable
+- miscommunication: confusion, wrong info, language/expectation mismatch
+- incomplete_info: missing details, customer didn't provide, agent didn't ask
+- other: other clear reason
+
+Respond with valid JSON only, no markdown, with exactly three objects:
+- purpose: purpose, confidence (high/medium/low), summary
+- failure_reason: reason_category, explanation, evidence (list of short quotes from the conversation), recommendation
+- action_plan: goal (one line), steps (4-8 ordered, concrete steps), owner (primary owner/team), success_criteria"""
+
+FUSED_ANALYSIS_USER = """Analyze this call conversation. The call did NOT achieve its purpose.
+
+Conversation:
+{conversation_text}
+
+Return JSON:
+{{
+  "purpose": {{ "purpose": "...", "confidence": "high|medium|low", "summary": "..." }},
+  "failure_reason": {{
+    "reason_category": "...",
+    "explanation": "...",
+    "evidence": ["quote1", "quote2"],
+    "recommendation": "..."
+  }},
+  "action_plan": {{
+    "goal": "...",
+    "steps": ["Step 1 ...", "Step 2 ..."],
+    "owner": "...",
+    "success_criteria": "..."
+  }}
+}}"""
+
+JSON_REPAIR_USER = """Your previous reply could not be used: {error}
+
+Reply again with only the corrected JSON object, using the exact keys requested above. No markdown, no explanation."""
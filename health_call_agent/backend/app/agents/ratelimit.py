@@ -0,0 +1,228 @@
+"""Client-side requests-per-minute / tokens-per-minute budget per model.
+
+Callers reserve capacity before calling Gemini and wait for it instead of spending a
+request that would come back 429. Reservations are handed out in arrival order, so
+waiters are served first-come first-served.
+"""
+
+import asyncio
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable
+
+from app.config import get_settings
+
+
+class RateLimitExceeded(Exception):
+    """The model's budget would not free up within the max wait.
+
+    The message carries the quota markers, so the node fallback moves on to the next model.
+    """
+
+
+class _Bucket:
+    """Token bucket refilled continuously at `per_minute / 60`; the level may go negative
+    while reservations are waiting for capacity."""
+
+    __slots__ = ("capacity", "rate", "level", "updated_at")
+
+    def __init__(self, per_minute: int, now: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated_at = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` would be available (after already queued reservations)."""
+        missing = amount - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+
+class _ModelLimiter:
+    def __init__(self, rpm: int, tpm: int, now: float):
+        self.requests = _Bucket(rpm, now) if rpm > 0 else None
+        self.tokens = _Bucket(tpm, now) if tpm > 0 else None
+        self.waiting = 0
+        self.acquired = 0
+        self.waited = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+
+class Reservation:
+    """Capacity reserved for one request; `delay` is how long the caller must wait."""
+
+    __slots__ = ("model_name", "tokens", "delay")
+
+    def __init__(self, model_name: str, tokens: int, delay: float):
+        self.model_name = model_name
+        self.tokens = tokens
+        self.delay = delay
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rpm: int = 0,
+        tpm: int = 0,
+        model_limits: dict[str, tuple[int, int]] | None = None,
+        max_wait_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.model_limits = model_limits or {}
+        self.max_wait_seconds = max_wait_seconds
+        self._clock = clock
+        self._models: dict[str, _ModelLimiter] = {}
+        self._lock = threading.Lock()
+
+    def _limiter(self, model_name: str, now: float) -> _ModelLimiter:
+        limiter = self._models.get(model_name)
+        if limiter is None:
+            rpm, tpm = self.model_limits.get(model_name, (self.rpm, self.tpm))
+            limiter = self._models[model_name] = _ModelLimiter(rpm, tpm, now)
+        return limiter
+
+    def _delay(self, limiter: _ModelLimiter, tokens: int, now: float) -> float:
+        delay = 0.0
+        for bucket, amount in ((limiter.requests, 1), (limiter.tokens, tokens)):
+            if bucket is not None:
+                bucket.refill(now)
+                # A request larger than the whole budget would never fit; let it through at full cost.
+                delay = max(delay, bucket.wait_for(min(amount, bucket.capacity)))
+        return delay
+
+    def prefer_available(self, candidates: list[str], tokens: int) -> list[str]:
+        """Move models that have budget right now ahead of models that would make the caller wait."""
+        if not self.enabled or len(candidates) < 2:
+            return candidates
+        now = self._clock()
+        with self._lock:
+            waits = [self._delay(self._limiter(name, now), tokens, now) > 0 for name in candidates]
+        return [name for _, name in sorted(zip(waits, candidates), key=lambda pair: pair[0])]
+
+    def _take(self, limiter: _ModelLimiter, tokens: int, delay: float) -> None:
+        if limiter.requests is not None:
+            limiter.requests.level -= 1
+        if limiter.tokens is not None:
+            limiter.tokens.level -= tokens
+        limiter.acquired += 1
+        if delay > 0:
+            limiter.waited += 1
+            limiter.waiting += 1
+            limiter.wait_seconds_total += delay
+            limiter.max_wait_seconds = max(limiter.max_wait_seconds, delay)
+
+    def reserve(self, model_name: str, tokens: int) -> Reservation:
+        """Reserve one request and `tokens` tokens, or raise RateLimitExceeded."""
+        now = self._clock()
+        with self._lock:
+            limiter = self._limiter(model_name, now)
+            delay = self._delay(limiter, tokens, now)
+            if delay > self.max_wait_seconds:
+                limiter.rejected += 1
+                raise RateLimitExceeded(
+                    f"429 RESOURCE_EXHAUSTED (client-side rate limit): {model_name} has no budget "
+                    f"for {delay:.1f}s (max wait {self.max_wait_seconds:g}s)"
+                )
+            self._take(limiter, tokens, delay)
+        return Reservation(model_name, tokens if limiter.tokens is not None else 0, delay)
+
+    def try_reserve(self, model_name: str, tokens: int) -> Reservation | None:
+        """Reserve only if the model has budget right now; None instead of waiting."""
+        now = self._clock()
+        with self._lock:
+            limiter = self._limiter(model_name, now)
+            if self._delay(limiter, tokens, now) > 0:
+                return None
+            self._take(limiter, tokens, 0.0)
+        return Reservation(model_name, tokens if limiter.tokens is not None else 0, 0.0)
+
+    def _done_waiting(self, reservation: Reservation) -> None:
+        if reservation.delay > 0:
+            with self._lock:
+                self._models[reservation.model_name].waiting -= 1
+
+    def cancel(self, reservation: Reservation) -> None:
+        """Give back capacity of a reservation that was never used.
+
+        Reservations already queued keep the delay they were handed, so they may wait a little
+        longer than needed; the capacity goes to the next arrival, which still lines up behind them.
+        """
+        with self._lock:
+            limiter = self._models[reservation.model_name]
+            if limiter.requests is not None:
+                limiter.requests.level += 1
+            if limiter.tokens is not None:
+                limiter.tokens.level += reservation.tokens
+
+    def settle(self, reservation: Reservation, actual_tokens: int | None) -> None:
+        """Correct the token bucket with the usage reported by the provider."""
+        if not actual_tokens or not reservation.tokens:
+            return
+        with self._lock:
+            bucket = self._models[reservation.model_name].tokens
+            if bucket is not None:
+                bucket.level += reservation.tokens - actual_tokens
+
+    async def aacquire(self, model_name: str, tokens: int) -> Reservation:
+        """Wait for the reservation's turn without blocking the event loop."""
+        reservation = self.reserve(model_name, tokens)
+        if reservation.delay > 0:
+            try:
+                await asyncio.sleep(reservation.delay)
+            except asyncio.CancelledError:
+                self.cancel(reservation)
+                raise
+            finally:
+                self._done_waiting(reservation)
+        return reservation
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rpm or self.tpm or self.model_limits)
+
+    def stats(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            models = {}
+            for name, limiter in self._models.items():
+                entry: dict[str, Any] = {
+                    "queue_depth": limiter.waiting,
+                    "acquired": limiter.acquired,
+                    "waited": limiter.waited,
+                    "rejected": limiter.rejected,
+                    "wait_seconds_total": round(limiter.wait_seconds_total, 3),
+                    "max_wait_seconds": round(limiter.max_wait_seconds, 3),
+                }
+                for key, bucket in (("requests", limiter.requests), ("tokens", limiter.tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        entry[f"{key}_per_minute"] = int(bucket.capacity)
+                        entry[f"{key}_available"] = round(bucket.level, 1)
+                models[name] = entry
+        return {
+            "enabled": self.enabled,
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "max_wait_seconds": self.max_wait_seconds,
+            "models": models,
+        }
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    settings = get_settings()
+    return RateLimiter(
+        rpm=settings.rate_limit_rpm,
+        tpm=settings.rate_limit_tpm,
+        model_limits=settings.rate_limit_models,
+        max_wait_seconds=settings.rate_limit_max_wait_seconds,
+    )
@@ -0,0 +1,73 @@
+"""Compiled-graph registry and startup warmup, kept free of LangGraph / Gemini imports.
+
+The app can answer `/api/health` before the heavy modules are loaded; `warm_up` loads
+them, compiles the graph and creates the Gemini clients, then marks the process ready.
+"""
+
+import logging
+import threading
+import time
+from typing import Any
+
+from app.agents.clients import get_client_pool
+
+logger = logging.getLogger(__name__)
+
+# Compiled graphs keyed by (api key, model candidates, timeout, retries, parallel topology).
+graph_registry: dict[tuple, Any] = {}
+registry_lock = threading.Lock()
+
+_ready = threading.Event()
+_warmup: dict[str, Any] = {"seconds": None, "error": None}
+
+
+def warm_up(settings) -> None:
+    """Import the graph and Gemini modules, compile the graph and create clients; then mark ready."""
+    started = time.perf_counter()
+    try:
+        from app.agents.graph import warm_graph_registry
+
+        warm_graph_registry(settings)
+        if settings.is_configured:
+            get_client_pool().warm(
+                settings.google_api_key,
+                settings.gemini_models,
+                settings.gemini_timeout_seconds,
+                settings.gemini_max_retries,
+            )
+    except Exception as e:
+        _warmup["error"] = str(e)
+        logger.exception("Warmup failed; modules will load on the first analysis instead")
+        return
+    _warmup["seconds"] = round(time.perf_counter() - started, 3)
+    _ready.set()
+    logger.info("Warmup finished in %.2f s", _warmup["seconds"])
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def readiness() -> dict[str, Any]:
+    return {"ready": _ready.is_set(), "warmup_seconds": _warmup["seconds"], "warmup_error": _warmup["error"]}
+
+
+def close_graph_registry() -> None:
+    """Close checkpointers that hold a database connection (called at app shutdown)."""
+    with registry_lock:
+        graphs = list(graph_registry.values())
+        graph_registry.clear()
+    for graph in graphs:
+        close = getattr(getattr(graph, "checkpointer", None), "close", None)
+        if close is not None:
+            close()
+
+
+def graph_registry_stats() -> dict[str, Any]:
+    """Number of compiled graphs and their checkpointer usage."""
+    checkpointers = []
+    for graph in list(graph_registry.values()):
+        saver = getattr(graph, "checkpointer", None)
+        if saver is not None and hasattr(saver, "stats"):
+            checkpointers.append(saver.stats())
+    return {"compiled_graphs": len(graph_registry), "checkpointers": checkpointers}
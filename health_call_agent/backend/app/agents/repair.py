@@ -0,0 +1,178 @@
+"""Tolerant parsing of model JSON output: extract, repair and coerce before giving up on a response."""
+
+import json
+import re
+from typing import Any
+
+from pydantic import BaseModel
+
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_SMART_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+_PYTHON_LITERALS = re.compile(r"(?<![\"\w])(True|False|None)(?![\"\w])")
+_BARE_KEY = re.compile(r"([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*:)")
+_LITERAL_JSON = {"True": "true", "False": "false", "None": "null"}
+_JSON_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+
+
+class JSONRepairError(ValueError):
+    """The response holds no JSON object, even after repair."""
+
+
+def _strip_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        lines = text.split("\n")
+        end = next((i for i, line in enumerate(lines[1:], start=1) if line.strip() == "```"), len(lines))
+        text = "\n".join(lines[1:end])
+    return text.strip()
+
+
+def extract_json_object(text: str) -> str | None:
+    """First balanced `{...}` in the text, skipping braces inside strings; unclosed objects are closed."""
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack = []
+    quote = None
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if quote:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == quote:
+                quote = None
+            continue
+        if ch in "\"'":
+            quote = ch
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if stack and stack[-1] == ch:
+                stack.pop()
+            if not stack:
+                return text[start : i + 1]
+    # Truncated response: close what is still open.
+    tail = text[start:].rstrip().rstrip(",")
+    if quote:
+        tail += quote
+    return tail + "".join(reversed(stack))
+
+
+def _single_to_double_quotes(text: str) -> str:
+    """Turn 'single-quoted' strings into JSON strings, leaving apostrophes inside double quotes alone."""
+    out = []
+    quote = None
+    escaped = False
+    for ch in text:
+        if quote:
+            if escaped:
+                escaped = False
+                out.append(ch)
+                continue
+            if ch == "\\":
+                escaped = True
+                out.append(ch)
+                continue
+            if ch == quote:
+                quote = None
+                out.append('"')
+                continue
+            out.append('\\"' if ch == '"' and quote == "'" else ch)
+            continue
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+            continue
+        out.append(ch)
+    return "".join(out)
+
+
+def _repair_structure(text: str) -> str:
+    text = _BARE_KEY.sub(r'\1"\2"\3', text)
+    text = _PYTHON_LITERALS.sub(lambda m: _LITERAL_JSON[m.group(1)], text)
+    return _TRAILING_COMMA.sub(r"\1", text)
+
+
+def repair_json_text(text: str) -> str:
+    """Common model mistakes: smart quotes, single quotes, bare keys, Python literals, trailing commas.
+
+    Once all strings are double-quoted, the key, literal and comma fixes are applied only between
+    string literals, so text such as "None, per the caller: True" inside a value is left alone.
+    """
+    text = text.translate(_SMART_QUOTES)
+    text = _single_to_double_quotes(text)
+    out = []
+    end = 0
+    for string in _JSON_STRING.finditer(text):
+        out.append(_repair_structure(text[end : string.start()]))
+        out.append(string.group())
+        end = string.end()
+    out.append(_repair_structure(text[end:]))
+    return "".join(out)
+
+
+def parse_json_response(text: str) -> tuple[dict[str, Any], bool]:
+    """Parse a model response into a dict; returns (data, repaired).
+
+    `repaired` is False when the text (minus a markdown fence) was valid JSON as-is.
+    Raises `JSONRepairError` when no JSON object can be recovered.
+    """
+    stripped = _strip_fence(text)
+    try:
+        data = json.loads(stripped)
+        if isinstance(data, dict):
+            return data, False
+    except json.JSONDecodeError:
+        pass
+    candidate = extract_json_object(stripped)
+    if candidate is None:
+        raise JSONRepairError("No JSON object in the response.")
+    for attempt in (candidate, repair_json_text(candidate)):
+        try:
+            data = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return data, True
+    raise JSONRepairError(f"Could not repair JSON: {candidate[:200]}")
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_as_text(v) for v in value if v not in (None, ""))
+    if isinstance(value, dict):
+        return json.dumps(value)
+    return "" if value is None else str(value)
+
+
+def _as_list(value: Any) -> list[str]:
+    if value is None or value == "":
+        return []
+    if isinstance(value, (list, tuple)):
+        return [_as_text(v) for v in value if v not in (None, "")]
+    if isinstance(value, str):
+        lines = [line.strip(" -*\t") for line in value.splitlines()]
+        return [line for line in lines if line] or [value]
+    return [_as_text(value)]
+
+
+def coerce_to_model(data: Any, model: type[BaseModel], defaults: dict[str, Any] | None = None) -> BaseModel:
+    """Build `model` from loosely typed data: keys matched case-insensitively, strings and lists converted.
+
+    Fields missing from `data` take `defaults`; required fields with no value still fail validation.
+    """
+    if not isinstance(data, dict):
+        raise JSONRepairError(f"Expected an object for {model.__name__}, got {type(data).__name__}.")
+    by_key = {str(k).strip().lower().replace(" ", "_"): v for k, v in data.items()}
+    values = dict(defaults or {})
+    for name, field in model.model_fields.items():
+        if name not in by_key:
+            continue
+        value = by_key[name]
+        values[name] = _as_list(value) if field.annotation == list[str] else _as_text(value)
+    return model.model_validate(values)
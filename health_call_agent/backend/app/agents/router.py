@@ -0,0 +1,193 @@
+"""Adaptive model router: per-model circuit breakers and latency-aware candidate ordering."""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable
+
+from app.config import get_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Quota errors open the circuit immediately instead of after `failure_threshold` failures.
+_QUOTA_ERROR_MARKERS = ("429", "RESOURCE_EXHAUSTED")
+
+
+class ModelHealth:
+    """Circuit state and running statistics for one model."""
+
+    __slots__ = (
+        "state",
+        "consecutive_failures",
+        "opened_at",
+        "ewma_latency",
+        "error_rate",
+        "successes",
+        "failures",
+        "last_error",
+        "probe_started",
+    )
+
+    def __init__(self):
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.ewma_latency: float | None = None
+        self.error_rate = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.last_error = ""
+        self.probe_started: float | None = None
+
+
+class ModelRouter:
+    """Shared view of model health used to order fallback candidates.
+
+    The first candidate (the configured primary, or the model that served the previous
+    node) stays first while its circuit is closed and its last call did not fail. Other
+    healthy (closed) models follow by EWMA latency, then models without samples in the
+    order given, so traffic is never spread over untried fallbacks. Once the first
+    candidate is out, one request at a time probes the first model without samples so it
+    gets measured. A model whose circuit is
+    open is skipped until `cooldown_seconds` pass; it is then half-open and a single
+    request probes it first: success closes the circuit, failure opens it again.
+    Open models are only tried when nothing else is available.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        cooldown_seconds: float = 30.0,
+        ewma_alpha: float = 0.3,
+        adaptive: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_alpha = ewma_alpha
+        self.adaptive = adaptive
+        self._clock = clock
+        self._models: dict[str, ModelHealth] = {}
+        self._lock = threading.Lock()
+
+    def _health(self, model_name: str) -> ModelHealth:
+        health = self._models.get(model_name)
+        if health is None:
+            health = self._models[model_name] = ModelHealth()
+        return health
+
+    def _refresh(self, health: ModelHealth, now: float) -> None:
+        if health.state == OPEN and now - health.opened_at >= self.cooldown_seconds:
+            health.state = HALF_OPEN
+        if health.probe_started is not None and now - health.probe_started >= self.cooldown_seconds:
+            # The probing request never reported back (e.g. it was cancelled).
+            health.probe_started = None
+
+    def order(self, candidates: list[str]) -> list[str]:
+        """Return candidates in the order they should be tried."""
+        if not self.adaptive:
+            return list(candidates)
+        now = self._clock()
+        probes, head, sampled, unsampled, open_ = [], [], [], [], []
+        with self._lock:
+            for position, name in enumerate(candidates):
+                health = self._health(name)
+                self._refresh(health, now)
+                if health.state == CLOSED:
+                    if position == 0 and health.consecutive_failures == 0:
+                        head.append(name)
+                    elif health.ewma_latency is None:
+                        unsampled.append(name)
+                    else:
+                        # Penalize flaky models: expected latency including failed attempts.
+                        score = health.ewma_latency / max(0.05, 1.0 - health.error_rate)
+                        sampled.append((score, position, name))
+                elif health.state == HALF_OPEN and health.probe_started is None:
+                    health.probe_started = now
+                    probes.append(name)
+                else:
+                    open_.append((health.opened_at, name))
+            if not head and unsampled:
+                health = self._models[unsampled[0]]
+                if health.probe_started is None:
+                    health.probe_started = now
+                    probes.append(unsampled.pop(0))
+        ordered = probes + head + [name for *_, name in sorted(sampled)] + unsampled
+        if not ordered:
+            ordered = [name for _, name in sorted(open_)]
+        return ordered
+
+    def record_success(self, model_name: str, latency_seconds: float) -> None:
+        with self._lock:
+            health = self._health(model_name)
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.state = CLOSED
+            health.probe_started = None
+            if health.ewma_latency is None:
+                health.ewma_latency = latency_seconds
+            else:
+                health.ewma_latency += self.ewma_alpha * (latency_seconds - health.ewma_latency)
+            health.error_rate *= 1.0 - self.ewma_alpha
+
+    def record_failure(self, model_name: str, error: Exception) -> None:
+        error_text = str(error)
+        with self._lock:
+            health = self._health(model_name)
+            health.failures += 1
+            health.consecutive_failures += 1
+            health.last_error = error_text[:200]
+            health.probe_started = None
+            health.error_rate += self.ewma_alpha * (1.0 - health.error_rate)
+            quota_error = any(marker in error_text for marker in _QUOTA_ERROR_MARKERS)
+            if (
+                health.state == HALF_OPEN
+                or quota_error
+                or health.consecutive_failures >= self.failure_threshold
+            ):
+                health.state = OPEN
+                health.opened_at = self._clock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            models = {}
+            for name, health in self._models.items():
+                self._refresh(health, now)
+                models[name] = {
+                    "state": health.state,
+                    "ewma_latency_ms": round(health.ewma_latency * 1000, 1) if health.ewma_latency is not None else None,
+                    "error_rate": round(health.error_rate, 4),
+                    "successes": health.successes,
+                    "failures": health.failures,
+                    "consecutive_failures": health.consecutive_failures,
+                    "reopens_in_seconds": (
+                        round(max(0.0, self.cooldown_seconds - (now - health.opened_at)), 1)
+                        if health.state == OPEN
+                        else None
+                    ),
+                    "last_error": health.last_error or None,
+                }
+        return {
+            "adaptive": self.adaptive,
+            "failure_threshold": self.failure_threshold,
+            "cooldown_seconds": self.cooldown_seconds,
+            "models": models,
+        }
+
+
+@lru_cache
+def get_model_router() -> ModelRouter:
+    settings = get_settings()
+    return ModelRouter(
+        failure_threshold=settings.router_failure_threshold,
+        cooldown_seconds=settings.router_cooldown_seconds,
+        ewma_alpha=settings.router_ewma_alpha,
+        adaptive=settings.router_adaptive,
+    )
@@ -0,0 +1,139 @@
+"""Rule-based pre-classifier: fills obvious purpose / failure reason results without calling Gemini."""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.config import get_settings
+from app.schemas import PurposeResult, FailureReasonResult
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent / "fast_path_rules.json"
+
+# Stage name in the rules file -> state key the matching node would fill.
+RULE_STAGES = ("purpose", "failure_reason")
+
+_MAX_EVIDENCE = 3
+_MAX_EVIDENCE_CHARS = 200
+
+
+@dataclass(frozen=True)
+class Rule:
+    stage: str
+    label: str
+    patterns: tuple[str, ...]
+    fields: dict[str, Any]
+    # Distinct patterns of this rule that must match: phrases common in any call only count together.
+    min_signals: int = 1
+
+
+class RuleSet:
+    """All rules compiled into one alternation so a transcript is scanned in a single pass.
+
+    Patterns are lowercase regexes matched case-insensitively from the start of a word.
+    A stage is filled only when exactly one label of that stage matches, at least
+    `min_matches` times and with at least the rule's `min_signals` distinct patterns;
+    anything ambiguous is left to the LLM.
+    """
+
+    def __init__(self, rules: list[Rule], min_matches: int = 1):
+        self.rules = rules
+        self.min_matches = max(1, min_matches)
+        # One named group per pattern, "r<rule>_<pattern>", so a match tells which pattern fired.
+        alternatives = [f"(?P<r{i}_{j}>{p})" for i, rule in enumerate(rules) for j, p in enumerate(rule.patterns)]
+        pattern = r"\b(?:" + "|".join(alternatives) + ")" if alternatives else None
+        # The word boundary is checked once before trying any alternative, and scanning
+        # lowercased text is much cheaper than re.IGNORECASE.
+        self._matcher = re.compile(pattern) if pattern else None
+        self._matcher_ignorecase = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    @classmethod
+    def from_file(cls, path: str | Path) -> "RuleSet":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        rules = []
+        for stage in RULE_STAGES:
+            for entry in data.get(stage, []):
+                fields = {k: v for k, v in entry.items() if k not in ("label", "patterns", "min_signals")}
+                patterns = tuple(entry.get("patterns", []))
+                rules.append(Rule(stage, entry["label"], patterns, fields, max(1, entry.get("min_signals", 1))))
+        return cls(rules, min_matches=data.get("min_matches", 1))
+
+    def match(self, conversation_text: str) -> dict[int, list[re.Match]]:
+        """Rule index -> matches found in the transcript (`m.lastgroup` names the pattern)."""
+        hits: dict[int, list[re.Match]] = {}
+        if self._matcher is None:
+            return hits
+        lowered = conversation_text.lower()
+        if len(lowered) == len(conversation_text):
+            matches = self._matcher.finditer(lowered)
+        else:
+            # Some characters change length when lowercased; keep match offsets valid.
+            matches = self._matcher_ignorecase.finditer(conversation_text)
+        for m in matches:
+            hits.setdefault(int(m.lastgroup[1:].split("_", 1)[0]), []).append(m)
+        return hits
+
+    def classify(self, conversation_text: str) -> dict[str, Any]:
+        """Return a partial state update with the stages the rules can fill confidently."""
+        hits = self.match(conversation_text)
+        update: dict[str, Any] = {}
+        for stage in RULE_STAGES:
+            stage_hits = {i: ms for i, ms in hits.items() if self.rules[i].stage == stage}
+            labels = {self.rules[i].label for i in stage_hits}
+            if len(labels) != 1:
+                continue
+            matches = [m for ms in stage_hits.values() for m in ms]
+            if len(matches) < self.min_matches:
+                continue
+            if not all(len({m.lastgroup for m in ms}) >= self.rules[i].min_signals for i, ms in stage_hits.items()):
+                continue
+            rule = self.rules[next(iter(stage_hits))]
+            if stage == "purpose":
+                purpose = PurposeResult(
+                    purpose=rule.label,
+                    confidence=rule.fields.get("confidence", "high"),
+                    summary=rule.fields.get("summary", ""),
+                )
+                update.update(
+                    {
+                        "purpose_result": purpose.model_dump(),
+                        "purpose_label": purpose.purpose,
+                        "purpose_summary": purpose.summary,
+                    }
+                )
+            else:
+                failure = FailureReasonResult(
+                    reason_category=rule.label,
+                    explanation=rule.fields.get("explanation", ""),
+                    evidence=_evidence(conversation_text, matches),
+                    recommendation=rule.fields.get("recommendation", ""),
+                )
+                update["failure_reason_result"] = failure.model_dump()
+        return update
+
+
+def _evidence(conversation_text: str, matches: list[re.Match]) -> list[str]:
+    """The transcript lines containing the matches, without the speaker prefix."""
+    evidence: list[str] = []
+    for m in sorted(matches, key=lambda m: m.start()):
+        start = conversation_text.rfind("\n", 0, m.start()) + 1
+        end = conversation_text.find("\n", m.end())
+        line = conversation_text[start : end if end != -1 else len(conversation_text)]
+        line = line.split(": ", 1)[-1].strip()[:_MAX_EVIDENCE_CHARS]
+        if line and line not in evidence:
+            evidence.append(line)
+        if len(evidence) >= _MAX_EVIDENCE:
+            break
+    return evidence
+
+
+@lru_cache
+def get_rule_set() -> RuleSet | None:
+    """Rules from FAST_PATH_RULES (or the bundled defaults), or None when the fast path is off."""
+    settings = get_settings()
+    if not settings.fast_path_enabled:
+        return None
+    return RuleSet.from_file(settings.fast_path_rules or DEFAULT_RULES_PATH)
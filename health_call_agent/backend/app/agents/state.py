@@ -0,0 +1,34 @@
+"""Graph state and pipeline names, importable without loading LangGraph."""
+
+from typing import Any, TypedDict
+
+PIPELINE_GRAPH = "graph"
+PIPELINE_FUSED = "fused"
+PIPELINE_PARALLEL = "parallel"
+PIPELINES = (PIPELINE_GRAPH, PIPELINE_FUSED, PIPELINE_PARALLEL)
+
+# Outcomes of the parallel pipeline's speculative failure analysis.
+SPECULATION_AGREED = "agreed"
+SPECULATION_RERUN = "rerun"
+
+# Pseudo node name under which `astream_analysis` yields the state restored from a checkpoint.
+RESTORED_UPDATE = "checkpoint"
+
+
+class CallAnalysisState(TypedDict, total=False):
+    """State passed between nodes."""
+
+    conversation_text: str
+    call_id: str | None
+    purpose_result: dict[str, Any]
+    purpose_summary: str
+    purpose_label: str
+    model_used: str
+    failure_reason_result: dict[str, Any]
+    action_plan_result: dict[str, Any]
+    skipped_nodes: list[str]
+    # Parallel pipeline only: the speculative failure analysis's own purpose, node timings, outcome.
+    inferred_purpose: str
+    purpose_seconds: float
+    speculation_seconds: float
+    speculation: str
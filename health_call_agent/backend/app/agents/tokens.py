@@ -0,0 +1,37 @@
+"""Cheap token estimates for rate limiting and prompt budgets (no tokenizer round-trip)."""
+
+from typing import Any
+
+# Gemini averages roughly four characters per token on English text.
+CHARS_PER_TOKEN = 4
+# Reserved for the model's JSON answer when budgeting a request.
+DEFAULT_OUTPUT_TOKENS = 512
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def estimate_prompt_tokens(messages: list) -> int:
+    return sum(estimate_tokens(str(getattr(m, "content", m))) for m in messages)
+
+
+def _usage(response: Any) -> dict[str, Any]:
+    usage = getattr(response, "usage_metadata", None) or {}
+    return usage if isinstance(usage, dict) else {}
+
+
+def response_tokens(response: Any) -> int | None:
+    """Total tokens reported by the provider for a response, if any."""
+    total = _usage(response).get("total_tokens")
+    return int(total) if total else None
+
+
+def usage_tokens(response: Any, prompt_estimate: int) -> tuple[int, int]:
+    """(prompt, output) tokens from the provider's usage metadata, estimated where missing."""
+    usage = _usage(response)
+    prompt = usage.get("input_tokens") or prompt_estimate
+    output = usage.get("output_tokens")
+    if output is None:
+        output = estimate_tokens(str(getattr(response, "content", "")))
+    return int(prompt), int(output)
@@ -1,118 +1,323 @@
 """FastAPI routes for call log analysis."""
 
-from fastapi import APIRouter, HTTPException
+import json
+import time
+from datetime import date
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic_core import from_json, to_json
 
 from app.config import get_settings
 from app.schemas import (
     ConversationInput,
     CallLogInput,
     AnalysisResult,
-    PurposeResult,
-    FailureReasonResult,
-    ActionPlanResult,
+    JobCreated,
+    JobStatus,
+    JobResultsPage,
+    StatsResponse,
+)
+from app.agents import (
+    graph_registry_stats,
+    get_client_pool,
+    get_hedge_policy,
+    get_model_router,
+    get_rate_limiter,
+    readiness,
 )
-from app.agents import run_analysis
+from app.services import (
+    analyze_batch,
+    analyze_call,
+    get_analysis_cache,
+    get_job_queue,
+    get_similarity_index,
+    get_single_flight,
+    get_stats_store,
+    short_error_message,
+    stream_call,
+)
+from app.services.ingest import compact_call_logs
+from app.services.stats import DIMENSIONS as STATS_DIMENSIONS
 
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
-
-def _conversation_to_text(messages: list) -> str:
-    """Turn list of {role, content} into readable transcript."""
-    lines = []
-    for m in messages:
-        if isinstance(m, dict):
-            role = m.get("role", "unknown")
-            content = m.get("content", "")
-        else:
-            role = getattr(m, "role", "unknown")
-            content = getattr(m, "content", "")
-        lines.append(f"{role}: {content}")
-    return "\n".join(lines)
-
-
-def _short_error_message(e: Exception) -> str:
-    text = str(e).replace("\n", " ").strip()
-    if "RESOURCE_EXHAUSTED" in text or "429" in text:
-        return "Gemini quota/rate limit exceeded. Retry later or use another API key/project."
-    if len(text) > 320:
-        return text[:320] + "..."
-    return text
+Pipeline = Literal["graph", "fused", "parallel"]
+_PIPELINE_QUERY = Query(
+    None,
+    description="Override ANALYSIS_PIPELINE: graph (3 LLM calls), fused (1 call) or parallel (purpose and failure at once)",
+)
 
 
-@router.post("/analyze", response_model=AnalysisResult)
-def analyze_conversation(body: ConversationInput):
-    """Analyze conversation and return purpose, failure reason, and action plan."""
+def _require_configured():
     settings = get_settings()
     if not settings.is_configured:
         raise HTTPException(
             status_code=503,
             detail="GOOGLE_API_KEY not set. Add it to .env or environment.",
         )
-    conversation_text = _conversation_to_text(body.conversation)
+    return settings
+
+
+async def _analyze_or_502(call: CallLogInput, bypass_cache: bool, pipeline: str | None) -> AnalysisResult:
     try:
-        result = run_analysis(
-            conversation_text=conversation_text,
-            api_key=settings.google_api_key,
-            model_candidates=settings.gemini_models,
-            timeout_seconds=settings.gemini_timeout_seconds,
-            max_retries=settings.gemini_max_retries,
-            call_id=None,
-        )
+        return await analyze_call(call, bypass_cache=bypass_cache, pipeline=pipeline)
     except Exception as e:
         raise HTTPException(
             status_code=502,
-            detail=f"Analysis failed. {_short_error_message(e)}",
+            detail=f"Analysis failed. {short_error_message(e)}",
         ) from e
-    return AnalysisResult(
-        purpose=PurposeResult(**result["purpose"]),
-        failure_reason=FailureReasonResult(**result["failure_reason"]),
-        action_plan=ActionPlanResult(**result["action_plan"]),
-        call_id=result.get("call_id"),
-    )
+
+
+def _parse_batch_body(raw: bytes, content_type: str) -> list:
+    """Batch body is a JSON array of call logs or NDJSON (one call log per line).
+
+    Decoded with pydantic-core's JSON parser, which is faster than `json` and stores repeated
+    short strings (keys, roles) once per body.
+    """
+    text = raw.decode("utf-8-sig").strip()
+    if not text:
+        return []
+    if "ndjson" not in content_type and "jsonl" not in content_type and text.startswith("["):
+        try:
+            items = from_json(text)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}") from e
+        return items
+    items = []
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            items.append(from_json(line))
+        except ValueError as e:
+            # Keep the position so the error is reported inline for this item.
+            items.append(ValueError(f"Line {line_no} is not valid JSON: {e}"))
+    return items
+
+
+def _batch_items(raw: bytes, content_type: str) -> list:
+    items = _parse_batch_body(raw, content_type)
+    if isinstance(items, list) and get_settings().batch_compact_ingest:
+        return compact_call_logs(items)
+    return items
+
+
+@router.post("/analyze", response_model=AnalysisResult)
+async def analyze_conversation(
+    body: ConversationInput,
+    bypass_cache: bool = Query(False, description="Ignore cached results and re-run the analysis"),
+    pipeline: Pipeline | None = _PIPELINE_QUERY,
+):
+    """Analyze conversation and return purpose, failure reason, and action plan."""
+    _require_configured()
+    return await _analyze_or_502(CallLogInput(conversation=body.conversation), bypass_cache, pipeline)
 
 
 @router.post("/analyze-call", response_model=AnalysisResult)
-def analyze_call_log(body: CallLogInput):
+async def analyze_call_log(
+    body: CallLogInput,
+    bypass_cache: bool = Query(False, description="Ignore cached results and re-run the analysis"),
+    pipeline: Pipeline | None = _PIPELINE_QUERY,
+):
     """Analyze full call log and return purpose, failure reason, and action plan."""
-    settings = get_settings()
-    if not settings.is_configured:
-        raise HTTPException(
-            status_code=503,
-            detail="GOOGLE_API_KEY not set. Add it to .env or environment.",
-        )
-    conversation_text = _conversation_to_text(body.conversation)
+    _require_configured()
+    return await _analyze_or_502(body, bypass_cache, pipeline)
+
+
+@router.post("/analyze-batch")
+async def analyze_call_batch(
+    request: Request,
+    concurrency: int | None = Query(None, ge=1, description="Analyses in flight at once"),
+    bypass_cache: bool = Query(False, description="Ignore cached results and re-run the analyses"),
+    pipeline: Pipeline | None = _PIPELINE_QUERY,
+):
+    """Analyze a JSON array or NDJSON body of call logs.
+
+    Streams one NDJSON line per call (`BatchItemResult`) as soon as it finishes;
+    per-call failures are reported inline and do not abort the batch.
+    """
+    settings = _require_configured()
+    items = _batch_items(await request.body(), request.headers.get("content-type", ""))
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON of call logs.")
+    limit = min(concurrency or settings.batch_concurrency, settings.batch_max_concurrency)
+
+    async def lines():
+        async for item in analyze_batch(items, limit, bypass_cache=bypass_cache, pipeline=pipeline):
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/analyze-stream")
+async def analyze_call_log_stream(
+    body: CallLogInput,
+    bypass_cache: bool = Query(False, description="Ignore cached results and re-run the analysis"),
+):
+    """Analyze a call log and push each stage as a Server-Sent Event as soon as its node finishes.
+
+    Events: `purpose`, `failure_reason`, `action_plan` (`{call_id, result, elapsed_ms, stage_ms}`),
+    then `done` (`{call_id, meta, elapsed_ms, stage_ms}`) or `error` (`{call_id, detail, ...}`).
+    """
+    _require_configured()
+
+    async def events():
+        async for event, data in stream_call(body, bypass_cache=bypass_cache):
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _require_job_queue():
+    queue = get_job_queue()
+    if queue is None:
+        raise HTTPException(status_code=404, detail="Background jobs are disabled (JOBS_ENABLED=false).")
+    return queue
+
+
+@router.post("/jobs", response_model=JobCreated, status_code=202)
+async def create_job(
+    request: Request,
+    bypass_cache: bool = Query(False, description="Ignore cached results and re-run the analyses"),
+    pipeline: Pipeline | None = _PIPELINE_QUERY,
+):
+    """Queue a JSON array or NDJSON body of call logs for background analysis.
+
+    Returns a job id right away; poll `GET /api/jobs/{job_id}` for progress and page
+    through `GET /api/jobs/{job_id}/results`. Jobs are stored in SQLite and resume after
+    a restart without re-running calls that already finished.
+    """
+    _require_configured()
+    queue = _require_job_queue()
+    items = _batch_items(await request.body(), request.headers.get("content-type", ""))
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="Expected a non-empty JSON array or NDJSON of call logs.")
+    job_id, total = await queue.submit(items, bypass_cache=bypass_cache, pipeline=pipeline)
+    return JobCreated(job_id=job_id, status=queue.store.job_status(job_id)["status"], total=total)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    """Progress of a background job."""
+    status = _require_job_queue().store.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return status
+
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsPage)
+def get_job_results(
+    job_id: str,
+    cursor: int = Query(0, ge=0, description="`next_cursor` of the previous page (0 for the first page)"),
+    limit: int | None = Query(None, ge=1, le=1000, description="Items per page"),
+):
+    """Finished items of a job in completion order (`BatchItemResult`s), one page at a time."""
+    store = _require_job_queue().store
+    status = store.job_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    limit = limit or get_settings().jobs_results_page_size
+    rows = store.results(job_id, cursor, limit)
+    next_cursor = rows[-1][0] if rows else cursor
+    done = status["finished_at"] is not None and len(rows) < limit
+    # Results are stored as AnalysisResult JSON; splice them in instead of parsing and re-serializing
+    # each one through the response model.
+    items = b",".join(_job_item_json(*row[1:]) for row in rows)
+    head = to_json({"job_id": job_id})[:-1]
+    return Response(
+        head + b',"items":[' + items + b'],"next_cursor":' + to_json(next_cursor) + b',"done":' + to_json(done) + b"}",
+        media_type="application/json",
+    )
+
+
+def _job_item_json(idx: int, call_id: str, status: str, result: str | None, error: str | None) -> bytes:
+    """A stored job item as `BatchItemResult` JSON."""
+    head = to_json({"index": idx, "call_id": call_id, "status": status})[:-1]
+    return head + b',"result":' + (result.encode() if result else b"null") + b',"error":' + to_json(error) + b"}"
+
+
+@router.get("/stats", response_model=StatsResponse)
+def get_stats(
+    group_by: str = Query("", description="Comma-separated dimensions: purpose, confidence, reason_category, owner"),
+    period: Literal["day", "week", "month", "all"] = Query("all", description="Bucket calls by call date"),
+    start: date | None = Query(None, description="First call date (inclusive)"),
+    end: date | None = Query(None, description="Last call date (inclusive)"),
+    purpose: str | None = Query(None),
+    confidence: str | None = Query(None),
+    reason_category: str | None = Query(None),
+    owner: str | None = Query(None),
+    percentiles: str = Query("50,90", description="Comma-separated duration percentiles to estimate"),
+    limit: int = Query(1000, ge=1, le=100000, description="Maximum number of groups"),
+):
+    """Call counts and duration statistics of analyzed calls, grouped by period and dimensions.
+
+    Example: `?group_by=purpose,reason_category&period=week` for failure categories by purpose by week.
+    """
+    store = get_stats_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Analytics are disabled (STATS_ENABLED=false).")
+    dims = [d.strip() for d in group_by.split(",") if d.strip()]
+    unknown = sorted(set(dims) - set(STATS_DIMENSIONS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown group_by dimension(s): {', '.join(unknown)}")
     try:
-        result = run_analysis(
-            conversation_text=conversation_text,
-            api_key=settings.google_api_key,
-            model_candidates=settings.gemini_models,
-            timeout_seconds=settings.gemini_timeout_seconds,
-            max_retries=settings.gemini_max_retries,
-            call_id=body.call_id,
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=502,
-            detail=f"Analysis failed. {_short_error_message(e)}",
-        ) from e
-    return AnalysisResult(
-        purpose=PurposeResult(**result["purpose"]),
-        failure_reason=FailureReasonResult(**result["failure_reason"]),
-        action_plan=ActionPlanResult(**result["action_plan"]),
-        call_id=result.get("call_id") or body.call_id,
+        quantiles = [float(q) for q in percentiles.split(",") if q.strip()]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid percentiles: {percentiles}") from e
+    started = time.perf_counter()
+    result = store.query(
+        group_by=dims,
+        period=period,
+        start=start.isoformat() if start else None,
+        end=end.isoformat() if end else None,
+        filters={"purpose": purpose, "confidence": confidence, "reason_category": reason_category, "owner": owner},
+        percentiles=quantiles,
+        limit=limit,
     )
+    return StatsResponse(**result, elapsed_ms=round((time.perf_counter() - started) * 1000, 2))
+
+
+@router.get("/ready")
+def ready():
+    """Readiness probe: 503 until the graph is compiled and the Gemini clients are created."""
+    state = readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
 
 
 @router.get("/health")
 def health():
-    """Health check."""
+    """Health check (answers during startup warmup too; see `ready`)."""
     settings = get_settings()
+    cache = get_analysis_cache()
+    jobs = get_job_queue()
+    stats = get_stats_store()
+    single_flight = get_single_flight()
+    hedging = get_hedge_policy()
+    similar = get_similarity_index()
     return {
         "status": "ok",
+        **readiness(),
         "gemini_configured": settings.is_configured,
         "gemini_model": settings.gemini_model,
         "gemini_models": settings.gemini_models,
         "gemini_timeout_seconds": settings.gemini_timeout_seconds,
         "gemini_max_retries": settings.gemini_max_retries,
+        "analysis_pipeline": settings.analysis_pipeline,
+        "graph": graph_registry_stats(),
+        "client_pool": get_client_pool().stats(),
+        "router": get_model_router().snapshot(),
+        "rate_limiter": get_rate_limiter().stats(),
+        "hedging": hedging.stats() if hedging else None,
+        "cache": cache.stats() if cache else None,
+        "coalescing": single_flight.stats() if single_flight else None,
+        "similar_cache": similar.stats() if similar else None,
+        "jobs": jobs.stats() if jobs else None,
+        "stats": stats.stats() if stats else None,
     }
@@ -0,0 +1,302 @@
+"""Command-line entry point for offline analysis of large call log archives.
+
+    python -m app.cli analyze calls.jsonl -o results.jsonl --workers 16
+    python -m app.cli analyze calls.json -o results_parquet/ --format parquet
+
+The input (JSON array, JSONL, or `-` for stdin) is read incrementally. Finished call_ids
+are appended to a checkpoint file once their results are written, so re-running the same
+command after an interruption skips them. Failed calls go to a separate errors file and
+are retried on the next run.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+
+from app.agents import close_graph_registry, get_client_pool
+from app.config import get_settings
+from app.schemas import AnalysisResult
+from app.services import analyze_batch, get_analysis_cache, get_stats_store
+from app.services.ingest import iter_call_logs
+
+logger = logging.getLogger("app.cli")
+
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+
+
+class Checkpoint:
+    """Append-only file of completed call_ids, one per line."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: set[str] = set()
+        if path.exists():
+            with open(path, encoding="utf-8") as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self._file = open(path, "a", encoding="utf-8")
+
+    def add(self, call_ids: Iterable[str]) -> None:
+        call_ids = list(call_ids)
+        if not call_ids:
+            return
+        self._file.write("".join(f"{call_id}\n" for call_id in call_ids))
+        self._file.flush()
+        self.done.update(call_ids)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JsonlSink:
+    """Appends one AnalysisResult per line; every line is durable as soon as it is written."""
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, result: AnalysisResult) -> list[str]:
+        self._file.write(result.model_dump_json() + "\n")
+        self._file.flush()
+        return [result.call_id]
+
+    def close(self) -> list[str]:
+        self._file.close()
+        return []
+
+
+_STRING_COLUMNS = (
+    "call_id",
+    "purpose",
+    "purpose_confidence",
+    "purpose_summary",
+    "reason_category",
+    "failure_explanation",
+    "failure_recommendation",
+    "action_goal",
+    "action_owner",
+    "action_success_criteria",
+    "meta",
+)
+_LIST_COLUMNS = ("failure_evidence", "action_steps")
+
+
+def _flat_row(result: AnalysisResult) -> dict[str, Any]:
+    return {
+        "call_id": result.call_id,
+        "purpose": result.purpose.purpose,
+        "purpose_confidence": result.purpose.confidence,
+        "purpose_summary": result.purpose.summary,
+        "reason_category": result.failure_reason.reason_category,
+        "failure_explanation": result.failure_reason.explanation,
+        "failure_evidence": result.failure_reason.evidence,
+        "failure_recommendation": result.failure_reason.recommendation,
+        "action_goal": result.action_plan.goal,
+        "action_steps": result.action_plan.steps,
+        "action_owner": result.action_plan.owner,
+        "action_success_criteria": result.action_plan.success_criteria,
+        "meta": result.meta.model_dump_json() if result.meta else None,
+    }
+
+
+class ParquetSink:
+    """Writes `part-NNNNN.parquet` files into a directory (a resumed run starts a new part).
+
+    Rows are buffered and written as one row group every `flush_rows`. A part is written as
+    `part-NNNNN.parquet.tmp` and renamed once closed, since a Parquet file is unreadable until
+    its footer is written; call_ids are only reported as done when their part is renamed. A
+    `.tmp` part left by a killed run holds no checkpointed calls and is removed on start.
+    """
+
+    def __init__(self, directory: Path, flush_rows: int, rows_per_file: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise SystemExit("Parquet output needs pyarrow: pip install pyarrow") from e
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema(
+            [(name, pa.string()) for name in _STRING_COLUMNS] + [(name, pa.list_(pa.string())) for name in _LIST_COLUMNS]
+        )
+        self._directory = directory
+        directory.mkdir(parents=True, exist_ok=True)
+        self._flush_rows = max(1, flush_rows)
+        self._rows_per_file = max(self._flush_rows, rows_per_file)
+        self._rows: list[dict[str, Any]] = []
+        self._writer = None
+        self._path: Path | None = None
+        self._written_ids: list[str] = []
+        for stale in directory.glob("part-*.parquet.tmp"):
+            stale.unlink()
+        self._part = max((int(p.stem.split("-")[1]) + 1 for p in directory.glob("part-*.parquet")), default=0)
+
+    def write(self, result: AnalysisResult) -> list[str]:
+        self._rows.append(_flat_row(result))
+        if len(self._rows) >= self._flush_rows:
+            return self._flush()
+        return []
+
+    def _flush(self) -> list[str]:
+        if not self._rows:
+            return []
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+        if self._writer is None:
+            self._path = self._directory / f"part-{self._part:05d}.parquet"
+            self._writer = self._pq.ParquetWriter(self._path.with_suffix(".parquet.tmp"), self._schema)
+            self._part += 1
+        self._writer.write_table(table)
+        self._written_ids.extend(row["call_id"] for row in self._rows)
+        self._rows = []
+        if len(self._written_ids) >= self._rows_per_file:
+            return self._close_part()
+        return []
+
+    def _close_part(self) -> list[str]:
+        if self._writer is None:
+            return []
+        self._writer.close()
+        self._writer = None
+        self._path.with_suffix(".parquet.tmp").rename(self._path)
+        call_ids, self._written_ids = self._written_ids, []
+        return call_ids
+
+    def close(self) -> list[str]:
+        self._flush()
+        return self._close_part()
+
+
+def _open_input(path: str) -> IO[str]:
+    if path == "-":
+        return sys.stdin
+    return open(path, encoding="utf-8-sig")
+
+
+def _pending(records: Iterator[Any], done: set[str], counts: dict[str, int]) -> Iterator[Any]:
+    """Assign positional call_ids where missing (stable across runs) and skip checkpointed calls.
+
+    The positions count skipped calls too, so a resumed run reports an undecodable or invalid
+    record under the same call_id as the first run did.
+    """
+    for index, record in enumerate(records):
+        call_id = f"call_{index + 1}"
+        if isinstance(record, dict):
+            if not record.get("call_id"):
+                record["call_id"] = call_id
+            if str(record["call_id"]) in done:
+                counts["skipped"] += 1
+                continue
+        elif isinstance(record, Exception):
+            record.call_id = call_id
+        else:
+            record = ValueError(f"Invalid call log: expected a JSON object, got {type(record).__name__}")
+            record.call_id = call_id
+        yield record
+
+
+async def analyze_archive(args: argparse.Namespace) -> dict[str, int]:
+    output = Path(args.output)
+    fmt = args.format or (FORMAT_PARQUET if output.suffix in ("", ".parquet") else FORMAT_JSONL)
+    checkpoint = Checkpoint(Path(args.checkpoint or f"{output}.checkpoint"))
+    errors_path = Path(args.errors or f"{output}.errors.jsonl")
+    if fmt == FORMAT_PARQUET:
+        sink = ParquetSink(output, args.flush_rows, args.rows_per_file)
+    else:
+        sink = JsonlSink(output)
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    started = time.perf_counter()
+    stream = _open_input(args.input)
+    try:
+        with open(errors_path, "a", encoding="utf-8") as errors:
+            records = _pending(iter_call_logs(stream, jsonl=args.jsonl), checkpoint.done, counts)
+            async for item in analyze_batch(
+                records,
+                args.workers,
+                bypass_cache=args.bypass_cache,
+                pipeline=args.pipeline,
+            ):
+                if item.status == "ok":
+                    counts["ok"] += 1
+                    checkpoint.add(sink.write(item.result))
+                else:
+                    counts["error"] += 1
+                    errors.write(item.model_dump_json(exclude={"result"}) + "\n")
+                    errors.flush()
+                finished = counts["ok"] + counts["error"]
+                if args.progress_every and finished % args.progress_every == 0:
+                    rate = finished / (time.perf_counter() - started)
+                    logger.info(
+                        "%d analyzed (%d errors, %d skipped), %.1f calls/s",
+                        finished,
+                        counts["error"],
+                        counts["skipped"],
+                        rate,
+                    )
+    finally:
+        checkpoint.add(sink.close())
+        checkpoint.close()
+        if stream is not sys.stdin:
+            stream.close()
+        # Same shutdown as the API lifespan: buffered stats facts are only written on close.
+        await get_client_pool().aclose()
+        close_graph_registry()
+        cache = get_analysis_cache()
+        if cache:
+            cache.close()
+        stats = get_stats_store()
+        if stats:
+            stats.close()
+    return counts
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Health Call Agent command-line tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    analyze = commands.add_parser("analyze", help="Analyze a JSON/JSONL archive of call logs")
+    analyze.add_argument("input", help="JSON array or JSONL file of call logs, or - for stdin")
+    analyze.add_argument("-o", "--output", required=True, help="Results file (.jsonl) or directory (parquet)")
+    analyze.add_argument("--format", choices=(FORMAT_JSONL, FORMAT_PARQUET), help="Default: from the output name")
+    analyze.add_argument("--workers", type=int, default=get_settings().batch_concurrency, help="Analyses in flight")
+    analyze.add_argument("--checkpoint", help="Completed call_ids file (default: <output>.checkpoint)")
+    analyze.add_argument("--errors", help="Failed calls file (default: <output>.errors.jsonl)")
+    analyze.add_argument("--pipeline", choices=("graph", "fused", "parallel"), help="Override ANALYSIS_PIPELINE")
+    analyze.add_argument("--bypass-cache", action="store_true", help="Ignore cached results")
+    analyze.add_argument(
+        "--jsonl",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Force JSONL (--jsonl) or concatenated JSON (--no-jsonl); default: detect",
+    )
+    analyze.add_argument("--flush-rows", type=int, default=1000, help="Parquet rows per row group")
+    analyze.add_argument(
+        "--rows-per-file",
+        type=int,
+        default=10_000,
+        help="Parquet rows per part file; a part's calls are checkpointed when it is closed",
+    )
+    analyze.add_argument("--progress-every", type=int, default=100, help="Log progress every N calls (0 = off)")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s", stream=sys.stderr)
+    if not get_settings().is_configured:
+        print("GOOGLE_API_KEY not set. Add it to .env or environment.", file=sys.stderr)
+        return 2
+    try:
+        counts = asyncio.run(analyze_archive(args))
+    except KeyboardInterrupt:
+        print("Interrupted; re-run the same command to resume.", file=sys.stderr)
+        return 130
+    print(json.dumps(counts), file=sys.stderr)
+    return 1 if counts["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
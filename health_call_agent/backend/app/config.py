@@ -24,6 +24,18 @@ def _strip_key(value: str) -> str:
     return value.strip()
 
 
+def _parse_model_limits(value: str) -> dict[str, tuple[int, int]]:
+    """Parse "model=rpm/tpm,..." into {model: (rpm, tpm)}; a missing tpm means unlimited."""
+    limits = {}
+    for entry in value.split(","):
+        if not entry.strip():
+            continue
+        model, _, spec = entry.partition("=")
+        rpm, _, tpm = spec.partition("/")
+        limits[model.strip()] = (int(rpm or 0), int(tpm or 0))
+    return limits
+
+
 @lru_cache
 def get_settings():
     return Settings()
@@ -44,6 +56,84 @@ class Settings:
         self.gemini_model = self.gemini_models[0] if self.gemini_models else "gemini-2.0-flash-lite"
         self.gemini_timeout_seconds = int(os.getenv("GEMINI_TIMEOUT_SECONDS", "25"))
         self.gemini_max_retries = int(os.getenv("GEMINI_MAX_RETRIES", "1"))
+        # After warmup, open each model's connection (a models.get lookup) so the first analysis skips TLS setup
+        self.gemini_warm_connections = (
+            os.getenv("GEMINI_WARM_CONNECTIONS", "true").strip().lower() in ("1", "true", "yes")
+        )
+        # Directory for the SQLite files (checkpoints, jobs, stats) unless a *_DB path is set
+        self.data_dir = Path(_strip_key(os.getenv("DATA_DIR", "")) or Path(__file__).resolve().parent.parent / "data")
+        # Graph checkpointing: "none" (disabled), "memory" (bounded, oldest threads evicted) or "sqlite"
+        # (survives restarts, but writes to disk after every node). Threads are keyed by call_id, so a failed
+        # call resumes from its last node.
+        self.graph_checkpointer = _strip_key(os.getenv("GRAPH_CHECKPOINTER", "memory")).lower() or "memory"
+        self.graph_checkpoint_max_threads = int(os.getenv("GRAPH_CHECKPOINT_MAX_THREADS", "256"))
+        self.graph_checkpoint_db = _strip_key(os.getenv("GRAPH_CHECKPOINT_DB", "")) or str(self.data_dir / "checkpoints.sqlite3")
+        self.graph_checkpoint_ttl_seconds = float(os.getenv("GRAPH_CHECKPOINT_TTL_SECONDS", "86400"))
+        # Model router: circuit breaker per model and latency-aware fallback ordering
+        self.router_adaptive = os.getenv("ROUTER_ADAPTIVE", "true").strip().lower() in ("1", "true", "yes")
+        self.router_failure_threshold = int(os.getenv("ROUTER_FAILURE_THRESHOLD", "3"))
+        self.router_cooldown_seconds = float(os.getenv("ROUTER_COOLDOWN_SECONDS", "30"))
+        self.router_ewma_alpha = float(os.getenv("ROUTER_EWMA_ALPHA", "0.3"))
+        # Client-side rate limit per model (0 = unlimited). RATE_LIMIT_MODELS overrides it per model:
+        # "gemini-2.0-flash=15/1000000,gemini-2.5-flash=10/250000" (requests/tokens per minute)
+        self.rate_limit_rpm = int(os.getenv("RATE_LIMIT_RPM", "0"))
+        self.rate_limit_tpm = int(os.getenv("RATE_LIMIT_TPM", "0"))
+        self.rate_limit_models = _parse_model_limits(_strip_key(os.getenv("RATE_LIMIT_MODELS", "")))
+        self.rate_limit_max_wait_seconds = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+        # Corrective re-prompts of a node whose response stays unusable after local JSON repair
+        self.node_reprompt_retries = int(os.getenv("NODE_REPROMPT_RETRIES", "1"))
+        # Hedged model calls (async paths): duplicate a call that outlasts the node's latency percentile
+        self.hedge_enabled = os.getenv("HEDGE_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+        self.hedge_percentile = float(os.getenv("HEDGE_PERCENTILE", "95"))
+        self.hedge_window = int(os.getenv("HEDGE_WINDOW", "200"))
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+        self.hedge_min_delay_seconds = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "0.5"))
+        self.hedge_max_rate = float(os.getenv("HEDGE_MAX_RATE", "0.05"))
+        self.hedge_target = _strip_key(os.getenv("HEDGE_TARGET", "next")).lower() or "next"
+        # Analysis pipeline: "graph" (three LLM calls), "fused" (one combined call, graph as fallback) or
+        # "parallel" (graph with purpose and a speculative failure analysis running at once)
+        self.analysis_pipeline = _strip_key(os.getenv("ANALYSIS_PIPELINE", "graph")).lower() or "graph"
+        # Rule-based fast path: fill obvious purpose / failure reason without calling Gemini
+        self.fast_path_enabled = os.getenv("FAST_PATH_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+        self.fast_path_rules = _strip_key(os.getenv("FAST_PATH_RULES", ""))
+        # Transcript compaction before prompting: drop boilerplate turns, merge same-speaker turns and
+        # trim to a token budget, keeping the turns most likely to hold evidence
+        self.compaction_enabled = os.getenv("COMPACTION_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+        self.compaction_token_budget = int(os.getenv("COMPACTION_TOKEN_BUDGET", "4000"))
+        self.compaction_strip_boilerplate = (
+            os.getenv("COMPACTION_STRIP_BOILERPLATE", "true").strip().lower() in ("1", "true", "yes")
+        )
+        # Batch endpoint: default and maximum number of analyses in flight per batch
+        self.batch_concurrency = int(os.getenv("BATCH_CONCURRENCY", "8"))
+        self.batch_max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", "64"))
+        # Batch and job bodies: validate in bulk into compact call logs instead of a pydantic model per message
+        self.batch_compact_ingest = os.getenv("BATCH_COMPACT_INGEST", "true").strip().lower() in ("1", "true", "yes")
+        # Analysis result cache: in-memory LRU with TTL, plus optional SQLite file that survives restarts
+        self.analysis_cache_enabled = os.getenv("ANALYSIS_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+        self.analysis_cache_max_entries = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "1024"))
+        self.analysis_cache_ttl_seconds = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+        self.analysis_cache_db = _strip_key(os.getenv("ANALYSIS_CACHE_DB", ""))
+        # Single-flight: concurrent requests for the same transcript and models share one pipeline run
+        self.coalesce_enabled = os.getenv("COALESCE_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+        # Near-duplicate cache: reuse the cached analysis of a transcript whose MinHash similarity reaches the threshold
+        self.similar_cache_enabled = os.getenv("SIMILAR_CACHE_ENABLED", "false").strip().lower() in ("1", "true", "yes")
+        self.similar_cache_threshold = float(os.getenv("SIMILAR_CACHE_THRESHOLD", "0.9"))
+        self.similar_cache_max_entries = int(os.getenv("SIMILAR_CACHE_MAX_ENTRIES", "10000"))
+        self.similar_cache_num_perm = int(os.getenv("SIMILAR_CACHE_NUM_PERM", "128"))
+        self.similar_cache_bands = int(os.getenv("SIMILAR_CACHE_BANDS", "16"))
+        # Background jobs: batches queued in SQLite (survive restarts) and drained by in-process workers
+        self.jobs_enabled = os.getenv("JOBS_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+        self.jobs_db = _strip_key(os.getenv("JOBS_DB", "")) or str(self.data_dir / "jobs.sqlite3")
+        self.jobs_workers = int(os.getenv("JOBS_WORKERS", "4"))
+        self.jobs_max_attempts = int(os.getenv("JOBS_MAX_ATTEMPTS", "3"))
+        # A failed item is retried after JOBS_RETRY_BASE_SECONDS, doubling per attempt up to the max (with jitter)
+        self.jobs_retry_base_seconds = float(os.getenv("JOBS_RETRY_BASE_SECONDS", "2"))
+        self.jobs_retry_max_seconds = float(os.getenv("JOBS_RETRY_MAX_SECONDS", "60"))
+        self.jobs_results_page_size = int(os.getenv("JOBS_RESULTS_PAGE_SIZE", "100"))
+        # Analytics: per-call facts and daily rollups for GET /api/stats
+        self.stats_enabled = os.getenv("STATS_ENABLED", "true").strip().lower() in ("1", "true", "yes")
+        self.stats_db = _strip_key(os.getenv("STATS_DB", "")) or str(self.data_dir / "stats.sqlite3")
+        self.stats_flush_rows = int(os.getenv("STATS_FLUSH_ROWS", "256"))
         # Bind host: 127.0.0.1 for local-only, 0.0.0.0 for all interfaces
         self.host = os.getenv("HOST", "127.0.0.1")
         self.port = int(os.getenv("PORT", "8000"))
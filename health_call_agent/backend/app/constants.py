@@ -2,5 +2,11 @@
 
 API_PREFIX = "/api"
 PATH_HEALTH = f"{API_PREFIX}/health"
+PATH_READY = f"{API_PREFIX}/ready"
 PATH_ANALYZE = f"{API_PREFIX}/analyze"
 PATH_ANALYZE_CALL = f"{API_PREFIX}/analyze-call"
+PATH_ANALYZE_BATCH = f"{API_PREFIX}/analyze-batch"
+PATH_ANALYZE_STREAM = f"{API_PREFIX}/analyze-stream"
+PATH_JOBS = f"{API_PREFIX}/jobs"
+PATH_STATS = f"{API_PREFIX}/stats"
+PATH_METRICS = "/metrics"
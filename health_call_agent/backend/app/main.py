@@ -8,20 +8,68 @@ if _env.exists():
     from dotenv import load_dotenv
     load_dotenv(_env)
 
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import get_settings
-from app.constants import PATH_ANALYZE, PATH_ANALYZE_CALL, PATH_HEALTH
+from app.constants import (
+    PATH_ANALYZE,
+    PATH_ANALYZE_BATCH,
+    PATH_ANALYZE_CALL,
+    PATH_ANALYZE_STREAM,
+    PATH_HEALTH,
+    PATH_JOBS,
+    PATH_METRICS,
+    PATH_READY,
+    PATH_STATS,
+)
 from app.api.routes import router
+from app.agents import close_graph_registry, get_client_pool, warm_up
+from app.metrics import MetricsMiddleware, render_metrics
+from app.services import get_analysis_cache, get_job_queue, get_stats_store
+
+
+async def _warm_connections(warmup: asyncio.Task, settings) -> None:
+    """Once the clients exist, open their connections on this (the serving) event loop."""
+    await warmup
+    if settings.is_configured and settings.gemini_warm_connections:
+        await get_client_pool().awarm_connections(
+            settings.google_api_key,
+            settings.gemini_models,
+            settings.gemini_timeout_seconds,
+            settings.gemini_max_retries,
+        )
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    settings = get_settings()
+    # Load LangGraph / Gemini, compile the graph and create the clients in the background so the
+    # server answers /api/health right away; /api/ready turns 200 once this is done.
+    warmup = asyncio.create_task(asyncio.to_thread(warm_up, settings))
+    connections = asyncio.create_task(_warm_connections(warmup, settings))
+    # Resume background jobs left unfinished by the previous run.
+    jobs = get_job_queue() if settings.is_configured else None
+    if jobs:
+        await jobs.start()
     yield
-    # cleanup if any
+    await warmup
+    connections.cancel()
+    await asyncio.gather(connections, return_exceptions=True)
+    if jobs:
+        await jobs.stop()
+        jobs.store.close()
+    await get_client_pool().aclose()
+    close_graph_registry()
+    cache = get_analysis_cache()
+    if cache:
+        cache.close()
+    stats = get_stats_store()
+    if stats:
+        stats.close()
 
 
 app = FastAPI(
@@ -39,9 +87,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
 
 
+@app.get(PATH_METRICS, include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/")
 def root():
     settings = get_settings()
@@ -50,5 +107,11 @@ def root():
         "service": "Health Call Agent API",
         "docs": f"{base}/docs",
         "health": f"{base}{PATH_HEALTH}",
+        "ready": f"{base}{PATH_READY}",
+        "metrics": f"{base}{PATH_METRICS}",
         "analyze": f"POST {PATH_ANALYZE} or POST {PATH_ANALYZE_CALL}",
+        "analyze_stream": f"POST {PATH_ANALYZE_STREAM} (Server-Sent Events per stage)",
+        "analyze_batch": f"POST {PATH_ANALYZE_BATCH} (JSON array or NDJSON, streams NDJSON)",
+        "stats": f"GET {PATH_STATS}?group_by=purpose,reason_category&period=week",
+        "jobs": f"POST {PATH_JOBS}, GET {PATH_JOBS}/{{job_id}}, GET {PATH_JOBS}/{{job_id}}/results?cursor=",
     }
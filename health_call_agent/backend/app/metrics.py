@@ -0,0 +1,177 @@
+"""Prometheus metrics for the API, graph nodes and model calls (served on /metrics).
+
+Metrics live in the default process registry. With several uvicorn workers each worker
+reports its own values; run one worker per scrape target or use the multiprocess mode
+of prometheus_client.
+"""
+
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# LLM calls take ~0.3-30 s; CPU-only nodes (pre_classify) land in the lowest buckets.
+_LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+
+HTTP_REQUESTS = Counter(
+    "call_analyzer_http_requests_total",
+    "HTTP requests by route template, method and status code.",
+    ["route", "method", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "call_analyzer_http_request_duration_seconds",
+    "Time until the response starts, by route template (streamed bodies continue after this).",
+    ["route", "method"],
+    buckets=_LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "call_analyzer_http_requests_in_flight",
+    "HTTP requests currently being handled, by route template.",
+    ["route"],
+)
+NODE_LATENCY = Histogram(
+    "call_analyzer_node_duration_seconds",
+    "Graph node latency, including model fallback attempts and rate-limit waits.",
+    ["node"],
+    buckets=_LATENCY_BUCKETS,
+)
+MODEL_ATTEMPTS = Counter(
+    "call_analyzer_model_attempts_total",
+    "Model calls attempted.",
+    ["model"],
+)
+MODEL_ERRORS = Counter(
+    "call_analyzer_model_errors_total",
+    "Failed model calls by kind (quota, not_found, invalid_argument, rate_limited, other).",
+    ["model", "kind"],
+)
+MODEL_FALLBACKS = Counter(
+    "call_analyzer_model_fallbacks_total",
+    "Times the fallback moved on from this model to the next candidate.",
+    ["model"],
+)
+MODEL_IN_FLIGHT = Gauge(
+    "call_analyzer_model_calls_in_flight",
+    "Model calls currently waiting for a response.",
+    ["model"],
+)
+MODEL_TOKENS = Counter(
+    "call_analyzer_model_tokens_total",
+    "Prompt and response tokens (provider usage when reported, otherwise estimated).",
+    ["model", "kind"],
+)
+PARSE_FAILURES = Counter(
+    "call_analyzer_json_parse_failures_total",
+    "Model responses that were not valid JSON as returned, by node.",
+    ["node"],
+)
+JSON_REPAIRS = Counter(
+    "call_analyzer_json_repairs_total",
+    "Unusable model responses by outcome: repaired locally, fixed by a corrective re-prompt, or failed.",
+    ["node", "outcome"],
+)
+HEDGES = Counter(
+    "call_analyzer_hedges_total",
+    "Hedged model calls by node and outcome: fired, skipped (hedge rate cap or no rate-limit budget), "
+    "hedge_won or primary_won.",
+    ["node", "outcome"],
+)
+SPECULATIONS = Counter(
+    "call_analyzer_speculations_total",
+    "Parallel pipeline: speculative failure analyses kept (agreed) or re-run because the purpose disagreed.",
+    ["outcome"],
+)
+SPECULATION_SECONDS = Counter(
+    "call_analyzer_speculation_seconds_total",
+    "Parallel pipeline: wall-clock seconds saved against the serial graph (saved), or added by a re-run (lost).",
+    ["kind"],
+)
+COALESCED_REQUESTS = Counter(
+    "call_analyzer_coalesced_requests_total",
+    "Analyze requests that joined an identical in-flight analysis instead of running their own.",
+)
+SIMILAR_CACHE_LOOKUPS = Counter(
+    "call_analyzer_similar_cache_lookups_total",
+    "Near-duplicate transcript lookups after an exact cache miss, by outcome (hit reuses a prior analysis).",
+    ["outcome"],
+)
+
+
+def error_kind(error: Exception) -> str:
+    text = str(error)
+    if "client-side rate limit" in text:
+        return "rate_limited"
+    if "429" in text or "RESOURCE_EXHAUSTED" in text:
+        return "quota"
+    if "404" in text or "NOT_FOUND" in text:
+        return "not_found"
+    if "400" in text or "INVALID_ARGUMENT" in text:
+        return "invalid_argument"
+    return "other"
+
+
+def record_model_error(model_name: str, error: Exception, fallback: bool) -> None:
+    MODEL_ERRORS.labels(model_name, error_kind(error)).inc()
+    if fallback:
+        MODEL_FALLBACKS.labels(model_name).inc()
+
+
+def record_model_tokens(model_name: str, prompt_tokens: int, response_tokens: int) -> None:
+    MODEL_TOKENS.labels(model_name, "prompt").inc(prompt_tokens)
+    MODEL_TOKENS.labels(model_name, "response").inc(response_tokens)
+
+
+def _route_template(scope: Scope) -> str:
+    """Path template of the matched route (e.g. /api/analyze-call), so labels stay bounded."""
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """Per-route request count, latency and in-flight gauge.
+
+    Plain ASGI middleware rather than BaseHTTPMiddleware, so streamed responses
+    (NDJSON batches, SSE) pass through untouched. The route is only known once the
+    router has matched it, so a request counts as in flight from the first body read
+    or response start, whichever comes first, until the last body chunk is sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        in_flight = None
+
+        def track() -> None:
+            nonlocal in_flight
+            if in_flight is None and "route" in scope:
+                in_flight = HTTP_IN_FLIGHT.labels(_route_template(scope))
+                in_flight.inc()
+
+        async def receive_wrapper() -> Message:
+            track()
+            return await receive()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                track()
+                status = message["status"]
+                HTTP_LATENCY.labels(_route_template(scope), scope["method"]).observe(time.perf_counter() - started)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            if in_flight is not None:
+                in_flight.dec()
+            HTTP_REQUESTS.labels(_route_template(scope), scope["method"], str(status)).inc()
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Exposition body and content type for the /metrics endpoint."""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -5,7 +5,14 @@ from .models import (
     PurposeResult,
     FailureReasonResult,
     ActionPlanResult,
+    AnalysisMeta,
     AnalysisResult,
+    BatchItemResult,
+    JobCreated,
+    JobStatus,
+    JobResultsPage,
+    StatsGroup,
+    StatsResponse,
 )
 
 __all__ = [
@@ -15,5 +22,12 @@ __all__ = [
     "PurposeResult",
     "FailureReasonResult",
     "ActionPlanResult",
+    "AnalysisMeta",
     "AnalysisResult",
+    "BatchItemResult",
+    "JobCreated",
+    "JobStatus",
+    "JobResultsPage",
+    "StatsGroup",
+    "StatsResponse",
 ]
@@ -1,6 +1,6 @@
 """Pydantic models for request/response and agent state."""
 
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 
@@ -74,6 +74,33 @@ class ActionPlanResult(BaseModel):
     )
 
 
+class AnalysisMeta(BaseModel):
+    """How an analysis result was produced."""
+
+    pipeline: str = Field(
+        "graph",
+        description="graph (three LLM calls), fused (one LLM call) or parallel (purpose and failure reason at once)",
+    )
+    fused_fallback: bool = Field(False, description="Fused output failed validation and the graph ran instead")
+    cached: bool = Field(False, description="Served from the analysis cache")
+    coalesced: bool = Field(False, description="Shared the result of an identical request that was already running")
+    similarity: float | None = Field(
+        None, description="Served from the cached analysis of a near-duplicate transcript with this estimated similarity"
+    )
+    skipped_nodes: list[str] = Field(
+        default_factory=list,
+        description="LLM nodes skipped because the rule-based fast path filled their result",
+    )
+    speculation: Optional[str] = Field(
+        None,
+        description="parallel pipeline: agreed (speculative failure analysis kept) or rerun (purposes disagreed)",
+    )
+    resumed: bool = Field(False, description="Stages finished by an earlier failed attempt were restored from its checkpoint")
+    compacted: bool = Field(False, description="The transcript was compacted before prompting")
+    transcript_tokens_before: Optional[int] = Field(None, description="Estimated tokens of the full transcript")
+    transcript_tokens_after: Optional[int] = Field(None, description="Estimated tokens of the transcript sent to the LLM")
+
+
 class AnalysisResult(BaseModel):
     """Full analysis output for one call."""
 
@@ -81,3 +108,67 @@ class AnalysisResult(BaseModel):
     failure_reason: FailureReasonResult
     action_plan: ActionPlanResult
     call_id: Optional[str] = None
+    meta: Optional[AnalysisMeta] = None
+
+
+class BatchItemResult(BaseModel):
+    """One line of a streamed batch response: a result or an inline error."""
+
+    index: int = Field(..., description="Position of the call in the submitted batch")
+    call_id: str
+    status: Literal["ok", "error"]
+    result: Optional[AnalysisResult] = None
+    error: Optional[str] = None
+
+
+class JobCreated(BaseModel):
+    """Response to a job submission."""
+
+    job_id: str
+    status: str = Field(..., description="queued, running or completed")
+    total: int = Field(..., description="Number of call logs in the job")
+
+
+class JobStatus(BaseModel):
+    """Progress of a background analysis job."""
+
+    job_id: str
+    status: str = Field(..., description="queued, running or completed")
+    total: int
+    pending: int
+    running: int
+    succeeded: int
+    failed: int
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float] = None
+
+
+class JobResultsPage(BaseModel):
+    """A page of finished job items, in completion order."""
+
+    job_id: str
+    items: list[BatchItemResult]
+    next_cursor: int = Field(..., description="Pass as `cursor` to get the items finished after this page")
+    done: bool = Field(..., description="The job is completed and there are no more items after this page")
+
+
+class StatsGroup(BaseModel):
+    """Call count and duration statistics for one group of an aggregation."""
+
+    key: dict[str, str] = Field(..., description="Period and dimension values of the group")
+    calls: int
+    duration_seconds: dict[str, Optional[float]] = Field(
+        ...,
+        description="count and mean of calls with a duration, plus estimated percentiles (p50, p90, ...)",
+    )
+
+
+class StatsResponse(BaseModel):
+    """Aggregated analysis results."""
+
+    period: str = Field(..., description="day, week, month or all")
+    group_by: list[str]
+    total_calls: int
+    groups: list[StatsGroup]
+    elapsed_ms: float
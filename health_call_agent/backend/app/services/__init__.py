@@ -0,0 +1,40 @@
+from .analysis import (
+    analyze_batch,
+    analyze_call,
+    conversation_to_text,
+    prepare_transcript,
+    short_error_message,
+    stream_call,
+)
+from .cache import AnalysisCache, get_analysis_cache
+from .coalesce import SingleFlight, get_single_flight
+from .compaction import CompactedTranscript, compact_conversation
+from .ingest import CompactCall, compact_call_logs
+from .similarity import SimilarityIndex, get_similarity_index
+from .jobs import JobQueue, JobStore, get_job_queue
+from .stats import StatsStore, get_stats_store, record_analysis
+
+__all__ = [
+    "AnalysisCache",
+    "get_analysis_cache",
+    "SingleFlight",
+    "get_single_flight",
+    "CompactedTranscript",
+    "compact_conversation",
+    "CompactCall",
+    "compact_call_logs",
+    "SimilarityIndex",
+    "get_similarity_index",
+    "JobQueue",
+    "JobStore",
+    "get_job_queue",
+    "StatsStore",
+    "get_stats_store",
+    "record_analysis",
+    "analyze_batch",
+    "analyze_call",
+    "conversation_to_text",
+    "prepare_transcript",
+    "short_error_message",
+    "stream_call",
+]
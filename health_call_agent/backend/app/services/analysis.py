@@ -0,0 +1,301 @@
+"""Analysis service shared by the HTTP routes: single calls and bounded-concurrency batches."""
+
+import asyncio
+import time
+from typing import Any, AsyncIterator, Iterable
+
+from pydantic import ValidationError
+
+from app.config import get_settings
+from app.schemas import (
+    CallLogInput,
+    AnalysisMeta,
+    AnalysisResult,
+    PurposeResult,
+    FailureReasonResult,
+    ActionPlanResult,
+    BatchItemResult,
+)
+from app import agents
+from app.agents.state import PIPELINE_GRAPH, RESTORED_UPDATE
+from app.agents.prompts import PROMPT_VERSION
+from app.agents.tokens import estimate_tokens
+from app.services.cache import cache_key, get_analysis_cache
+from app.services.coalesce import get_single_flight
+from app.services.compaction import compact_conversation
+from app.services.ingest import CompactCall
+from app.services.similarity import get_similarity_index
+from app.services.stats import record_analysis
+
+# Streamed event name -> state key holding that stage's result.
+STREAM_STAGES = {
+    "purpose": "purpose_result",
+    "failure_reason": "failure_reason_result",
+    "action_plan": "action_plan_result",
+}
+
+
+def conversation_to_text(messages: list) -> str:
+    """Turn list of {role, content} into readable transcript."""
+    lines = []
+    for m in messages:
+        if isinstance(m, dict):
+            role = m.get("role", "unknown")
+            content = m.get("content", "")
+        else:
+            role = getattr(m, "role", "unknown")
+            content = getattr(m, "content", "")
+        lines.append(f"{role}: {content}")
+    return "\n".join(lines)
+
+
+def prepare_transcript(call: CallLogInput | CompactCall) -> tuple[str, dict[str, Any]]:
+    """Transcript text to prompt with (compacted if COMPACTION_ENABLED) and its token meta."""
+    settings = get_settings()
+    if not settings.compaction_enabled:
+        conversation_text = call.text() if isinstance(call, CompactCall) else conversation_to_text(call.conversation)
+        tokens = estimate_tokens(conversation_text)
+        return conversation_text, {"transcript_tokens_before": tokens, "transcript_tokens_after": tokens}
+    compacted = compact_conversation(
+        call.conversation,
+        settings.compaction_token_budget,
+        strip_boilerplate=settings.compaction_strip_boilerplate,
+    )
+    return compacted.text, {
+        "compacted": compacted.compacted,
+        "transcript_tokens_before": compacted.tokens_before,
+        "transcript_tokens_after": compacted.tokens_after,
+    }
+
+
+def short_error_message(e: Exception) -> str:
+    text = str(e).replace("\n", " ").strip()
+    if "RESOURCE_EXHAUSTED" in text or "429" in text:
+        return "Gemini quota/rate limit exceeded. Retry later or use another API key/project."
+    if len(text) > 320:
+        return text[:320] + "..."
+    return text
+
+
+async def analyze_call(
+    call: CallLogInput | CompactCall,
+    *,
+    bypass_cache: bool = False,
+    pipeline: str | None = None,
+) -> AnalysisResult:
+    """Run the analysis pipeline for one call log.
+
+    `pipeline` overrides the configured ANALYSIS_PIPELINE ("graph", "fused" or "parallel").
+    Results are cached by transcript content; `bypass_cache` skips the lookup and refreshes the
+    cached entry with the new result. On an exact miss, the cached result of a near-duplicate
+    transcript is reused (SIMILAR_CACHE_ENABLED). Concurrent requests with the same key share
+    one pipeline run (COALESCE_ENABLED).
+    """
+    settings = get_settings()
+    pipeline = pipeline or settings.analysis_pipeline
+    conversation_text, transcript_meta = prepare_transcript(call)
+    cache = get_analysis_cache()
+    single_flight = get_single_flight()
+    similar = get_similarity_index()
+    key = None
+    if cache or single_flight:
+        key = cache_key(conversation_text, settings.gemini_models, PROMPT_VERSION, pipeline)
+    cached = cache.get(key) if cache and not bypass_cache else None
+    # Signatures are only needed past an exact hit: to look up near-duplicates and to index the new result,
+    # both of which go through the result cache. MinHash over every shingle is pure-Python CPU work, so it
+    # runs in a worker thread.
+    signature = None
+    if similar and cache and cached is None:
+        signature = await asyncio.to_thread(similar.signature, conversation_text)
+    namespace = f"{PROMPT_VERSION}|{','.join(settings.gemini_models)}|{pipeline}"
+    if cache and not bypass_cache:
+        similarity = None
+        if cached is None and signature is not None:
+            match = similar.nearest(signature, namespace)
+            if match is not None:
+                cached = cache.get(match[0])
+                similarity = round(match[1], 4)
+            # The matched entry may have expired from the result cache since it was indexed.
+            similar.record_lookup(cached is not None)
+        if cached is not None:
+            analysis = AnalysisResult(**cached, call_id=call.call_id)
+            analysis.meta = (analysis.meta or AnalysisMeta()).model_copy(
+                update={"cached": True, "similarity": similarity, **transcript_meta}
+            )
+            await record_analysis(call, analysis, conversation_text)
+            return analysis
+
+    async def run() -> AnalysisResult:
+        result = await agents.arun_analysis(
+            conversation_text=conversation_text,
+            api_key=settings.google_api_key,
+            model_candidates=settings.gemini_models,
+            timeout_seconds=settings.gemini_timeout_seconds,
+            max_retries=settings.gemini_max_retries,
+            call_id=call.call_id,
+            pipeline=pipeline,
+        )
+        analysis = AnalysisResult(
+            purpose=PurposeResult(**result["purpose"]),
+            failure_reason=FailureReasonResult(**result["failure_reason"]),
+            action_plan=ActionPlanResult(**result["action_plan"]),
+            call_id=result.get("call_id") or call.call_id,
+            meta=AnalysisMeta(**result.get("meta", {}), **transcript_meta),
+        )
+        if cache:
+            cache.set(key, analysis.model_dump(exclude={"call_id"}))
+            if signature is not None:
+                similar.add(signature, namespace, key)
+        return analysis
+
+    if single_flight:
+        analysis, coalesced = await single_flight.run(key, run)
+        if coalesced:
+            # The shared result belongs to the request that ran it; hand out a copy under this call's id.
+            analysis = analysis.model_copy(
+                update={"call_id": call.call_id, "meta": analysis.meta.model_copy(update={"coalesced": True})}
+            )
+    else:
+        analysis = await run()
+    await record_analysis(call, analysis, conversation_text)
+    return analysis
+
+
+class _StageTimer:
+    """Elapsed time since the start and since the previous stage, in milliseconds."""
+
+    def __init__(self):
+        self.started = self.last = time.perf_counter()
+
+    def __call__(self) -> dict[str, float]:
+        now = time.perf_counter()
+        timing = {
+            "elapsed_ms": round((now - self.started) * 1000, 1),
+            "stage_ms": round((now - self.last) * 1000, 1),
+        }
+        self.last = now
+        return timing
+
+
+async def stream_call(call: CallLogInput, *, bypass_cache: bool = False) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """Run the graph for one call and yield (event, data) as each stage finishes.
+
+    Events are `purpose`, `failure_reason` and `action_plan` with the stage result and
+    timing, then `done` with the result meta, or `error` if the analysis failed.
+    """
+    settings = get_settings()
+    timer = _StageTimer()
+    conversation_text, transcript_meta = prepare_transcript(call)
+    cache = get_analysis_cache()
+    key = cache_key(conversation_text, settings.gemini_models, PROMPT_VERSION, PIPELINE_GRAPH) if cache else None
+    cached = cache.get(key) if cache and not bypass_cache else None
+    if cached is not None:
+        for stage in STREAM_STAGES:
+            yield stage, {"call_id": call.call_id, "result": cached[stage], **timer()}
+        meta = AnalysisMeta(**(cached.get("meta") or {})).model_copy(update={"cached": True, **transcript_meta})
+        await record_analysis(call, AnalysisResult(**{**cached, "meta": meta}, call_id=call.call_id), conversation_text)
+        yield "done", {"call_id": call.call_id, "meta": meta.model_dump(), **timer()}
+        return
+
+    results: dict[str, Any] = {}
+    skipped_nodes: list[str] = []
+    resumed = False
+    try:
+        async for node_name, update in agents.astream_analysis(
+            conversation_text=conversation_text,
+            api_key=settings.google_api_key,
+            model_candidates=settings.gemini_models,
+            timeout_seconds=settings.gemini_timeout_seconds,
+            max_retries=settings.gemini_max_retries,
+            call_id=call.call_id,
+        ):
+            resumed = resumed or node_name == RESTORED_UPDATE
+            skipped_nodes.extend(update.get("skipped_nodes") or [])
+            for stage, state_key in STREAM_STAGES.items():
+                if update.get(state_key):
+                    results[stage] = update[state_key]
+                    yield stage, {"call_id": call.call_id, "node": node_name, "result": results[stage], **timer()}
+        analysis = AnalysisResult(
+            **results,
+            call_id=call.call_id,
+            meta=AnalysisMeta(
+                pipeline=PIPELINE_GRAPH, skipped_nodes=skipped_nodes, resumed=resumed, **transcript_meta
+            ),
+        )
+    except Exception as e:
+        yield "error", {"call_id": call.call_id, "detail": f"Analysis failed. {short_error_message(e)}", **timer()}
+        return
+    if cache:
+        cache.set(key, analysis.model_dump(exclude={"call_id"}))
+    await record_analysis(call, analysis, conversation_text)
+    yield "done", {"call_id": call.call_id, "meta": analysis.meta.model_dump(), **timer()}
+
+
+def _batch_call_id(item: Any, index: int) -> str:
+    if isinstance(item, (CallLogInput, CompactCall)):
+        call_id = item.call_id
+    elif isinstance(item, dict):
+        call_id = item.get("call_id")
+    else:
+        # Decode errors may carry the id of their position in the source (see app.cli).
+        call_id = getattr(item, "call_id", None)
+    return str(call_id) if call_id else f"call_{index + 1}"
+
+
+async def _analyze_batch_item(index: int, item: Any, options: dict[str, Any]) -> BatchItemResult:
+    call_id = _batch_call_id(item, index)
+    if isinstance(item, Exception):
+        return BatchItemResult(index=index, call_id=call_id, status="error", error=str(item))
+    if isinstance(item, CompactCall):
+        item.call_id = call_id
+        call = item
+    else:
+        try:
+            call = item if isinstance(item, CallLogInput) else CallLogInput.model_validate(item)
+            call = call.model_copy(update={"call_id": call_id})
+        except ValidationError as e:
+            return BatchItemResult(index=index, call_id=call_id, status="error", error=f"Invalid call log: {e}")
+    try:
+        result = await analyze_call(call, **options)
+    except Exception as e:
+        return BatchItemResult(index=index, call_id=call_id, status="error", error=short_error_message(e))
+    return BatchItemResult(index=index, call_id=call_id, status="ok", result=result)
+
+
+async def analyze_batch(
+    items: Iterable[Any],
+    concurrency: int,
+    *,
+    bypass_cache: bool = False,
+    pipeline: str | None = None,
+) -> AsyncIterator[BatchItemResult]:
+    """Analyze calls with at most `concurrency` in flight, yielding each result as soon as it finishes.
+
+    `items` may hold `CallLogInput` or `CompactCall` objects, raw dicts, or exceptions for items that could not
+    be decoded; invalid items and failed analyses are yielded as error results instead of
+    aborting the batch.
+    """
+    options = {"bypass_cache": bypass_cache, "pipeline": pipeline}
+    pending = iter(enumerate(items))
+    results: asyncio.Queue[BatchItemResult | None] = asyncio.Queue()
+
+    async def worker() -> None:
+        try:
+            for index, item in pending:
+                await results.put(await _analyze_batch_item(index, item, options))
+        finally:
+            await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if item is None:
+                running -= 1
+                continue
+            yield item
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,147 @@
+"""Content-addressed cache of analysis results: in-memory LRU with TTL and optional SQLite tier."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from app.config import get_settings
+
+_WHITESPACE = re.compile(r"[ \t\r\f\v]+")
+
+
+def normalize_transcript(conversation_text: str) -> str:
+    """Collapse runs of whitespace so formatting-only differences share a cache entry."""
+    lines = (_WHITESPACE.sub(" ", line).strip() for line in conversation_text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def cache_key(conversation_text: str, model_candidates: list[str], prompt_version: str, *extra: str) -> str:
+    """Hash of the normalized transcript, prompt version, model list and any extra options."""
+    digest = hashlib.sha256()
+    for part in (prompt_version, ",".join(model_candidates), *extra):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(normalize_transcript(conversation_text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AnalysisCache:
+    """LRU + TTL cache of result dicts, optionally backed by SQLite so entries survive restarts."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 86400, db_path: str | None = None):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self.db_path = db_path or None
+        if self.db_path:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - stored_at > self.ttl_seconds
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, stored_at FROM analysis_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return value
+                    self._db.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.expirations += 1
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.stores += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), now),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, stored_at: float, value: dict[str, Any]) -> None:
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "persistent": self._db is not None,
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+@lru_cache
+def get_analysis_cache() -> AnalysisCache | None:
+    """Process-wide result cache, or None when ANALYSIS_CACHE_ENABLED is off."""
+    settings = get_settings()
+    if not settings.analysis_cache_enabled:
+        return None
+    return AnalysisCache(
+        max_entries=settings.analysis_cache_max_entries,
+        ttl_seconds=settings.analysis_cache_ttl_seconds,
+        db_path=settings.analysis_cache_db,
+    )
@@ -0,0 +1,55 @@
+"""Single-flight execution: concurrent identical analyses share one pipeline run."""
+
+import asyncio
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, TypeVar
+
+from app.config import get_settings
+from app.metrics import COALESCED_REQUESTS
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """At most one in-flight run per key; callers arriving while it runs await the same result.
+
+    The run is a task of its own, so a caller that disconnects does not cancel it for the
+    others. Errors propagate to every caller of that run.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return (result, coalesced); `coalesced` is True when another caller's run was joined."""
+        loop = asyncio.get_running_loop()
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is loop:
+            self.coalesced += 1
+            COALESCED_REQUESTS.inc()
+            return await asyncio.shield(task), True
+        task = loop.create_task(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        self.leaders += 1
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller has gone away.
+            task.exception()
+
+    def stats(self) -> dict[str, Any]:
+        return {"in_flight": len(self._in_flight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+@lru_cache
+def get_single_flight() -> SingleFlight | None:
+    """Process-wide single-flight registry, or None when COALESCE_ENABLED is off."""
+    if not get_settings().coalesce_enabled:
+        return None
+    return SingleFlight()
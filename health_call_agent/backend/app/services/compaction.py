@@ -0,0 +1,156 @@
+"""Transcript compaction: shrink long call transcripts to a token budget before prompting."""
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from app.agents.tokens import CHARS_PER_TOKEN, estimate_tokens
+
+# Turns made only of these phrases carry no evidence (greetings, hold messages, acknowledgements).
+_BOILERPLATE_PHRASES = (
+    r"h(?:i|ello|ey)(?: there)?",
+    r"good (?:morning|afternoon|evening)",
+    r"thank(?:s| you)(?: (?:so|very) much)?(?: for (?:calling|holding|waiting|your patience))?",
+    r"you(?:'re| are) welcome",
+    r"(?:ok(?:ay)?|alright|all right|sure|yes|yeah|yep|right|great|perfect|got it|i see|understood|mm+-?hm+|uh-?huh)",
+    r"that(?:'s| is) (?:right|correct|fine)|correct|exactly",
+    r"(?:please )?(?:hold(?: on)?|bear with me)(?: (?:please|a moment|one moment|a second))?",
+    r"(?:just )?(?:one|a) (?:moment|second|sec)(?: please)?",
+    r"let me (?:check|see|look(?: into)?)(?: (?:that|this))?(?: for you)?",
+    r"how (?:can|may) i help(?: you)?(?: today)?",
+    r"(?:good)?bye|have a (?:nice|good|great) day",
+)
+_BOILERPLATE = re.compile(
+    r"(?:(?:" + "|".join(_BOILERPLATE_PHRASES) + r")[\s,.!?;:-]*)+",
+    re.IGNORECASE,
+)
+
+# Words that usually mark the turns explaining why a call failed; such turns are kept first.
+_EVIDENCE = re.compile(
+    r"\b(?:sorry|unfortunately|unable|can(?:no|')t|couldn't|won't|not (?:able|available|possible|working)|"
+    r"no (?:slots?|availability|one)|down|error|fail\w*|problem|issue|broken|wait\w*|queue|delay\w*|"
+    r"transfer\w*|callback|call (?:you )?back|cancel\w*|refund\w*|complain\w*|frustrat\w*|policy|"
+    r"escalat\w*|manager|supervisor|system)\b",
+    re.IGNORECASE,
+)
+
+# Always keep the opening (purpose) and closing (outcome) turns.
+_KEEP_HEAD_TURNS = 3
+_KEEP_TAIL_TURNS = 3
+
+
+@dataclass
+class CompactedTranscript:
+    text: str
+    tokens_before: int
+    tokens_after: int
+    turns_before: int
+    turns_after: int
+
+    @property
+    def compacted(self) -> bool:
+        return self.tokens_after < self.tokens_before
+
+
+def _turn(m: Any) -> tuple[str, str]:
+    if isinstance(m, tuple):
+        return m
+    if isinstance(m, dict):
+        return str(m.get("role", "unknown")), str(m.get("content", ""))
+    return str(getattr(m, "role", "unknown")), str(getattr(m, "content", ""))
+
+
+def _is_boilerplate(content: str) -> bool:
+    return _BOILERPLATE.fullmatch(content.strip()) is not None
+
+
+def _truncate(content: str, max_tokens: int) -> str:
+    """Keep the start and end of an overlong turn."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(content) <= max_chars:
+        return content
+    half = max_chars // 2
+    return f"{content[:half].rstrip()} [...] {content[-half:].lstrip()}"
+
+
+def _merge_turns(messages: list, strip_boilerplate: bool) -> list[tuple[str, str]]:
+    """Drop boilerplate and repeated turns and collapse consecutive turns of the same speaker."""
+    turns: list[tuple[str, str]] = []
+    seen: set[tuple[str, str]] = set()
+    for m in messages:
+        role, content = _turn(m)
+        content = content.strip()
+        if not content:
+            continue
+        if strip_boilerplate:
+            # A speaker repeating a turn word for word (e.g. the same confirmation) adds nothing.
+            key = (role, " ".join(content.lower().split()))
+            if key in seen or _is_boilerplate(content):
+                continue
+            seen.add(key)
+        if turns and turns[-1][0] == role:
+            turns[-1] = (role, f"{turns[-1][1]} {content}")
+        else:
+            turns.append((role, content))
+    return turns
+
+
+def _select_turns(lines: list[str], token_budget: int) -> list[int]:
+    """Indexes of the turns to keep: head and tail first, then evidence-bearing turns, within budget."""
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    count = len(lines)
+    head = range(min(_KEEP_HEAD_TURNS, count))
+    tail = range(max(count - _KEEP_TAIL_TURNS, len(head)), count)
+    evidence = sorted(
+        (i for i in range(count) if i not in head and i not in tail),
+        key=lambda i: (-len(_EVIDENCE.findall(lines[i])), i),
+    )
+    keep: set[int] = set()
+    used = 0
+    for i in [*head, *tail, *evidence]:
+        if used + costs[i] <= token_budget:
+            keep.add(i)
+            used += costs[i]
+    return sorted(keep)
+
+
+def compact_conversation(
+    messages: list,
+    token_budget: int,
+    *,
+    strip_boilerplate: bool = True,
+) -> CompactedTranscript:
+    """Render the transcript, compacted to about `token_budget` tokens.
+
+    Boilerplate turns are removed and same-speaker turns merged first; if the transcript is
+    still over budget, the opening and closing turns plus the turns most likely to hold
+    failure evidence are kept in their original order and the gaps are marked.
+    """
+    original = [_turn(m) for m in messages]
+    tokens_before = estimate_tokens("\n".join(f"{role}: {content}" for role, content in original))
+    turns = _merge_turns(messages, strip_boilerplate)
+    # No single turn may take more than a quarter of the budget.
+    max_turn_tokens = max(1, token_budget // 4)
+    lines = [f"{role}: {_truncate(content, max_turn_tokens)}" for role, content in turns]
+    text = "\n".join(lines)
+    turns_after = len(lines)
+    if estimate_tokens(text) > token_budget:
+        keep = _select_turns(lines, token_budget)
+        out: list[str] = []
+        previous = -1
+        for i in keep:
+            if i - previous > 1:
+                out.append(f"[... {i - previous - 1} turns omitted ...]")
+            out.append(lines[i])
+            previous = i
+        if previous < len(lines) - 1:
+            out.append(f"[... {len(lines) - 1 - previous} turns omitted ...]")
+        text = "\n".join(out)
+        turns_after = len(keep)
+    return CompactedTranscript(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=estimate_tokens(text),
+        turns_before=len(original),
+        turns_after=turns_after,
+    )
@@ -0,0 +1,227 @@
+"""Readers for large call log inputs: incremental archive readers (JSON arrays, JSONL) for the CLI,
+and a compact in-memory representation for big request bodies on the batch endpoints."""
+
+import json
+import sys
+from functools import lru_cache
+from typing import IO, Any, Iterator, Optional
+
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_json
+from typing_extensions import NotRequired, TypedDict
+
+_CHUNK_CHARS = 1 << 20
+_WHITESPACE = " \t\r\n"
+
+_decoder = json.JSONDecoder()
+
+
+def _iter_values(stream: IO[str], in_array: bool) -> Iterator[Any]:
+    """Decode consecutive JSON values, reading the stream a chunk at a time.
+
+    In array mode values are separated by commas and end at `]`; otherwise they are
+    separated by whitespace (pretty-printed objects one after another).
+    """
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = stream.read(_CHUNK_CHARS)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or eof or not fill():
+                break
+        if pos >= len(buffer):
+            if in_array:
+                raise ValueError("Unexpected end of input: JSON array is not closed.")
+            return
+        if in_array and buffer[pos] == "]":
+            return
+        if in_array and buffer[pos] == ",":
+            pos += 1
+            continue
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buffer, pos)
+                # A bare number at the end of the buffer may continue in the next chunk.
+                if end < len(buffer) or eof or isinstance(value, (dict, list, str)) or not fill():
+                    break
+            except json.JSONDecodeError:
+                # Possibly cut off at the chunk boundary; retry with more input.
+                if eof or not fill():
+                    raise
+        pos = end
+        yield value
+
+
+def iter_json_lines(stream: IO[str]) -> Iterator[Any]:
+    """One value per non-empty line; undecodable lines are yielded as ValueError so callers can report them."""
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Line {line_no} is not valid JSON: {e}")
+
+
+def iter_call_logs(stream: IO[str], jsonl: bool | None = None) -> Iterator[Any]:
+    """Call logs from a JSON array, JSONL, or concatenated JSON objects.
+
+    With `jsonl=None` the format is detected from the first character: `[` starts an
+    array, anything else is read as JSONL. `jsonl=True` reads JSONL whatever the first
+    character; `jsonl=False` reads an array or concatenated JSON objects.
+    """
+    first = stream.read(1)
+    while first and first in _WHITESPACE + "\ufeff":
+        first = stream.read(1)
+    if not first:
+        return
+    if jsonl is None:
+        jsonl = first != "["
+    if jsonl:
+        yield from iter_json_lines(_Prefixed(first, stream))
+    elif first == "[":
+        yield from _iter_values(_Prefixed("", stream), in_array=True)
+    else:
+        yield from _iter_values(_Prefixed(first, stream), in_array=False)
+
+
+class _Prefixed:
+    """Stream with already-consumed characters pushed back in front."""
+
+    def __init__(self, prefix: str, stream: IO[str]):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> str:
+        prefix, self._prefix = self._prefix, ""
+        if size is not None and 0 <= size <= len(prefix):
+            self._prefix = prefix[size:]
+            return prefix[:size]
+        return prefix + self._stream.read(-1 if size is None or size < 0 else size - len(prefix))
+
+    def __iter__(self) -> Iterator[str]:
+        prefix, self._prefix = self._prefix, ""
+        first_line = True
+        for line in self._stream:
+            if first_line:
+                line = prefix + line
+                first_line = False
+            yield line
+        if first_line and prefix:
+            yield prefix
+
+
+class _Message(TypedDict):
+    role: str
+    content: str
+
+
+class _CallLog(TypedDict):
+    """Same fields and coercion as `CallLogInput`, validated into plain dicts."""
+
+    call_id: NotRequired[Optional[str]]
+    date: NotRequired[Optional[str]]
+    duration_seconds: NotRequired[Optional[int]]
+    participants: NotRequired[Optional[list[str]]]
+    conversation: list[_Message]
+
+
+@lru_cache
+def _call_logs_adapter() -> TypeAdapter:
+    return TypeAdapter(list[_CallLog])
+
+
+class CompactCall:
+    """A validated call log held as tuples of interned roles and message contents.
+
+    Stands in for `CallLogInput` on the batch paths: no pydantic model per message, and each
+    role string is stored once per process however many turns use it.
+    """
+
+    __slots__ = ("call_id", "date", "duration_seconds", "participants", "roles", "contents")
+
+    def __init__(
+        self,
+        call_id: str | None,
+        date: str | None,
+        duration_seconds: int | None,
+        participants: tuple[str, ...] | None,
+        roles: tuple[str, ...],
+        contents: tuple[str, ...],
+    ):
+        self.call_id = call_id
+        self.date = date
+        self.duration_seconds = duration_seconds
+        self.participants = participants
+        self.roles = roles
+        self.contents = contents
+
+    @classmethod
+    def from_validated(cls, data: dict[str, Any]) -> "CompactCall":
+        conversation = data["conversation"]
+        participants = data.get("participants")
+        return cls(
+            data.get("call_id"),
+            data.get("date"),
+            data.get("duration_seconds"),
+            tuple(participants) if participants is not None else None,
+            tuple(sys.intern(m["role"]) for m in conversation),
+            tuple(m["content"] for m in conversation),
+        )
+
+    @property
+    def conversation(self) -> list[tuple[str, str]]:
+        """(role, content) pairs, accepted wherever a list of messages is."""
+        return list(zip(self.roles, self.contents))
+
+    def text(self) -> str:
+        """The transcript as `conversation_to_text` renders it."""
+        return "\n".join(f"{role}: {content}" for role, content in zip(self.roles, self.contents))
+
+    def to_json(self) -> str:
+        """Serialized like `CallLogInput.model_dump_json()`."""
+        return to_json(
+            {
+                "call_id": self.call_id,
+                "date": self.date,
+                "duration_seconds": self.duration_seconds,
+                "participants": self.participants,
+                "conversation": [{"role": r, "content": c} for r, c in zip(self.roles, self.contents)],
+            }
+        ).decode()
+
+
+def compact_call_logs(items: list[Any], chunk_size: int = 1024) -> list[Any]:
+    """Replace valid call log dicts in `items` with `CompactCall`s, in place; returns `items`.
+
+    Validation runs over a chunk of items at a time in one `TypeAdapter` call instead of one
+    model per call and per message, and each chunk's source dicts are released as it is
+    converted. Anything that is not a valid call log (including exceptions from decoding) is
+    left untouched, so callers report it exactly as before.
+    """
+    adapter = _call_logs_adapter()
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start : start + chunk_size]
+        positions = [i for i, item in enumerate(chunk) if isinstance(item, dict)]
+        try:
+            validated = adapter.validate_python([chunk[i] for i in positions])
+        except ValidationError as e:
+            invalid = {error["loc"][0] for error in e.errors() if error["loc"]}
+            positions = [p for j, p in enumerate(positions) if j not in invalid]
+            validated = adapter.validate_python([chunk[i] for i in positions])
+        for i, data in zip(positions, validated):
+            items[start + i] = CompactCall.from_validated(data)
+    return items
@@ -0,0 +1,343 @@
+"""Durable background jobs: batches of call logs queued in SQLite and drained by in-process workers."""
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from pydantic import ValidationError
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services.analysis import analyze_call, short_error_message
+from app.services.ingest import CompactCall
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+
+ITEM_PENDING = "pending"
+ITEM_RUNNING = "running"
+ITEM_OK = "ok"
+ITEM_ERROR = "error"
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " id TEXT PRIMARY KEY, created_at REAL NOT NULL, updated_at REAL NOT NULL,"
+    " finished_at REAL, total INTEGER NOT NULL, remaining INTEGER NOT NULL, options TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS job_items ("
+    " job_id TEXT NOT NULL, idx INTEGER NOT NULL, call_id TEXT NOT NULL, payload TEXT,"
+    " status TEXT NOT NULL, result TEXT, error TEXT, attempts INTEGER NOT NULL DEFAULT 0, seq INTEGER,"
+    " not_before REAL, PRIMARY KEY (job_id, idx))",
+    # Pending items are claimed in insertion (rowid) order.
+    "CREATE INDEX IF NOT EXISTS job_items_status ON job_items (status)",
+    "CREATE INDEX IF NOT EXISTS job_items_seq ON job_items (job_id, seq)",
+    "CREATE INDEX IF NOT EXISTS job_items_job_status ON job_items (job_id, status)",
+)
+
+
+class JobStore:
+    """SQLite tables of jobs and their items.
+
+    Each finished item gets an increasing `seq`, which is the cursor for paging results,
+    so items that finish out of order are never skipped.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        # Files created before failed items were retried with a delay lack the column.
+        if "not_before" not in {row[1] for row in self._db.execute("PRAGMA table_info(job_items)")}:
+            self._db.execute("ALTER TABLE job_items ADD COLUMN not_before REAL")
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._seq = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM job_items").fetchone()[0]
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def create_job(self, items: Iterable[Any], options: dict[str, Any]) -> tuple[str, int]:
+        """Store a job; items that are not valid call logs are stored as errors right away."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        rows = []
+        with self._lock:
+            for idx, item in enumerate(items):
+                if isinstance(item, CompactCall):
+                    call_id = item.call_id
+                else:
+                    call_id = item.get("call_id") if isinstance(item, dict) else None
+                call_id = str(call_id) if call_id else f"call_{idx + 1}"
+                error = str(item) if isinstance(item, Exception) else None
+                payload = None
+                if isinstance(item, CompactCall):
+                    # Already validated by `compact_call_logs`.
+                    item.call_id = call_id
+                    payload = item.to_json()
+                elif error is None:
+                    try:
+                        call = CallLogInput.model_validate(item).model_copy(update={"call_id": call_id})
+                        payload = call.model_dump_json()
+                    except ValidationError as e:
+                        error = f"Invalid call log: {e}"
+                if error is None:
+                    rows.append((job_id, idx, call_id, payload, ITEM_PENDING, None, None))
+                else:
+                    rows.append((job_id, idx, call_id, None, ITEM_ERROR, error, self._next_seq()))
+            remaining = sum(row[4] == ITEM_PENDING for row in rows)
+            with self._db:
+                self._db.execute(
+                    "INSERT INTO jobs (id, created_at, updated_at, finished_at, total, remaining, options)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, now, now, None if remaining else now, len(rows), remaining, json.dumps(options)),
+                )
+                self._db.executemany(
+                    "INSERT INTO job_items (job_id, idx, call_id, payload, status, error, seq) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return job_id, len(rows)
+
+    def recover(self, max_attempts: int) -> tuple[int, int]:
+        """Requeue items that were running when the process stopped; finished items are kept.
+
+        Attempts are counted when an item is claimed and given back when a worker is cancelled,
+        so an item left running here was cut off by a crash or kill. One whose attempts reached
+        `max_attempts` (failures plus such interruptions, e.g. a call that keeps taking the
+        process down) is failed instead. Returns (requeued, failed).
+        """
+        with self._lock:
+            exhausted = self._db.execute(
+                "SELECT job_id, idx, attempts FROM job_items WHERE status = ? AND attempts >= ?",
+                (ITEM_RUNNING, max_attempts),
+            ).fetchall()
+        for job_id, idx, attempts in exhausted:
+            self.complete(job_id, idx, error=f"Gave up after {attempts} attempts.")
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE job_items SET status = ? WHERE status = ?", (ITEM_PENDING, ITEM_RUNNING)
+            )
+        return cursor.rowcount, len(exhausted)
+
+    def claim(self) -> tuple[str, int, str, dict[str, Any], int] | None:
+        """Mark the oldest pending item that is due running; returns (job_id, idx, payload, options, attempts).
+
+        Items released for a retry are skipped until their `not_before` time has passed.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT i.rowid, i.job_id, i.idx, i.payload, j.options, i.attempts FROM job_items i"
+                " JOIN jobs j ON j.id = i.job_id WHERE i.status = ? AND (i.not_before IS NULL OR i.not_before <= ?)"
+                " ORDER BY i.rowid LIMIT 1",
+                (ITEM_PENDING, time.time()),
+            ).fetchone()
+            if row is None:
+                return None
+            rowid, job_id, idx, payload, options, attempts = row
+            with self._db:
+                self._db.execute(
+                    "UPDATE job_items SET status = ?, attempts = attempts + 1 WHERE rowid = ?",
+                    (ITEM_RUNNING, rowid),
+                )
+                self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+        return job_id, idx, payload, json.loads(options), attempts + 1
+
+    def release(self, job_id: str, idx: int, delay: float = 0.0, refund: bool = False) -> None:
+        """Put a running item back in the queue, to be claimed again after `delay` seconds.
+
+        With `refund` the attempt taken by `claim` is given back (the item was interrupted, not failed).
+        """
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE job_items SET status = ?, not_before = ?, attempts = attempts - ? WHERE job_id = ? AND idx = ?",
+                (ITEM_PENDING, time.time() + delay if delay > 0 else None, int(refund), job_id, idx),
+            )
+
+    def complete(self, job_id: str, idx: int, result: str | None = None, error: str | None = None) -> None:
+        """Store an item's result JSON (or error) and finish the job when nothing is left."""
+        now = time.time()
+        status = ITEM_ERROR if error is not None else ITEM_OK
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE job_items SET status = ?, result = ?, error = ?, seq = ?, payload = NULL"
+                " WHERE job_id = ? AND idx = ?",
+                (status, result, error, self._next_seq(), job_id, idx),
+            )
+            self._db.execute(
+                "UPDATE jobs SET updated_at = ?, remaining = remaining - 1,"
+                " finished_at = CASE WHEN remaining = 1 THEN ? ELSE NULL END WHERE id = ?",
+                (now, now, job_id),
+            )
+
+    def job_status(self, job_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            job = self._db.execute(
+                "SELECT created_at, updated_at, finished_at, total FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            rows = self._db.execute(
+                "SELECT status, COUNT(*), SUM(attempts > 0) FROM job_items WHERE job_id = ? GROUP BY status",
+                (job_id,),
+            ).fetchall()
+        created_at, updated_at, finished_at, total = job
+        counts = {status: count for status, count, _ in rows}
+        pending = counts.get(ITEM_PENDING, 0)
+        if finished_at is not None:
+            status = JOB_COMPLETED
+        elif not any(started for _, _, started in rows):
+            # Only items rejected when the job was created (never started) have finished.
+            status = JOB_QUEUED
+        else:
+            status = JOB_RUNNING
+        return {
+            "job_id": job_id,
+            "status": status,
+            "total": total,
+            "pending": pending,
+            "running": counts.get(ITEM_RUNNING, 0),
+            "succeeded": counts.get(ITEM_OK, 0),
+            "failed": counts.get(ITEM_ERROR, 0),
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "finished_at": finished_at,
+        }
+
+    def results(self, job_id: str, cursor: int, limit: int) -> list[tuple[int, int, str, str, str | None, str | None]]:
+        """Finished items after `cursor`, in completion order: (seq, idx, call_id, status, result, error)."""
+        with self._lock:
+            return self._db.execute(
+                "SELECT seq, idx, call_id, status, result, error FROM job_items"
+                " WHERE job_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (job_id, cursor, limit),
+            ).fetchall()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            items = dict(self._db.execute("SELECT status, COUNT(*) FROM job_items GROUP BY status").fetchall())
+            jobs = self._db.execute("SELECT COUNT(*), COUNT(finished_at) FROM jobs").fetchone()
+        return {"jobs": jobs[0], "jobs_finished": jobs[1], "items": items}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class JobQueue:
+    """Worker tasks on the app's event loop that drain pending job items one at a time each."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int,
+        max_attempts: int = 3,
+        retry_base_seconds: float = 2.0,
+        retry_max_seconds: float = 60.0,
+    ):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+
+    async def start(self) -> None:
+        recovered, failed = await asyncio.to_thread(self.store.recover, self.max_attempts)
+        if recovered:
+            logger.info("Requeued %d job items interrupted by the last shutdown", recovered)
+        if failed:
+            logger.warning("Failed %d job items interrupted %d times", failed, self.max_attempts)
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel workers; items they were running go back to the queue without using up an attempt."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def submit(self, items: list[Any], *, bypass_cache: bool = False, pipeline: str | None = None) -> tuple[str, int]:
+        options = {"bypass_cache": bypass_cache, "pipeline": pipeline}
+        # Validating and inserting a large batch takes a while; keep it off the event loop.
+        job_id, total = await asyncio.to_thread(self.store.create_job, items, options)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job_id, total
+
+    async def _worker(self) -> None:
+        # SQLite calls run in a thread: a commit can wait on the disk or on another worker's transaction.
+        while True:
+            self._wakeup.clear()
+            claimed = await asyncio.to_thread(self.store.claim)
+            if claimed is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            job_id, idx, payload, options, attempts = claimed
+            try:
+                call = CallLogInput.model_validate_json(payload)
+                result = await analyze_call(call, **options)
+            except asyncio.CancelledError:
+                # Shutting down: the item did not fail. A blocking write is fine here, the loop is stopping.
+                self.store.release(job_id, idx, refund=True)
+                raise
+            except ValidationError as e:
+                await asyncio.to_thread(self.store.complete, job_id, idx, error=short_error_message(e))
+            except Exception as e:
+                if attempts < self.max_attempts:
+                    delay = self.retry_delay(attempts)
+                    logger.info(
+                        "Job %s item %d failed (attempt %d), retrying in %.1fs: %s", job_id, idx, attempts, delay, e
+                    )
+                    await asyncio.to_thread(self.store.release, job_id, idx, delay)
+                    asyncio.get_running_loop().call_later(delay, self._wakeup.set)
+                else:
+                    await asyncio.to_thread(self.store.complete, job_id, idx, error=short_error_message(e))
+            else:
+                await asyncio.to_thread(self.store.complete, job_id, idx, result=result.model_dump_json())
+
+    def retry_delay(self, attempts: int) -> float:
+        """Exponential backoff after the `attempts`-th failure, with jitter over its upper half
+        so items that failed together (e.g. on a quota error) are not retried together."""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def stats(self) -> dict[str, Any]:
+        return {"workers": len(self._tasks), "db_path": self.store.db_path, **self.store.stats()}
+
+
+@lru_cache
+def get_job_queue() -> JobQueue | None:
+    """Process-wide job queue, or None when JOBS_ENABLED is off."""
+    settings = get_settings()
+    if not settings.jobs_enabled:
+        return None
+    return JobQueue(
+        JobStore(settings.jobs_db),
+        settings.jobs_workers,
+        settings.jobs_max_attempts,
+        settings.jobs_retry_base_seconds,
+        settings.jobs_retry_max_seconds,
+    )
@@ -0,0 +1,166 @@
+"""Near-duplicate transcript index: word shingles, MinHash signatures and an LSH banding index.
+
+Templated calls (same IVR script, same outage) differ only in names, dates and numbers, so
+an exact content hash misses them. Each analyzed transcript's MinHash signature is kept in
+a fixed number of slots; a new transcript whose estimated Jaccard similarity to a stored one
+reaches the threshold can reuse that transcript's cached analysis.
+"""
+
+import hashlib
+import random
+import re
+import threading
+from array import array
+from functools import lru_cache
+from typing import Any
+
+from app.config import get_settings
+from app.metrics import SIMILAR_CACHE_LOOKUPS
+from app.services.cache import normalize_transcript
+
+_TOKEN = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+_SHINGLE_WORDS = 3
+# Fixed seed: signatures must be comparable across the lifetime of the index.
+_MASK_SEED = 0x5EED
+
+
+def _shingle_hashes(conversation_text: str) -> list[int]:
+    """64-bit hashes of the distinct word 3-grams of the normalized, lowercased, digit-masked transcript."""
+    text = _DIGITS.sub("0", normalize_transcript(conversation_text).lower())
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return []
+    width = min(_SHINGLE_WORDS, len(tokens))
+    shingles = {" ".join(tokens[i : i + width]) for i in range(len(tokens) - width + 1)}
+    return [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little") for s in shingles]
+
+
+class SimilarityIndex:
+    """MinHash + LSH index over a ring of `max_entries` slots (the oldest entry is evicted first).
+
+    Signatures (`num_perm` 64-bit minima per slot) and band keys (`bands` per slot) live in
+    flat `array`s; buckets map a band key to the slots sharing it. Candidates from any shared
+    band are verified against the full signature. `namespace` separates entries analyzed with
+    different models, prompts or pipelines.
+    """
+
+    def __init__(self, max_entries: int = 10000, num_perm: int = 128, bands: int = 16, threshold: float = 0.9):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands}).")
+        self.max_entries = max(1, max_entries)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = random.Random(_MASK_SEED)
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+        self._signatures = array("Q")
+        self._band_keys = array("q")
+        self._keys: list[str] = []
+        self._slots: dict[str, int] = {}
+        self._buckets: dict[int, list[int]] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def signature(self, conversation_text: str) -> array | None:
+        """MinHash signature of the transcript, or None if it has no words."""
+        hashes = _shingle_hashes(conversation_text)
+        if not hashes:
+            return None
+        return array("Q", (min(map(mask.__xor__, hashes)) for mask in self._masks))
+
+    def _band_key_list(self, signature: array, namespace: str) -> list[int]:
+        rows = self.rows
+        return [hash((namespace, band, signature[band * rows : (band + 1) * rows].tobytes())) for band in range(self.bands)]
+
+    def nearest(self, signature: array, namespace: str) -> tuple[str, float] | None:
+        """(key, estimated similarity) of the most similar stored entry at or above the threshold."""
+        band_keys = self._band_key_list(signature, namespace)
+        n = self.num_perm
+        with self._lock:
+            candidates = {slot for key in band_keys for slot in self._buckets.get(key, ())}
+            best: tuple[str, float] | None = None
+            for slot in candidates:
+                stored = self._signatures[slot * n : (slot + 1) * n]
+                similarity = sum(a == b for a, b in zip(signature, stored)) / n
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (self._keys[slot], similarity)
+            return best
+
+    def record_lookup(self, hit: bool) -> None:
+        """Count a lookup; a hit is one whose stored result was actually reused."""
+        with self._lock:
+            self.lookups += 1
+            self.hits += hit
+        SIMILAR_CACHE_LOOKUPS.labels(outcome="hit" if hit else "miss").inc()
+
+    def add(self, signature: array, namespace: str, key: str) -> None:
+        """Store the signature under `key`, evicting the oldest entry once the index is full.
+
+        A key that is already indexed (a re-analysis with `bypass_cache`) keeps its slot and
+        has its signature replaced, so it does not take a second slot.
+        """
+        band_keys = self._band_key_list(signature, namespace)
+        n, b = self.num_perm, self.bands
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._next
+                self._next = (slot + 1) % self.max_entries
+                if slot < len(self._keys):
+                    del self._slots[self._keys[slot]]
+                    self.evictions += 1
+            if slot < len(self._keys):
+                for old in self._band_keys[slot * b : (slot + 1) * b]:
+                    bucket = self._buckets.get(old)
+                    if bucket is not None:
+                        bucket.remove(slot)
+                        if not bucket:
+                            del self._buckets[old]
+                self._signatures[slot * n : (slot + 1) * n] = signature
+                self._band_keys[slot * b : (slot + 1) * b] = array("q", band_keys)
+                self._keys[slot] = key
+            else:
+                self._signatures.extend(signature)
+                self._band_keys.extend(band_keys)
+                self._keys.append(key)
+            self._slots[key] = slot
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, []).append(slot)
+            self.stores += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._keys),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "signature_bytes": self._signatures.itemsize * len(self._signatures)
+                + self._band_keys.itemsize * len(self._band_keys),
+            }
+
+
+@lru_cache
+def get_similarity_index() -> SimilarityIndex | None:
+    """Process-wide near-duplicate index, or None when SIMILAR_CACHE_ENABLED is off (or the result cache is)."""
+    settings = get_settings()
+    if not settings.similar_cache_enabled or not settings.analysis_cache_enabled:
+        return None
+    return SimilarityIndex(
+        max_entries=settings.similar_cache_max_entries,
+        num_perm=settings.similar_cache_num_perm,
+        bands=settings.similar_cache_bands,
+        threshold=settings.similar_cache_threshold,
+    )
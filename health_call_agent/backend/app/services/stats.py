@@ -0,0 +1,344 @@
+"""Analytics over analysis results: an append-only fact log plus incrementally maintained daily rollups.
+
+Each analyzed call is reduced to a few low-cardinality columns (day, purpose, confidence,
+reason_category, owner, duration). Appends are buffered and written in batches; every batch
+also adds its counts to a rollup keyed by (day, dimensions) and to a duration histogram, so
+queries aggregate rollup rows (bounded by days x distinct dimension values) instead of
+scanning every call ever recorded.
+
+A fact is keyed by call_id plus a hash of the transcript: re-analyzing the same call replaces
+its fact, while unrelated uploads that reuse a positional id (`call_1`, ...) are kept apart.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from app.config import get_settings
+from app.schemas import AnalysisResult, CallLogInput
+from app.services.cache import normalize_transcript
+
+DIMENSIONS = ("purpose", "confidence", "reason_category", "owner")
+PERIODS = ("day", "week", "month", "all")
+
+# Upper bounds (seconds) of the duration histogram buckets; the last bucket is open-ended.
+DURATION_BUCKETS = (5, 10, 15, 20, 30, 45, 60, 90, 120, 180, 240, 300, 420, 600, 900, 1200, 1800, 2700, 3600, 5400, 7200)
+
+_MAX_OWNER_LENGTH = 80
+
+_PERIOD_SQL = {
+    "day": "day",
+    # Monday of the ISO week
+    "week": "date(day, '-6 days', 'weekday 1')",
+    "month": "substr(day, 1, 7)",
+}
+
+_DIMS_SQL = ", ".join(DIMENSIONS)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS call_facts ("
+    " fact_key TEXT UNIQUE, call_id TEXT, day TEXT NOT NULL, purpose TEXT NOT NULL, confidence TEXT NOT NULL,"
+    " reason_category TEXT NOT NULL, owner TEXT NOT NULL, duration_seconds INTEGER, recorded_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS stats_rollup ("
+    " day TEXT NOT NULL, purpose TEXT NOT NULL, confidence TEXT NOT NULL, reason_category TEXT NOT NULL,"
+    " owner TEXT NOT NULL, calls INTEGER NOT NULL, duration_calls INTEGER NOT NULL, duration_sum REAL NOT NULL,"
+    " PRIMARY KEY (day, purpose, confidence, reason_category, owner)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS stats_duration_hist ("
+    " day TEXT NOT NULL, purpose TEXT NOT NULL, confidence TEXT NOT NULL, reason_category TEXT NOT NULL,"
+    " owner TEXT NOT NULL, bucket INTEGER NOT NULL, calls INTEGER NOT NULL,"
+    " PRIMARY KEY (day, purpose, confidence, reason_category, owner, bucket)) WITHOUT ROWID",
+)
+
+# One fact: (fact_key, call_id, day, purpose, confidence, reason_category, owner, duration_seconds)
+Fact = tuple[str | None, str | None, str, str, str, str, str, int | None]
+
+
+def _label(value: Any) -> str:
+    return " ".join(str(value or "").split()).lower() or "unknown"
+
+
+def _call_day(value: str | None, recorded_at: float) -> str:
+    """ISO date of the call; falls back to the day it was analyzed when `date` is missing or unparseable."""
+    if value:
+        try:
+            return date.fromisoformat(value.strip()[:10]).isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(recorded_at, timezone.utc).date().isoformat()
+
+
+def duration_bucket(seconds: float) -> int:
+    return bisect.bisect_left(DURATION_BUCKETS, seconds)
+
+
+def fact_key(call_id: str | None, conversation_text: str) -> str | None:
+    """`call_id:transcript-hash`, or None for a call without an id (recorded as an anonymous fact)."""
+    if not call_id:
+        return None
+    digest = hashlib.sha256(normalize_transcript(conversation_text).encode("utf-8")).hexdigest()[:16]
+    return f"{call_id}:{digest}"
+
+
+def fact_from_analysis(
+    call: CallLogInput,
+    analysis: AnalysisResult,
+    conversation_text: str,
+    recorded_at: float | None = None,
+) -> Fact:
+    recorded_at = recorded_at or time.time()
+    duration = call.duration_seconds if call.duration_seconds is not None and call.duration_seconds >= 0 else None
+    call_id = analysis.call_id or call.call_id
+    return (
+        fact_key(call_id, conversation_text),
+        call_id,
+        _call_day(call.date, recorded_at),
+        _label(analysis.purpose.purpose),
+        _label(analysis.purpose.confidence),
+        _label(analysis.failure_reason.reason_category),
+        _label(analysis.action_plan.owner)[:_MAX_OWNER_LENGTH],
+        duration,
+    )
+
+
+def _percentile(counts: list[int], total: int, q: float) -> float | None:
+    """Estimate the q-th percentile from bucket counts, interpolating linearly inside the bucket."""
+    if total <= 0:
+        return None
+    rank = q / 100 * total
+    seen = 0
+    for bucket, count in enumerate(counts):
+        if not count:
+            continue
+        if seen + count >= rank:
+            low = DURATION_BUCKETS[bucket - 1] if bucket else 0
+            if bucket >= len(DURATION_BUCKETS):
+                return float(low)
+            high = DURATION_BUCKETS[bucket]
+            return round(low + (high - low) * max(0.0, rank - seen) / count, 1)
+        seen += count
+    return float(DURATION_BUCKETS[-1])
+
+
+class StatsStore:
+    """SQLite fact log and rollup tables; appends are buffered and flushed `flush_rows` at a time.
+
+    `append` never writes: it reports when the buffer is full, and the caller flushes (off the
+    event loop, see `record_analysis`).
+    """
+
+    def __init__(self, db_path: str, flush_rows: int = 256):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.flush_rows = max(1, flush_rows)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._buffer: list[Fact] = []
+        self._buffer_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self.appended = 0
+        self.flushes = 0
+
+    def append(self, fact: Fact) -> bool:
+        """Buffer one fact; True when the buffer holds `flush_rows` facts and should be flushed."""
+        with self._buffer_lock:
+            self._buffer.append(fact)
+            self.appended += 1
+            return len(self._buffer) >= self.flush_rows
+
+    def flush(self) -> int:
+        """Write buffered facts and fold them into the rollups in one transaction."""
+        with self._buffer_lock:
+            facts, self._buffer = self._buffer, []
+        if not facts:
+            return 0
+        # A call analyzed again (same id and transcript) replaces its earlier fact; within a batch the last one wins.
+        latest: dict[str, Fact] = {}
+        anonymous: list[Fact] = []
+        for fact in facts:
+            if fact[0] is None:
+                anonymous.append(fact)
+            else:
+                latest[fact[0]] = fact
+        facts = anonymous + list(latest.values())
+        now = time.time()
+        with self._db_lock, self._db:
+            replaced = self._existing_facts(latest)
+            rollup: Counter = Counter()
+            duration_calls: Counter = Counter()
+            duration_sum: Counter = Counter()
+            hist: Counter = Counter()
+            for sign, rows in ((-1, replaced), (1, facts)):
+                for _, _, day, *dims, duration in rows:
+                    key = (day, *dims)
+                    rollup[key] += sign
+                    if duration is not None:
+                        duration_calls[key] += sign
+                        duration_sum[key] += sign * duration
+                        hist[(*key, duration_bucket(duration))] += sign
+            self._db.executemany(
+                f"INSERT INTO stats_rollup (day, {_DIMS_SQL}, calls, duration_calls, duration_sum)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET calls = calls + excluded.calls,"
+                " duration_calls = duration_calls + excluded.duration_calls,"
+                " duration_sum = duration_sum + excluded.duration_sum",
+                [(*key, calls, duration_calls[key], duration_sum[key]) for key, calls in rollup.items()],
+            )
+            self._db.executemany(
+                f"INSERT INTO stats_duration_hist (day, {_DIMS_SQL}, bucket, calls) VALUES (?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT DO UPDATE SET calls = calls + excluded.calls",
+                [(*key, calls) for key, calls in hist.items()],
+            )
+            if replaced:
+                self._db.execute("DELETE FROM stats_rollup WHERE calls <= 0")
+                self._db.execute("DELETE FROM stats_duration_hist WHERE calls <= 0")
+            self._db.executemany(
+                "INSERT OR REPLACE INTO call_facts"
+                f" (fact_key, call_id, day, {_DIMS_SQL}, duration_seconds, recorded_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(*fact, now) for fact in facts],
+            )
+            self.flushes += 1
+        return len(facts)
+
+    def _existing_facts(self, facts_by_key: dict[str, Fact]) -> list[Fact]:
+        keys = list(facts_by_key)
+        existing = []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start : start + 500]
+            existing.extend(
+                self._db.execute(
+                    f"SELECT fact_key, call_id, day, {_DIMS_SQL}, duration_seconds FROM call_facts"
+                    f" WHERE fact_key IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            )
+        return existing
+
+    def query(
+        self,
+        group_by: Iterable[str] = (),
+        period: str = "all",
+        start: str | None = None,
+        end: str | None = None,
+        filters: dict[str, str] | None = None,
+        percentiles: Iterable[float] = (50, 90),
+        limit: int = 1000,
+    ) -> dict[str, Any]:
+        """Call counts and duration stats per group, aggregated from the daily rollups.
+
+        `period` buckets calls by day, ISO week (Monday), month or not at all; `start`/`end`
+        are inclusive ISO dates; `filters` match dimension values exactly (case-insensitive).
+        """
+        group_by = [dim for dim in DIMENSIONS if dim in group_by]
+        columns = ([f"{_PERIOD_SQL[period]} AS period"] if period != "all" else []) + group_by
+        keys = (["period"] if period != "all" else []) + group_by
+        where, params = [], []
+        if start:
+            where.append("day >= ?")
+            params.append(start)
+        if end:
+            where.append("day <= ?")
+            params.append(end)
+        for dim, value in (filters or {}).items():
+            if dim in DIMENSIONS and value:
+                where.append(f"{dim} = ?")
+                params.append(_label(value))
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        select_sql = ", ".join(columns + ["SUM(calls)", "SUM(duration_calls)", "SUM(duration_sum)"])
+        group_sql = f" GROUP BY {', '.join(str(i + 1) for i in range(len(keys)))}" if keys else ""
+        # Periods in chronological order, then the biggest groups first
+        order_sql = f"{'1, ' if period != 'all' else ''}{len(keys) + 1} DESC"
+        percentiles = sorted({float(q) for q in percentiles if 0 <= float(q) <= 100})
+
+        self.flush()
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT {select_sql} FROM stats_rollup{where_sql}{group_sql}"
+                f" ORDER BY {order_sql} LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+            # Over every matching call, not only the groups kept by `limit`.
+            total_calls = self._db.execute(
+                f"SELECT COALESCE(SUM(calls), 0) FROM stats_rollup{where_sql}", params
+            ).fetchone()[0]
+            hist_rows = []
+            if percentiles:
+                hist_select = ", ".join(columns + ["bucket", "SUM(calls)"])
+                hist_group = ", ".join(str(i + 1) for i in range(len(keys) + 1))
+                hist_rows = self._db.execute(
+                    f"SELECT {hist_select} FROM stats_duration_hist{where_sql} GROUP BY {hist_group}", params
+                ).fetchall()
+
+        histograms: dict[tuple, list[int]] = {}
+        for *key, bucket, calls in hist_rows:
+            counts = histograms.setdefault(tuple(key), [0] * (len(DURATION_BUCKETS) + 1))
+            counts[bucket] += calls
+        groups = []
+        for *key, calls, duration_calls, total_duration in rows:
+            if not calls:
+                continue
+            duration: dict[str, Any] = {
+                "count": duration_calls,
+                "mean": round(total_duration / duration_calls, 1) if duration_calls else None,
+            }
+            counts = histograms.get(tuple(key))
+            for q in percentiles:
+                name = f"p{q:g}".replace(".", "_")
+                duration[name] = _percentile(counts, duration_calls, q) if counts else None
+            groups.append({"key": dict(zip(keys, key)), "calls": calls, "duration_seconds": duration})
+        return {
+            "period": period,
+            "group_by": group_by,
+            "total_calls": total_calls,
+            "groups": groups,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._buffer_lock:
+            buffered = len(self._buffer)
+        with self._db_lock:
+            facts = self._db.execute("SELECT COUNT(*) FROM call_facts").fetchone()[0]
+            rollup_rows = self._db.execute("SELECT COUNT(*) FROM stats_rollup").fetchone()[0]
+        return {
+            "db_path": self.db_path,
+            "facts": facts,
+            "rollup_rows": rollup_rows,
+            "buffered": buffered,
+            "appended": self.appended,
+            "flushes": self.flushes,
+        }
+
+    def close(self) -> None:
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+
+@lru_cache
+def get_stats_store() -> StatsStore | None:
+    """Process-wide analytics store, or None when STATS_ENABLED is off."""
+    settings = get_settings()
+    if not settings.stats_enabled:
+        return None
+    return StatsStore(settings.stats_db, settings.stats_flush_rows)
+
+
+async def record_analysis(call: CallLogInput, analysis: AnalysisResult, conversation_text: str) -> None:
+    """Append one analyzed call to the analytics store (no-op when it is disabled).
+
+    A full buffer is flushed in a worker thread so the SQLite write does not block the event loop.
+    """
+    store = get_stats_store()
+    if store is not None and store.append(fact_from_analysis(call, analysis, conversation_text)):
+        await asyncio.to_thread(store.flush)
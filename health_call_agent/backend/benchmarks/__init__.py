@@ -0,0 +1 @@
+"""Benchmarks for the analysis pipeline. Run from the backend directory, e.g. `python -m benchmarks.bench_concurrency`."""
@@ -0,0 +1,60 @@
+"""Concurrency ceiling of the blocking (threadpool) path vs the async path.
+
+The blocking mode runs `run_analysis` through Starlette's threadpool, as the former
+sync `def` routes did; the async mode awaits `arun_analysis` directly.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from app.agents import arun_analysis, run_analysis
+from benchmarks.fake_llm import install_fake_llm
+
+MODELS = ["fake-model"]
+TRANSCRIPT = "customer: I want to book an appointment.\nagent: Sorry, our system is down."
+LLM_CALLS_PER_ANALYSIS = 3
+
+
+async def _run_level(mode: str, concurrency: int) -> float:
+    async def one(i: int):
+        if mode == "async":
+            return await arun_analysis(TRANSCRIPT, "fake-key", MODELS, 25, 0, call_id=f"call_{i}")
+        return await run_in_threadpool(run_analysis, TRANSCRIPT, "fake-key", MODELS, 25, 0, f"call_{i}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(concurrency)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--levels", default="10,50,100,200,400", help="Concurrent analyses to try")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    install_fake_llm(args.latency)
+    ideal = args.latency * LLM_CALLS_PER_ANALYSIS
+    results = []
+    print(f"{'mode':<10}{'concurrent':>12}{'wall_s':>10}{'calls/s':>10}{'effective':>12}")
+    for mode in ("blocking", "async"):
+        for level in (int(x) for x in args.levels.split(",")):
+            wall = asyncio.run(_run_level(mode, level))
+            # Effective concurrency: how many analyses were actually in flight on average.
+            effective = level * ideal / wall
+            results.append(
+                {"mode": mode, "concurrent": level, "wall_seconds": wall, "effective_concurrency": effective}
+            )
+            print(f"{mode:<10}{level:>12}{wall:>10.2f}{level / wall:>10.1f}{effective:>12.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"latency_seconds": args.latency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Throughput of the rule-based fast path (pre-classifier) over large synthetic batches."""
+
+import argparse
+import json
+import time
+
+from app.agents.rules import DEFAULT_RULES_PATH, RuleSet
+from app.services import conversation_to_text
+from benchmarks.synthetic import generate_calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--turns-scale", type=int, default=1, help="Pad calls with filler turns (long calls)")
+    parser.add_argument("--rules", default=str(DEFAULT_RULES_PATH))
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    rule_set = RuleSet.from_file(args.rules)
+    texts = [conversation_to_text(c["conversation"]) for c in generate_calls(args.calls, turns_scale=args.turns_scale)]
+
+    start = time.perf_counter()
+    updates = [rule_set.classify(text) for text in texts]
+    elapsed = time.perf_counter() - start
+
+    purpose = sum("purpose_result" in u for u in updates)
+    failure = sum("failure_reason_result" in u for u in updates)
+    result = {
+        "calls": args.calls,
+        "turns_scale": args.turns_scale,
+        "seconds": elapsed,
+        "calls_per_second": args.calls / elapsed,
+        "purpose_filled": purpose / args.calls,
+        "failure_reason_filled": failure / args.calls,
+        "llm_calls_avoided": purpose + failure,
+    }
+    for key, value in result.items():
+        print(f"{key:>22}: {value:.4f}" if isinstance(value, float) else f"{key:>22}: {value}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
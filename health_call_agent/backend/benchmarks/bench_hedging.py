@@ -0,0 +1,86 @@
+"""Tail latency with and without hedged model calls, against fake models with a slow tail.
+
+A share of calls (`--slow-rate`) takes `--slow-seconds` instead of `--latency`, like a Gemini
+response that hangs until close to the timeout. With hedging on, a call that outlasts the
+node's latency percentile is duplicated to the next model and the first answer wins.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from app.agents import arun_analysis, get_hedge_policy
+from app.config import get_settings
+from benchmarks.fake_llm import install_fake_llm
+
+MODELS = ["fake-model", "fake-fallback-model"]
+TRANSCRIPT = "customer: I want to book an appointment.\nagent: Sorry, our system is down."
+
+
+async def _run(calls: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await arun_analysis(TRANSCRIPT, "fake-key", MODELS, 25, 0, call_id=f"call_{i}")
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(calls)))
+    return latencies
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    return ordered[int(q / 100 * (len(ordered) - 1))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05, help="Usual fake LLM latency (seconds)")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Share of calls in the slow tail")
+    parser.add_argument("--slow-seconds", type=float, default=1.0, help="Latency of a slow call")
+    parser.add_argument("--max-rate", type=float, default=0.05, help="HEDGE_MAX_RATE")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<10}{'p50_ms':>10}{'p95_ms':>10}{'p99_ms':>10}{'mean_ms':>10}{'hedge_rate':>12}")
+    for mode in ("off", "hedged"):
+        os.environ.update(
+            HEDGE_ENABLED="true" if mode == "hedged" else "false",
+            HEDGE_MAX_RATE=str(args.max_rate),
+            HEDGE_MIN_DELAY_SECONDS="0",
+        )
+        get_settings.cache_clear()
+        get_hedge_policy.cache_clear()
+        install_fake_llm(args.latency, slow_rate=args.slow_rate, slow_seconds=args.slow_seconds)
+        latencies = sorted(asyncio.run(_run(args.calls, args.concurrency)))
+        policy = get_hedge_policy()
+        result = {
+            "mode": mode,
+            "calls": args.calls,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p95_ms": _percentile(latencies, 95) * 1000,
+            "p99_ms": _percentile(latencies, 99) * 1000,
+            "mean_ms": statistics.fmean(latencies) * 1000,
+            "hedge_rate": policy.stats()["hedge_rate"] if policy else 0.0,
+        }
+        results.append(result)
+        print(
+            f"{mode:<10}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            f"{result['mean_ms']:>10.1f}{result['hedge_rate']:>12.3f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Decode, validation and memory cost of a large batch body: pydantic models vs compact call logs.
+
+`models` is the per-object path (`json.loads`, one `CallLogInput` per call and `Message` per turn);
+`compact` is the batch endpoints' path with BATCH_COMPACT_INGEST (pydantic-core JSON parser, bulk
+validation into `CompactCall`s). Memory is what the decoded batch keeps alive (tracemalloc).
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from pydantic_core import from_json
+
+from app.schemas import CallLogInput
+from app.services import compact_call_logs, conversation_to_text
+from benchmarks.synthetic import generate_calls
+
+
+def _models(raw: bytes) -> list[CallLogInput]:
+    return [CallLogInput.model_validate(item) for item in json.loads(raw)]
+
+
+def _compact(raw: bytes) -> list[Any]:
+    return compact_call_logs(from_json(raw))
+
+
+def _render(calls: list[Any]) -> list[str]:
+    return [c.text() if hasattr(c, "text") else conversation_to_text(c.conversation) for c in calls]
+
+
+def run(name: str, decode: Callable[[bytes], list[Any]], raw: bytes) -> dict[str, Any]:
+    gc.collect()
+    start = time.perf_counter()
+    calls = decode(raw)
+    decoded = time.perf_counter()
+    _render(calls)
+    rendered = time.perf_counter()
+    del calls
+    gc.collect()
+    tracemalloc.start()
+    calls = decode(raw)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del calls
+    return {
+        "mode": name,
+        "decode_seconds": decoded - start,
+        "render_seconds": rendered - decoded,
+        "retained_mb": retained / 1e6,
+        "peak_mb": peak / 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--turns-scale", type=int, default=2, help="Pad calls with filler turns (long calls)")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    raw = json.dumps(list(generate_calls(args.calls, turns_scale=args.turns_scale))).encode()
+    results = [run("models", _models, raw), run("compact", _compact, raw)]
+    print(f"{args.calls} calls, {len(raw) / 1e6:.1f} MB body")
+    print(f"{'mode':<10}{'decode_s':>10}{'render_s':>10}{'retained_mb':>13}{'peak_mb':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:<10}{r['decode_seconds']:>10.3f}{r['render_seconds']:>10.3f}"
+            f"{r['retained_mb']:>13.1f}{r['peak_mb']:>10.1f}"
+        )
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"calls": args.calls, "body_bytes": len(raw), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Micro-benchmarks for the analysis pipeline on the fake LLM.
+
+Measures per-node latency, `arun_analysis` / `get_analysis_graph` overhead, response
+parsing, transcript rendering and pydantic validation. Results are written as JSON;
+pass `--baseline` with an earlier results file to flag regressions.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Callable
+
+from app.agents import arun_analysis, get_analysis_graph, get_cached_graph, get_model_router
+from app.agents.graph import PIPELINE_FUSED, PIPELINE_PARALLEL
+from app.agents.repair import parse_json_response
+from app.agents.nodes import (
+    analyze_failure_reason,
+    classify_purpose,
+    fused_analysis,
+    generate_action_plan,
+    pre_classify,
+)
+from app.schemas import AnalysisResult, CallLogInput
+from app.services import compact_conversation, conversation_to_text
+from benchmarks.fake_llm import CANNED_RESPONSES, install_fake_llm
+from benchmarks.synthetic import generate_calls
+
+MODELS = ["fake-model", "fake-fallback-model"]
+NODE_ARGS = ("fake-key", MODELS, 25, 0)
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_seconds: float) -> dict[str, float]:
+    """Median / min time per call over `repeat` rounds of an auto-sized loop (like timeit)."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds or loops >= 1_000_000:
+            break
+        loops *= 10 if elapsed < min_seconds / 10 else 2
+    rounds = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append((time.perf_counter() - start) / loops)
+    return {
+        "median_us": statistics.median(rounds) * 1e6,
+        "min_us": min(rounds) * 1e6,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def build_cases(turns_scale: int) -> dict[str, Callable[[], Any]]:
+    short_call = next(generate_calls(1, seed=1))
+    long_call = next(generate_calls(1, seed=1, turns_scale=turns_scale))
+    short_text = conversation_to_text(short_call["conversation"])
+    state = {"conversation_text": short_text, "call_id": "bench"}
+    loop = asyncio.new_event_loop()
+    run = loop.run_until_complete
+    purpose_state = {**state, **run(classify_purpose(state, *NODE_ARGS))}
+    failure_state = {**purpose_state, **run(analyze_failure_reason(purpose_state, *NODE_ARGS))}
+    fenced = "```json\n" + json.dumps(CANNED_RESPONSES[next(iter(CANNED_RESPONSES))]) + "\n```"
+    malformed = "Here you go: " + json.dumps(CANNED_RESPONSES[next(iter(CANNED_RESPONSES))])[:-1] + ",}"
+    result = run(arun_analysis(short_text, *NODE_ARGS))
+    result_payload = {key: result[key] for key in ("purpose", "failure_reason", "action_plan", "meta")}
+
+    return {
+        "node.pre_classify": lambda: pre_classify(state),
+        "node.classify_purpose": lambda: run(classify_purpose(state, *NODE_ARGS)),
+        "node.analyze_failure_reason": lambda: run(analyze_failure_reason(purpose_state, *NODE_ARGS)),
+        "node.generate_action_plan": lambda: run(generate_action_plan(failure_state, *NODE_ARGS)),
+        "node.fused_analysis": lambda: run(fused_analysis(state, *NODE_ARGS)),
+        "graph.build": lambda: get_analysis_graph(*NODE_ARGS),
+        "graph.cached_lookup": lambda: get_cached_graph(*NODE_ARGS),
+        "arun_analysis.graph": lambda: run(arun_analysis(short_text, *NODE_ARGS)),
+        "arun_analysis.fused": lambda: run(arun_analysis(short_text, *NODE_ARGS, pipeline=PIPELINE_FUSED)),
+        "arun_analysis.parallel": lambda: run(arun_analysis(short_text, *NODE_ARGS, pipeline=PIPELINE_PARALLEL)),
+        "parse_json.fenced": lambda: parse_json_response(fenced),
+        "parse_json.repair": lambda: parse_json_response(malformed),
+        "conversation_to_text.short": lambda: conversation_to_text(short_call["conversation"]),
+        "conversation_to_text.long": lambda: conversation_to_text(long_call["conversation"]),
+        "compact_conversation.long": lambda: compact_conversation(long_call["conversation"], 4000),
+        "pydantic.call_log_input.long": lambda: CallLogInput.model_validate(long_call),
+        "pydantic.analysis_result": lambda: AnalysisResult.model_validate(result_payload),
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """Names of benchmarks whose median got slower than `threshold` x the baseline."""
+    regressions = []
+    print(f"\n{'benchmark':<32}{'baseline_us':>14}{'current_us':>14}{'ratio':>8}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratio = current["median_us"] / previous["median_us"] if previous["median_us"] else 1.0
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:<32}{previous['median_us']:>14.2f}{current['median_us']:>14.2f}{ratio:>8.2f}{flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM latency per call (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM calls failing with 429")
+    parser.add_argument("--turns-scale", type=int, default=40, help="Filler turns per turn for the long call")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-seconds", type=float, default=0.2, help="Minimum time per round")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    # Injected failures only hit the first model, so every call still succeeds through the fallback.
+    install_fake_llm(args.latency, model_error_rate={MODELS[0]: args.error_rate})
+    get_model_router().adaptive = False
+    cases = build_cases(args.turns_scale)
+
+    results: dict[str, Any] = {}
+    print(f"{'benchmark':<32}{'median_us':>14}{'min_us':>14}{'loops':>10}")
+    for name, fn in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn, args.repeat, args.min_seconds)
+        r = results[name]
+        print(f"{name:<32}{r['median_us']:>14.2f}{r['min_us']:>14.2f}{r['loops']:>10}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "latency_seconds": args.latency,
+        "error_rate": args.error_rate,
+        "turns_scale": args.turns_scale,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Pipeline runs avoided by the near-duplicate cache on templated synthetic calls.
+
+Synthetic calls are seed calls with names and numbers varied, so the exact content cache
+misses almost all of them. With SIMILAR_CACHE_ENABLED, a call whose MinHash similarity to an
+already analyzed call reaches `--threshold` reuses that call's analysis.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services import analyze_call, get_analysis_cache, get_similarity_index
+from benchmarks.fake_llm import install_fake_llm
+from benchmarks.synthetic import generate_calls
+
+
+async def _run(calls: list[CallLogInput]) -> tuple[int, int]:
+    exact = similar = 0
+    for call in calls:
+        meta = (await analyze_call(call)).meta
+        if meta.cached and meta.similarity is None:
+            exact += 1
+        elif meta.similarity is not None:
+            similar += 1
+    return exact, similar
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake LLM latency (seconds)")
+    parser.add_argument("--threshold", type=float, default=0.9, help="SIMILAR_CACHE_THRESHOLD")
+    parser.add_argument("--max-entries", type=int, default=10000, help="SIMILAR_CACHE_MAX_ENTRIES")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    calls = [CallLogInput.model_validate(c) for c in generate_calls(args.calls)]
+    results = []
+    print(f"{'mode':<10}{'exact_hits':>12}{'similar_hits':>14}{'pipeline_runs':>15}{'seconds':>10}{'index_kb':>10}")
+    for mode in ("exact", "similar"):
+        os.environ.update(
+            ANALYSIS_CACHE_DB="",
+            ANALYSIS_CACHE_MAX_ENTRIES=str(args.calls),
+            SIMILAR_CACHE_ENABLED="true" if mode == "similar" else "false",
+            SIMILAR_CACHE_THRESHOLD=str(args.threshold),
+            SIMILAR_CACHE_MAX_ENTRIES=str(args.max_entries),
+            STATS_ENABLED="false",
+        )
+        get_settings.cache_clear()
+        get_analysis_cache.cache_clear()
+        get_similarity_index.cache_clear()
+        install_fake_llm(args.latency)
+        start = time.perf_counter()
+        exact, similar = asyncio.run(_run(calls))
+        elapsed = time.perf_counter() - start
+        index = get_similarity_index()
+        result = {
+            "mode": mode,
+            "calls": args.calls,
+            "exact_hits": exact,
+            "similar_hits": similar,
+            "pipeline_runs": args.calls - exact - similar,
+            "seconds": elapsed,
+            "index": index.stats() if index else None,
+        }
+        results.append(result)
+        index_kb = result["index"]["signature_bytes"] / 1024 if index else 0.0
+        print(
+            f"{mode:<10}{exact:>12}{similar:>14}{result['pipeline_runs']:>15}{elapsed:>10.2f}{index_kb:>10.1f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
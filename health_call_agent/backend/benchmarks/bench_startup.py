@@ -0,0 +1,138 @@
+"""Startup cost of the backend: module import time and time until the server answers.
+
+Each measurement runs in a fresh interpreter. `import.*` is the time to import a module
+(interpreter startup excluded); `server.first_health` is the time from spawning uvicorn until
+`/api/health` returns 200, and `server.ready` until `/api/ready` does (graph compiled, Gemini
+clients created). Results use the `bench_pipeline` JSON layout, so `--baseline` flags regressions.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any
+
+from benchmarks.bench_pipeline import compare
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+IMPORTS = ("app.main", "app.cli", "app.agents.graph")
+
+
+def _env(data_dir: str) -> dict[str, str]:
+    """Dummy key so warmup creates clients; all SQLite files go to a scratch directory."""
+    env = dict(os.environ)
+    env.update(
+        GOOGLE_API_KEY=env.get("GOOGLE_API_KEY") or "bench-key",
+        JOBS_DB=os.path.join(data_dir, "jobs.sqlite3"),
+        STATS_DB=os.path.join(data_dir, "stats.sqlite3"),
+        GRAPH_CHECKPOINT_DB=os.path.join(data_dir, "checkpoints.sqlite3"),
+    )
+    return env
+
+
+def import_seconds(module: str, env: dict[str, str]) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} did not return 200 in time")
+
+
+def server_seconds(env: dict[str, str], timeout: float) -> tuple[float, float]:
+    """(seconds until /api/health is 200, seconds until /api/ready is 200) for a fresh uvicorn."""
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        health = _wait_for(f"{base}/api/health", started + timeout) - started
+        ready = _wait_for(f"{base}/api/ready", started + timeout) - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return health, ready
+
+
+def _summary(samples: list[float]) -> dict[str, Any]:
+    return {
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "loops": 1,
+        "repeat": len(samples),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for the server")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    samples: dict[str, list[float]] = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = _env(data_dir)
+        for _ in range(args.repeat):
+            for module in IMPORTS:
+                samples.setdefault(f"import.{module}", []).append(import_seconds(module, env))
+            health, ready = server_seconds(env, args.timeout)
+            samples.setdefault("server.first_health", []).append(health)
+            samples.setdefault("server.ready", []).append(ready)
+
+    results = {name: _summary(values) for name, values in samples.items()}
+    print(f"{'benchmark':<32}{'median_ms':>12}{'min_ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<32}{r['median_us'] / 1000:>12.1f}{r['min_us'] / 1000:>12.1f}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
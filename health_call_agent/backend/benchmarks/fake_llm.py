@@ -0,0 +1,137 @@
+"""Deterministic local stand-in for ChatGoogleGenerativeAI used by benchmarks."""
+
+import asyncio
+import json
+import random
+import time
+from typing import Any
+
+from app.agents.clients import get_client_pool
+from app.agents.prompts import (
+    PURPOSE_CLASSIFY_SYSTEM,
+    FAILURE_REASON_SYSTEM,
+    SPECULATIVE_FAILURE_SYSTEM,
+    ACTION_PLAN_SYSTEM,
+    FUSED_ANALYSIS_SYSTEM,
+)
+
+CANNED_RESPONSES: dict[str, dict[str, Any]] = {
+    PURPOSE_CLASSIFY_SYSTEM: {
+        "purpose": "booking",
+        "confidence": "high",
+        "summary": "Customer tried to book an appointment.",
+    },
+    FAILURE_REASON_SYSTEM: {
+        "reason_category": "system_failure",
+        "explanation": "The booking system was down during the call.",
+        "evidence": ["our system is down at the moment"],
+        "recommendation": "Offer a manual booking fallback.",
+    },
+    ACTION_PLAN_SYSTEM: {
+        "goal": "Book the customer's appointment.",
+        "steps": ["Call the customer back", "Book the slot manually", "Send confirmation"],
+        "owner": "Front desk",
+        "success_criteria": "Appointment confirmed in the system.",
+    },
+}
+
+CANNED_RESPONSES[SPECULATIVE_FAILURE_SYSTEM] = {
+    "purpose": CANNED_RESPONSES[PURPOSE_CLASSIFY_SYSTEM]["purpose"],
+    **CANNED_RESPONSES[FAILURE_REASON_SYSTEM],
+}
+CANNED_RESPONSES[FUSED_ANALYSIS_SYSTEM] = {
+    "purpose": CANNED_RESPONSES[PURPOSE_CLASSIFY_SYSTEM],
+    "failure_reason": CANNED_RESPONSES[FAILURE_REASON_SYSTEM],
+    "action_plan": CANNED_RESPONSES[ACTION_PLAN_SYSTEM],
+}
+
+
+class FakeResponse:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class FakeQuotaError(Exception):
+    """Looks like a Gemini quota error, so the node fallback moves to the next model."""
+
+
+class FakeChatModel:
+    """Returns canned JSON for each node's system prompt after a fixed delay.
+
+    With `error_rate` > 0 a share of calls fails with a 429 after the delay; with `slow_rate` > 0
+    a share of calls takes `slow_seconds` instead of the usual latency (a latency tail).
+    """
+
+    def __init__(
+        self,
+        model_name: str = "fake-model",
+        latency_seconds: float = 0.0,
+        error_rate: float = 0.0,
+        rng: random.Random | None = None,
+        slow_rate: float = 0.0,
+        slow_seconds: float = 0.0,
+    ):
+        self.model_name = model_name
+        self.latency_seconds = latency_seconds
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_seconds = slow_seconds
+        self._rng = rng or random.Random(0)
+        self.calls = 0
+
+    def _latency(self) -> float:
+        if self.slow_rate and self._rng.random() < self.slow_rate:
+            return self.slow_seconds
+        return self.latency_seconds
+
+    def _respond(self, messages: list) -> FakeResponse:
+        self.calls += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise FakeQuotaError(f"429 RESOURCE_EXHAUSTED: quota exceeded for {self.model_name}")
+        system_prompt = messages[0].content if messages else ""
+        data = CANNED_RESPONSES.get(system_prompt, CANNED_RESPONSES[PURPOSE_CLASSIFY_SYSTEM])
+        return FakeResponse("```json\n" + json.dumps(data) + "\n```")
+
+    def invoke(self, messages: list) -> FakeResponse:
+        latency = self._latency()
+        if latency:
+            time.sleep(latency)
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: list) -> FakeResponse:
+        latency = self._latency()
+        if latency:
+            await asyncio.sleep(latency)
+        return self._respond(messages)
+
+
+def install_fake_llm(
+    latency_seconds: float = 0.0,
+    *,
+    model_latency: dict[str, float] | None = None,
+    model_error_rate: dict[str, float] | None = None,
+    error_rate: float = 0.0,
+    slow_rate: float = 0.0,
+    slow_seconds: float = 0.0,
+    seed: int = 0,
+) -> None:
+    """Swap the pooled Gemini clients for fake models with the given latency.
+
+    `model_latency` / `model_error_rate` override the defaults per model name; `slow_rate`
+    of the calls take `slow_seconds`.
+    """
+    model_latency = model_latency or {}
+    model_error_rate = model_error_rate or {}
+    rng = random.Random(seed)
+
+    def factory(api_key: str, model_name: str, timeout_seconds: int, max_retries: int) -> FakeChatModel:
+        return FakeChatModel(
+            model_name,
+            model_latency.get(model_name, latency_seconds),
+            model_error_rate.get(model_name, error_rate),
+            rng,
+            slow_rate,
+            slow_seconds,
+        )
+
+    get_client_pool().reset(factory=factory)
@@ -0,0 +1,56 @@
+"""Synthetic call logs seeded from data/sample_calls.json, for benchmarks."""
+
+import json
+import random
+import re
+from pathlib import Path
+from typing import Any, Iterator
+
+SAMPLE_CALLS_PATH = Path(__file__).resolve().parents[2] / "data" / "sample_calls.json"
+
+_NAMES = ["Rahul Kumar", "Priya Singh", "Anita Rao", "John Mathew", "Fatima Khan", "Arjun Mehta", "Meera Iyer"]
+_NAME_PATTERN = re.compile(r"\b(?:Rahul Kumar|Priya(?: Singh)?|Dr\. [A-Z][a-z]+)\b")
+_FILLER_TURNS = [
+    ("agent", "Okay, let me check that for you."),
+    ("customer", "Sure."),
+    ("agent", "Thank you for your patience."),
+    ("customer", "Could you repeat that, please?"),
+    ("agent", "Just to confirm, you said the same details as before?"),
+    ("customer", "Yes, that's right."),
+]
+
+
+def load_seed_calls(path: str | Path = SAMPLE_CALLS_PATH) -> list[dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _vary(content: str, rng: random.Random) -> str:
+    content = _NAME_PATTERN.sub(lambda m: rng.choice(_NAMES), content)
+    return re.sub(r"\d+", lambda m: str(rng.randint(1, 28)), content)
+
+
+def generate_calls(
+    count: int,
+    seed: int = 0,
+    turns_scale: int = 1,
+    seed_calls: list[dict[str, Any]] | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield `count` call logs; `turns_scale` > 1 pads each call with filler turns to make long calls."""
+    rng = random.Random(seed)
+    seeds = seed_calls or load_seed_calls()
+    for i in range(count):
+        base = rng.choice(seeds)
+        conversation = []
+        for message in base["conversation"]:
+            conversation.append({"role": message["role"], "content": _vary(message["content"], rng)})
+            for _ in range(turns_scale - 1):
+                role, content = rng.choice(_FILLER_TURNS)
+                conversation.append({"role": role, "content": content})
+        yield {
+            "call_id": f"synthetic_{i:06d}",
+            "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "duration_seconds": len(conversation) * rng.randint(10, 30),
+            "participants": list(base.get("participants", [])),
+            "conversation": conversation,
+        }
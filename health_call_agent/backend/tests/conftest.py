@@ -0,0 +1,66 @@
+"""Shared fixtures: isolated settings and singletons per test, and the benchmark fake LLM."""
+
+import pytest
+
+from app.agents import close_graph_registry, get_client_pool, get_hedge_policy, get_model_router, get_rate_limiter
+from app.agents.rules import get_rule_set
+from app.config import get_settings
+from app.services import get_analysis_cache, get_job_queue, get_similarity_index, get_single_flight, get_stats_store
+from benchmarks.fake_llm import FakeChatModel, install_fake_llm
+
+_SINGLETONS = (
+    get_settings,
+    get_client_pool,
+    get_model_router,
+    get_rate_limiter,
+    get_hedge_policy,
+    get_rule_set,
+    get_analysis_cache,
+    get_single_flight,
+    get_similarity_index,
+    get_stats_store,
+    get_job_queue,
+)
+
+
+def _reset_singletons() -> None:
+    close_graph_registry()
+    for getter in (get_analysis_cache, get_stats_store):
+        if getter.cache_info().currsize:
+            store = getter()
+            if store is not None:
+                store.close()
+    if get_job_queue.cache_info().currsize:
+        queue = get_job_queue()
+        if queue is not None:
+            queue.store.close()
+    for getter in _SINGLETONS:
+        getter.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def settings_env(tmp_path, monkeypatch):
+    """Point every SQLite file at a temporary DATA_DIR and rebuild the process-wide singletons."""
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setenv("GEMINI_MODELS", "fake-a,fake-b")
+    monkeypatch.setenv("GEMINI_MAX_RETRIES", "0")
+    monkeypatch.setenv("ANALYSIS_CACHE_DB", "")
+    _reset_singletons()
+    yield tmp_path
+    _reset_singletons()
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Install the deterministic fake model; returns the list of system prompts it is called with."""
+    calls: list[str] = []
+    respond = FakeChatModel._respond
+
+    def recording_respond(self, messages):
+        calls.append(messages[0].content if messages else "")
+        return respond(self, messages)
+
+    monkeypatch.setattr(FakeChatModel, "_respond", recording_respond)
+    install_fake_llm(0.0)
+    return calls
@@ -0,0 +1,81 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.fake_llm import FakeChatModel
+
+CALL = {"call_id": "c1", "conversation": [{"role": "customer", "content": "I want to book an appointment."}]}
+
+
+@pytest.fixture
+def client(fake_llm):
+    # No `with`: the lifespan (warm-up, job workers) is not needed for these routes.
+    return TestClient(app)
+
+
+def parse_sse(body: str) -> list[tuple[str, dict]]:
+    assert body.endswith("\n\n")
+    events = []
+    for block in body.split("\n\n")[:-1]:
+        lines = block.split("\n")
+        assert len(lines) == 2 and lines[0].startswith("event: ") and lines[1].startswith("data: ")
+        events.append((lines[0][len("event: ") :], json.loads(lines[1][len("data: ") :])))
+    return events
+
+
+def test_batch_streams_one_ndjson_line_per_call(client):
+    body = "\n".join(
+        [json.dumps(CALL), "{not json", json.dumps({"conversation": CALL["conversation"]}), json.dumps({"x": 1})]
+    )
+    response = client.post("/api/analyze-batch", content=body, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == [0, 1, 2, 3]
+    assert by_index[0]["status"] == "ok" and by_index[0]["call_id"] == "c1"
+    assert by_index[0]["result"]["purpose"]["purpose"] == "booking"
+    assert by_index[1]["status"] == "error" and "Line 2" in by_index[1]["error"]
+    # Calls without an id are numbered by position.
+    assert by_index[2]["status"] == "ok" and by_index[2]["call_id"] == "call_3"
+    assert by_index[3]["status"] == "error" and by_index[3]["result"] is None
+
+
+def test_batch_accepts_a_json_array(client):
+    response = client.post("/api/analyze-batch", json=[CALL, {**CALL, "call_id": "c2"}])
+    assert sorted(json.loads(line)["call_id"] for line in response.text.splitlines()) == ["c1", "c2"]
+
+
+def test_batch_rejects_malformed_array(client):
+    response = client.post("/api/analyze-batch", content="[{", headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_stream_sends_each_stage_then_done(client):
+    response = client.post("/api/analyze-stream", json=CALL)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    events = parse_sse(response.text)
+    assert [name for name, _ in events] == ["purpose", "failure_reason", "action_plan", "done"]
+    assert all(data["call_id"] == "c1" and "elapsed_ms" in data for _, data in events)
+    assert events[0][1]["result"]["purpose"] == "booking"
+    assert events[-1][1]["meta"]["cached"] is False
+
+    # A second request is served from the cache, with the same framing.
+    cached = parse_sse(client.post("/api/analyze-stream", json=CALL).text)
+    assert [name for name, _ in cached] == ["purpose", "failure_reason", "action_plan", "done"]
+    assert cached[-1][1]["meta"]["cached"] is True
+
+
+def test_stream_reports_failures_as_an_error_event(client, monkeypatch):
+    def fail(self, messages):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(FakeChatModel, "_respond", fail)
+    events = parse_sse(client.post("/api/analyze-stream", json=CALL).text)
+    assert events[-1][0] == "error"
+    assert events[-1][1]["detail"].startswith("Analysis failed.")
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services import analyze_call, get_analysis_cache
+from app.services import cache as cache_module
+from app.services.cache import AnalysisCache, cache_key
+
+RESULT = {"purpose": {"purpose": "booking"}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+
+def test_key_ignores_formatting_but_not_models_or_options():
+    base = cache_key("agent: hi\ncustomer:  hello", ["m1"], "v1")
+    assert cache_key("  agent:   hi\n\n customer: hello  ", ["m1"], "v1") == base
+    assert cache_key("agent: hi\ncustomer: hello!", ["m1"], "v1") != base
+    assert cache_key("agent: hi\ncustomer: hello", ["m2"], "v1") != base
+    assert cache_key("agent: hi\ncustomer: hello", ["m1"], "v2") != base
+    assert cache_key("agent: hi\ncustomer: hello", ["m1"], "v1", "fused") != base
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalysisCache(max_entries=2)
+    cache.set("a", RESULT)
+    cache.set("b", RESULT)
+    cache.get("a")
+    cache.set("c", RESULT)
+    assert cache.get("b") is None
+    assert cache.get("a") == RESULT and cache.get("c") == RESULT
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = AnalysisCache(ttl_seconds=60)
+    cache.set("a", RESULT)
+    clock.now += 60
+    assert cache.get("a") == RESULT
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["entries"] == 0
+
+
+def test_sqlite_tier_survives_restart(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(max_entries=1, db_path=path)
+    cache.set("a", RESULT)
+    cache.set("b", {"other": 1})
+    # "a" left memory but is still on disk.
+    assert cache.get("a") == RESULT
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    restarted = AnalysisCache(db_path=path)
+    assert restarted.get("b") == {"other": 1}
+    assert restarted.get("b") == {"other": 1}
+    assert (restarted.stats()["disk_hits"], restarted.stats()["memory_hits"]) == (1, 1)
+    restarted.close()
+
+
+def test_expired_disk_entries_are_deleted(tmp_path, clock):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = AnalysisCache(ttl_seconds=60, db_path=path)
+    cache.set("a", RESULT)
+    cache.close()
+    clock.now += 61
+    restarted = AnalysisCache(ttl_seconds=60, db_path=path)
+    assert restarted.get("a") is None
+    assert restarted.stats()["expirations"] == 1
+    assert restarted._db.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] == 0
+    restarted.close()
+
+
+def test_zero_ttl_never_expires(clock):
+    cache = AnalysisCache(ttl_seconds=0)
+    cache.set("a", RESULT)
+    clock.now += 10**9
+    assert cache.get("a") == RESULT
+
+
+def test_analyze_call_is_served_from_the_cache(fake_llm, monkeypatch, tmp_path):
+    monkeypatch.setenv("ANALYSIS_CACHE_DB", str(tmp_path / "cache.sqlite3"))
+    get_settings.cache_clear()
+    call = CallLogInput.model_validate(
+        {"call_id": "c1", "conversation": [{"role": "customer", "content": "I want to book a visit."}]}
+    )
+
+    async def scenario():
+        first = await analyze_call(call)
+        second = await analyze_call(call.model_copy(update={"call_id": "c2"}))
+        refreshed = await analyze_call(call, bypass_cache=True)
+        return first, second, refreshed
+
+    first, second, refreshed = asyncio.run(scenario())
+    assert len(fake_llm) == 6
+    assert not first.meta.cached and second.meta.cached and not refreshed.meta.cached
+    assert second.call_id == "c2"
+    assert get_analysis_cache().stats()["persistent"] is True
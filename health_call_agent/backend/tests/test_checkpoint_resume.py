@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.agents import arun_analysis
+from app.agents.prompts import ACTION_PLAN_SYSTEM, FAILURE_REASON_SYSTEM, PURPOSE_CLASSIFY_SYSTEM
+from app.config import get_settings
+from benchmarks.fake_llm import FakeChatModel
+
+ARGS = ("test-key", ["fake-a", "fake-b"], 25, 0)
+TEXT = "customer: I want to book an appointment.\nagent: Our system is down at the moment."
+
+
+@pytest.fixture
+def failing_action_plan(fake_llm, monkeypatch):
+    """Make the action plan node fail on every model until `failing["on"]` is cleared."""
+    failing = {"on": True}
+    respond = FakeChatModel._respond
+
+    def maybe_fail(self, messages):
+        if failing["on"] and messages[0].content == ACTION_PLAN_SYSTEM:
+            raise RuntimeError("action plan unavailable")
+        return respond(self, messages)
+
+    monkeypatch.setattr(FakeChatModel, "_respond", maybe_fail)
+    return failing
+
+
+@pytest.mark.parametrize("checkpointer", ["memory", "sqlite"])
+def test_failed_call_resumes_from_its_last_node(monkeypatch, fake_llm, failing_action_plan, checkpointer):
+    monkeypatch.setenv("GRAPH_CHECKPOINTER", checkpointer)
+    get_settings.cache_clear()
+
+    with pytest.raises(Exception, match="action plan unavailable"):
+        asyncio.run(arun_analysis(TEXT, *ARGS, call_id="call-1"))
+    assert fake_llm.count(PURPOSE_CLASSIFY_SYSTEM) == 1
+    assert fake_llm.count(FAILURE_REASON_SYSTEM) == 1
+
+    failing_action_plan["on"] = False
+    fake_llm.clear()
+    # A new event loop, as for a retried request: only the action plan node runs again.
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, call_id="call-1"))
+    assert fake_llm == [ACTION_PLAN_SYSTEM]
+    assert result["meta"]["resumed"] is True
+    assert result["purpose"]["purpose"] == "booking"
+
+    # The finished thread is dropped, so the same call_id runs from scratch next time.
+    fake_llm.clear()
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, call_id="call-1"))
+    assert len(fake_llm) == 3
+    assert result["meta"]["resumed"] is False
+
+
+def test_other_call_ids_do_not_resume(fake_llm, failing_action_plan):
+    with pytest.raises(Exception):
+        asyncio.run(arun_analysis(TEXT, *ARGS, call_id="call-1"))
+    failing_action_plan["on"] = False
+    fake_llm.clear()
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, call_id="call-2"))
+    assert len(fake_llm) == 3
+    assert result["meta"]["resumed"] is False
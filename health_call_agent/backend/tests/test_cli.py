@@ -0,0 +1,75 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from app import cli
+from app.services.ingest import iter_call_logs
+
+CONVERSATION = [{"role": "customer", "content": "I want to book an appointment."}]
+
+
+def write_jsonl(path, lines: list) -> None:
+    path.write_text("".join((line if isinstance(line, str) else json.dumps(line)) + "\n" for line in lines))
+
+
+def read_jsonl(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def run(*argv: str) -> dict[str, int]:
+    args = cli._build_parser().parse_args(["analyze", *argv, "--progress-every", "0"])
+    return asyncio.run(cli.analyze_archive(args))
+
+
+def test_jsonl_run_checkpoints_and_resumes(fake_llm, tmp_path):
+    source = tmp_path / "calls.jsonl"
+    output = tmp_path / "results.jsonl"
+    write_jsonl(source, [{"call_id": "a", "conversation": CONVERSATION}, {"conversation": CONVERSATION}])
+    assert run(str(source), "-o", str(output)) == {"ok": 2, "error": 0, "skipped": 0}
+    assert [row["call_id"] for row in read_jsonl(output)] == ["a", "call_2"]
+    assert (tmp_path / "results.jsonl.checkpoint").read_text().split() == ["a", "call_2"]
+    calls = len(fake_llm)
+
+    assert run(str(source), "-o", str(output)) == {"ok": 0, "error": 0, "skipped": 2}
+    assert len(fake_llm) == calls
+    assert len(read_jsonl(output)) == 2
+
+
+def test_failed_records_keep_their_position_ids_after_a_resume(fake_llm, tmp_path):
+    source = tmp_path / "calls.jsonl"
+    output = tmp_path / "results.jsonl"
+    write_jsonl(source, [{"call_id": "a", "conversation": CONVERSATION}, "{not json", 42, {"conversation": CONVERSATION}])
+    first = run(str(source), "-o", str(output))
+    second = run(str(source), "-o", str(output))
+    assert first == {"ok": 2, "error": 2, "skipped": 0}
+    assert second == {"ok": 0, "error": 2, "skipped": 2}
+    errors = read_jsonl(tmp_path / "results.jsonl.errors.jsonl")
+    assert [e["call_id"] for e in errors] == ["call_2", "call_3", "call_2", "call_3"]
+    assert [row["call_id"] for row in read_jsonl(output)] == ["a", "call_4"]
+
+
+def test_forced_jsonl_reads_lines_that_start_with_a_bracket():
+    assert list(iter_call_logs(io.StringIO('[1, 2]\n[3]\n'), jsonl=True)) == [[1, 2], [3]]
+    assert list(iter_call_logs(io.StringIO('[{"a": 1}, {"a": 2}]'))) == [{"a": 1}, {"a": 2}]
+    assert list(iter_call_logs(io.StringIO('{"a": 1} {"a": 2}'), jsonl=False)) == [{"a": 1}, {"a": 2}]
+
+
+def test_parquet_parts_are_checkpointed_when_closed(fake_llm, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    source = tmp_path / "calls.json"
+    output = tmp_path / "results"
+    source.write_text(json.dumps([{"call_id": f"c{i}", "conversation": CONVERSATION} for i in range(5)]))
+    argv = (str(source), "-o", str(output), "--flush-rows", "1", "--rows-per-file", "2")
+    assert run(*argv) == {"ok": 5, "error": 0, "skipped": 0}
+    parts = sorted(output.glob("part-*.parquet"))
+    assert [p.name for p in parts] == ["part-00000.parquet", "part-00001.parquet", "part-00002.parquet"]
+    assert not list(output.glob("*.tmp"))
+    table = pq.read_table(output)
+    assert sorted(table.column("call_id").to_pylist()) == [f"c{i}" for i in range(5)]
+    assert set(table.column("purpose").to_pylist()) == {"booking"}
+    assert sorted((tmp_path / "results.checkpoint").read_text().split()) == [f"c{i}" for i in range(5)]
+
+    assert run(*argv) == {"ok": 0, "error": 0, "skipped": 5}
+    assert len(list(output.glob("part-*.parquet"))) == 3
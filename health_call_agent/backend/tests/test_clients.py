@@ -0,0 +1,105 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.agents.clients import LLMClientPool
+
+
+class Client:
+    def __init__(self, model_name, timeout_seconds):
+        self.model_name = model_name
+        self.timeout_seconds = timeout_seconds
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+def factory(api_key, model_name, timeout_seconds, max_retries):
+    return Client(model_name, timeout_seconds)
+
+
+def test_clients_are_keyed_by_model_key_timeout_and_retries():
+    pool = LLMClientPool(factory)
+    first = pool.get("key", "m1", 25, 1)
+    assert pool.get("key", "m1", 25, 1) is first
+    assert pool.get("key", "m1", 10, 1) is not first
+    assert pool.get("other-key", "m1", 25, 1) is not first
+    assert pool.get("key", "m2", 25, 1) is not first
+    stats = pool.stats()
+    assert stats["clients"] == 4
+    assert stats["created"] == 4 and stats["reused"] == 1
+    assert stats["uses"] == {"m1": 4, "m2": 1}
+
+
+def test_concurrent_gets_create_one_client_and_count_every_use():
+    pool = LLMClientPool(factory)
+    with ThreadPoolExecutor(8) as executor:
+        clients = list(executor.map(lambda _: pool.get("key", "m1", 25, 1), range(400)))
+    assert len({id(client) for client in clients}) == 1
+    assert pool.stats()["uses"] == {"m1": 400}
+    assert pool.stats()["created"] == 1
+
+
+def test_warm_creates_clients_without_counting_uses():
+    def flaky_factory(api_key, model_name, timeout_seconds, max_retries):
+        if model_name == "broken":
+            raise ValueError("unknown model")
+        return factory(api_key, model_name, timeout_seconds, max_retries)
+
+    pool = LLMClientPool(flaky_factory)
+    assert pool.warm("key", ["m1", "broken", "m2"], 25, 1) == ["m1", "m2"]
+    assert pool.stats()["uses"] == {}
+    pool.get("key", "m1", 25, 1)
+    assert pool.stats()["created"] == 2
+
+
+def test_reset_drops_clients_and_switches_factory():
+    pool = LLMClientPool(factory)
+    before = pool.get("key", "m1", 25, 1)
+    pool.reset(factory=lambda *args: "replacement")
+    assert pool.stats()["clients"] == 0 and pool.stats()["uses"] == {}
+    assert pool.get("key", "m1", 25, 1) == "replacement"
+    assert before.closed is False
+
+
+def test_awarm_connections_looks_up_each_model_on_the_async_client():
+    looked_up = []
+
+    class Models:
+        async def get(self, model):
+            looked_up.append(model)
+
+    class GenAIClient(Client):
+        @property
+        def async_client(self):
+            return type("Aio", (), {"models": Models()})()
+
+    pool = LLMClientPool(lambda key, model, timeout, retries: GenAIClient(model, timeout))
+    connected = asyncio.run(pool.awarm_connections("key", ["m1", "m2"], 25, 1))
+    assert connected == looked_up == ["m1", "m2"]
+    assert pool.stats()["connected"] == ["m1", "m2"]
+
+
+def test_awarm_connections_skips_clients_without_a_transport():
+    pool = LLMClientPool(factory)
+    assert asyncio.run(pool.awarm_connections("key", ["m1"], 25, 1)) == []
+    assert pool.stats()["clients"] == 1
+
+
+def test_aclose_closes_clients_and_legacy_transports():
+    class Transport:
+        closed = False
+
+        def close(self):
+            Transport.closed = True
+
+    class LegacyClient:
+        client = type("Service", (), {"transport": Transport()})()
+
+    clients = {"m1": Client("m1", 25), "legacy": LegacyClient()}
+    pool = LLMClientPool(lambda key, model, timeout, retries: clients[model])
+    pool.get("key", "m1", 25, 1)
+    pool.get("key", "legacy", 25, 1)
+    asyncio.run(pool.aclose())
+    assert clients["m1"].closed and Transport.closed
+    assert pool.stats()["clients"] == 0
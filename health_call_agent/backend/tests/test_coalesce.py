@@ -0,0 +1,90 @@
+import asyncio
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services import analyze_call, get_single_flight
+from app.services.coalesce import SingleFlight
+from benchmarks.fake_llm import install_fake_llm
+
+CALL = {"call_id": "c1", "conversation": [{"role": "customer", "content": "I want to book an appointment."}]}
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = 0
+
+    async def work():
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.run("key", work) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert runs == 1
+    assert results == [("result", False)] + [("result", True)] * 4
+    assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_errors_reach_every_caller_and_the_key_is_released():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.run("key", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert (await flight.run("key", lambda: asyncio.sleep(0, "again"))) == ("again", False)
+
+    asyncio.run(scenario())
+
+
+def test_leader_survives_a_cancelled_follower():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return 1
+
+    async def scenario():
+        leader = asyncio.create_task(flight.run("key", work))
+        follower = asyncio.create_task(flight.run("key", work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        return await leader
+
+    assert asyncio.run(scenario()) == (1, False)
+
+
+def test_identical_analyses_call_the_model_once(fake_llm):
+    install_fake_llm(0.02)
+    calls = [CallLogInput.model_validate({**CALL, "call_id": f"c{i}"}) for i in range(4)]
+
+    async def scenario():
+        return await asyncio.gather(*(analyze_call(call) for call in calls))
+
+    results = asyncio.run(scenario())
+    # One graph run: purpose, failure reason and action plan.
+    assert len(fake_llm) == 3
+    assert [r.call_id for r in results] == ["c0", "c1", "c2", "c3"]
+    assert sorted(r.meta.coalesced for r in results) == [False, True, True, True]
+    assert get_single_flight().stats()["coalesced"] == 3
+
+
+def test_coalescing_can_be_disabled(fake_llm, monkeypatch):
+    monkeypatch.setenv("COALESCE_ENABLED", "false")
+    monkeypatch.setenv("ANALYSIS_CACHE_ENABLED", "false")
+    get_settings.cache_clear()
+    install_fake_llm(0.02)
+    calls = [CallLogInput.model_validate({**CALL, "call_id": f"c{i}"}) for i in range(2)]
+
+    async def scenario():
+        return await asyncio.gather(*(analyze_call(call) for call in calls))
+
+    asyncio.run(scenario())
+    assert get_single_flight() is None
+    assert len(fake_llm) == 6
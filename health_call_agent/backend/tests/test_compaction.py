@@ -0,0 +1,109 @@
+import asyncio
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services import analyze_call, compact_conversation
+from app.services.analysis import conversation_to_text, prepare_transcript
+from app.services.ingest import compact_call_logs
+from benchmarks.fake_llm import FakeChatModel
+
+FILLER = "Reading out the record"
+
+
+def _long_call() -> list[dict[str, str]]:
+    messages = [
+        {"role": "agent", "content": "Hello, how can I help you today?"},
+        {"role": "customer", "content": "I want to book an appointment with a cardiologist."},
+        {"role": "agent", "content": "Okay."},
+        {"role": "agent", "content": "Let me check that for you."},
+    ]
+    for i in range(40):
+        messages.append({"role": "customer" if i % 2 else "agent", "content": f"{FILLER}, part {i}."})
+    # A turn in the middle explains the failure; it is an agent turn between two customer turns.
+    messages[24] = {"role": "agent", "content": "Sorry, the booking system is down and I am unable to book."}
+    messages += [
+        {"role": "customer", "content": "So nothing can be done today?"},
+        {"role": "agent", "content": "I will call you back tomorrow."},
+        {"role": "customer", "content": "Thank you, goodbye."},
+    ]
+    return messages
+
+
+def test_boilerplate_and_repeats_are_dropped_and_speakers_merged():
+    messages = [
+        {"role": "agent", "content": "Hello! How can I help you today?"},
+        {"role": "customer", "content": "I need to reschedule."},
+        {"role": "customer", "content": "My slot is on Friday."},
+        {"role": "agent", "content": "Okay, one moment please."},
+        {"role": "agent", "content": "There are no slots next week."},
+        {"role": "agent", "content": "There are no slots next week."},
+        {"role": "customer", "content": "   "},
+    ]
+    compacted = compact_conversation(messages, 1000)
+    assert compacted.text == (
+        "customer: I need to reschedule. My slot is on Friday.\nagent: There are no slots next week."
+    )
+    assert compacted.turns_before == 7 and compacted.turns_after == 2
+    assert compacted.compacted
+
+
+def test_keeping_boilerplate_only_merges_speakers():
+    messages = [("agent", "Hello"), ("agent", "Hello"), ("customer", "Thanks")]
+    compacted = compact_conversation(messages, 1000, strip_boilerplate=False)
+    assert compacted.text == "agent: Hello Hello\ncustomer: Thanks"
+
+
+def test_over_budget_keeps_head_tail_and_evidence_in_order():
+    compacted = compact_conversation(_long_call(), 120)
+    lines = compacted.text.splitlines()
+    # The budget covers the kept turns; the omission markers come on top.
+    assert compacted.tokens_after < 150 < compacted.tokens_before
+    assert lines[0] == "customer: I want to book an appointment with a cardiologist."
+    assert "the booking system is down" in compacted.text
+    assert lines[-1] == "agent: I will call you back tomorrow."
+    assert any(line.startswith("[...") and "turns omitted" in line for line in lines)
+    assert compacted.text.index("cardiologist") < compacted.text.index("system is down")
+
+
+def test_overlong_turn_is_truncated_in_the_middle():
+    content = "start " + "x" * 4000 + " end"
+    compacted = compact_conversation([("customer", content)], 100)
+    assert "[...]" in compacted.text
+    assert compacted.text.startswith("customer: start")
+    assert compacted.text.endswith("end")
+    assert compacted.tokens_after < 100
+
+
+def test_compact_calls_and_call_logs_compact_the_same():
+    messages = _long_call()
+    call = CallLogInput(call_id="c1", conversation=messages)
+    [compact] = compact_call_logs([{"call_id": "c1", "conversation": messages}])
+    assert compact_conversation(compact.conversation, 200).text == compact_conversation(call.conversation, 200).text
+
+
+def test_prepare_transcript_is_verbatim_when_disabled():
+    call = CallLogInput(conversation=_long_call())
+    text, meta = prepare_transcript(call)
+    assert text == conversation_to_text(call.conversation)
+    assert meta["transcript_tokens_before"] == meta["transcript_tokens_after"]
+    assert "compacted" not in meta
+
+
+def test_analysis_prompts_with_the_compacted_transcript(fake_llm, monkeypatch):
+    monkeypatch.setenv("COMPACTION_ENABLED", "true")
+    monkeypatch.setenv("COMPACTION_TOKEN_BUDGET", "150")
+    get_settings.cache_clear()
+    prompts: list[str] = []
+    respond = FakeChatModel._respond
+
+    def recording_respond(self, messages):
+        prompts.append(messages[-1].content)
+        return respond(self, messages)
+
+    monkeypatch.setattr(FakeChatModel, "_respond", recording_respond)
+    call = CallLogInput(call_id="long", conversation=_long_call())
+    analysis = asyncio.run(analyze_call(call))
+    assert analysis.meta.compacted
+    assert analysis.meta.transcript_tokens_after < analysis.meta.transcript_tokens_before
+    assert prompts and all(f"{FILLER}, part 30" not in prompt for prompt in prompts)
+    assert all("system is down" in prompt for prompt in prompts[:2])
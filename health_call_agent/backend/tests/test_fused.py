@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app.agents import arun_analysis
+from app.agents.prompts import (
+    ACTION_PLAN_SYSTEM,
+    FAILURE_REASON_SYSTEM,
+    FUSED_ANALYSIS_SYSTEM,
+    PURPOSE_CLASSIFY_SYSTEM,
+)
+from benchmarks.fake_llm import FakeChatModel, FakeResponse
+
+ARGS = ("test-key", ["fake-a", "fake-b"], 25, 0)
+TEXT = "customer: I want to book an appointment.\nagent: Our system is down at the moment."
+
+
+@pytest.fixture
+def fused_reply(fake_llm, monkeypatch):
+    """Replace the fused prompt's reply with `fused_reply["content"]` when it is set."""
+    reply = {"content": None}
+    respond = FakeChatModel._respond
+
+    def respond_fused(self, messages):
+        response = respond(self, messages)
+        if messages[0].content == FUSED_ANALYSIS_SYSTEM and reply["content"] is not None:
+            return FakeResponse(reply["content"])
+        return response
+
+    monkeypatch.setattr(FakeChatModel, "_respond", respond_fused)
+    return reply
+
+
+def test_fused_pipeline_uses_one_call(fake_llm):
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="fused"))
+    assert fake_llm == [FUSED_ANALYSIS_SYSTEM]
+    assert result["meta"]["pipeline"] == "fused"
+    assert result["purpose"]["purpose"] == "booking"
+    assert result["action_plan"]["owner"] == "Front desk"
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "Sorry, I cannot help with that.",
+        '{"purpose": {"purpose": "booking", "confidence": "high", "summary": "x"}}',
+        '{"purpose": {"confidence": "high"}, "failure_reason": {}, "action_plan": {}}',
+    ],
+    ids=["no-json", "missing-sections", "invalid-fields"],
+)
+def test_unusable_fused_output_falls_back_to_the_graph(fake_llm, fused_reply, content):
+    fused_reply["content"] = content
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="fused"))
+    # The fused node is re-prompted once (NODE_REPROMPT_RETRIES=1), then the three-step graph runs.
+    assert fake_llm == [
+        FUSED_ANALYSIS_SYSTEM,
+        FUSED_ANALYSIS_SYSTEM,
+        PURPOSE_CLASSIFY_SYSTEM,
+        FAILURE_REASON_SYSTEM,
+        ACTION_PLAN_SYSTEM,
+    ]
+    assert result["meta"]["pipeline"] == "graph"
+    assert result["meta"]["fused_fallback"] is True
+    assert result["failure_reason"]["reason_category"] == "system_failure"
+
+
+def test_repairable_fused_output_is_used(fake_llm, fused_reply):
+    fused_reply["content"] = (
+        "Here you go: {purpose: {'purpose': 'complaint', 'confidence': 'low', 'summary': 'x'},"
+        " failure_reason: {'reason_category': 'other', 'explanation': 'y', 'recommendation': 'r'},"
+        " action_plan: {'goal': 'g', 'steps': 'Call back', 'owner': 'Billing', 'success_criteria': 'z'},}"
+    )
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="fused"))
+    assert fake_llm == [FUSED_ANALYSIS_SYSTEM]
+    assert result["purpose"]["purpose"] == "complaint"
+    assert result["action_plan"]["steps"] == ["Call back"]
+
+
+def test_model_errors_are_not_hidden_by_the_fallback(fake_llm, monkeypatch):
+    def fail(self, messages):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(FakeChatModel, "_respond", fail)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="fused"))
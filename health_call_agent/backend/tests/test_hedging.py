@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from app.agents import get_hedge_policy, get_rate_limiter
+from app.agents.hedging import HedgePolicy
+from app.agents.nodes import _call_hedged
+from app.agents.prompts import PURPOSE_CLASSIFY_SYSTEM
+from app.config import get_settings
+from benchmarks.fake_llm import install_fake_llm
+
+MESSAGES = [SystemMessage(content=PURPOSE_CLASSIFY_SYSTEM), HumanMessage(content="customer: book me in")]
+MODELS = ["fake-a", "fake-b"]
+
+
+def test_delay_is_the_latency_percentile_once_enough_samples():
+    policy = HedgePolicy(percentile=90, min_samples=5, min_delay_seconds=0.0)
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        policy.observe("n", seconds)
+    assert policy.hedge_delay("n") is None
+    for seconds in range(5, 11):
+        policy.observe("n", seconds / 10)
+    # Rank ceil(0.9 * 10) = 9 of 10.
+    assert policy.hedge_delay("n") == pytest.approx(0.9)
+    assert policy.hedge_delay("other") is None
+
+
+def test_delay_has_a_floor_and_follows_the_window():
+    policy = HedgePolicy(percentile=50, window=3, min_samples=1, min_delay_seconds=0.5)
+    policy.observe("n", 0.1)
+    assert policy.hedge_delay("n") == 0.5
+    for seconds in (2.0, 3.0, 4.0):
+        policy.observe("n", seconds)
+    assert policy.hedge_delay("n") == 3.0
+
+
+def test_hedges_are_capped_at_max_rate_of_calls():
+    policy = HedgePolicy(max_rate=0.25, min_samples=1)
+    fired = 0
+    for _ in range(100):
+        policy.hedge_delay("n")
+        fired += policy.try_hedge("n")
+    assert fired == 25
+    assert policy.stats()["hedge_rate"] == 0.25
+
+
+def test_budget_bursts_are_bounded():
+    policy = HedgePolicy(max_rate=1.0)
+    for _ in range(50):
+        policy.hedge_delay("n")
+    assert sum(policy.try_hedge("n") for _ in range(50)) == 10
+
+
+def test_hedge_model_targets():
+    policy = HedgePolicy(target="next")
+    assert policy.hedge_model("a", ["a", "b", "c"]) == "b"
+    assert policy.hedge_model("c", ["a", "b", "c"]) == "c"
+    assert HedgePolicy(target="same").hedge_model("a", ["a", "b"]) == "a"
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    """An enabled hedge policy that hedges after 50 ms from the first call on."""
+    monkeypatch.setenv("HEDGE_ENABLED", "true")
+    monkeypatch.setenv("HEDGE_MIN_SAMPLES", "1")
+    monkeypatch.setenv("HEDGE_MIN_DELAY_SECONDS", "0.05")
+    monkeypatch.setenv("HEDGE_MAX_RATE", "1")
+    get_settings.cache_clear()
+    policy = get_hedge_policy()
+    policy.observe("n", 0.05)
+    return policy
+
+
+def hedged_call(model: str = "fake-a") -> tuple[str, float]:
+    async def scenario():
+        reservation = get_rate_limiter().reserve(model, 10)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        _, used = await _call_hedged("n", model, reservation, MODELS, MESSAGES, "test-key", 25, 0, 10)
+        return used, loop.time() - started
+
+    return asyncio.run(scenario())
+
+
+def test_slow_primary_is_beaten_by_the_hedge(policy):
+    install_fake_llm(0.0, model_latency={"fake-a": 2.0})
+    used, elapsed = hedged_call()
+    assert used == "fake-b" and elapsed < 1.0
+    node = policy.stats()["nodes"]["n"]
+    assert node["hedges"] == 1 and node["hedges_won"] == 1
+    # The cancelled primary is kept as a censored sample of at least the hedge delay, after the hedge's own.
+    assert node["censored_samples"] == 1 and node["samples"] == 3
+    assert policy._nodes["n"].samples[-1] >= 0.05
+
+
+def test_fast_primary_is_not_hedged(policy):
+    install_fake_llm(0.0)
+    assert hedged_call()[0] == "fake-a"
+    assert policy.stats()["nodes"]["n"]["hedges"] == 0
+
+
+def test_failed_hedge_leaves_the_primary_to_finish(policy):
+    install_fake_llm(0.0, model_latency={"fake-a": 0.2}, model_error_rate={"fake-b": 1.0})
+    used, elapsed = hedged_call()
+    assert used == "fake-a" and elapsed >= 0.2
+    node = policy.stats()["nodes"]["n"]
+    assert node["hedges"] == 1 and node["hedges_won"] == 0 and node["censored_samples"] == 0
+
+
+def test_no_hedge_without_budget(policy):
+    install_fake_llm(0.0, model_latency={"fake-a": 0.2})
+    policy.max_rate = 0.0
+    used, _ = hedged_call()
+    assert used == "fake-a"
+    assert policy.stats()["nodes"]["n"]["hedges"] == 0
@@ -0,0 +1,93 @@
+import io
+import json
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.main import app
+from app.schemas import CallLogInput
+from app.services import ingest
+from app.services.analysis import conversation_to_text
+from app.services.ingest import CompactCall, compact_call_logs, iter_call_logs
+
+CONVERSATION = [{"role": "customer", "content": "I want to book an appointment."}, {"role": "agent", "content": "Sure."}]
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(ingest, "_CHUNK_CHARS", 7)
+
+
+def test_array_is_read_across_chunk_boundaries(small_chunks):
+    values = [{"call_id": "a", "conversation": CONVERSATION}, 12345678901234, "text", [1, 2]]
+    stream = io.StringIO("\ufeff  " + json.dumps(values, indent=2))
+    assert list(iter_call_logs(stream)) == values
+
+
+def test_unclosed_array_raises(small_chunks):
+    with pytest.raises(ValueError, match="not closed"):
+        list(iter_call_logs(io.StringIO('[{"a": 1}, {"b": 2}')))
+
+
+def test_jsonl_reports_bad_lines_in_place():
+    stream = io.StringIO('{"a": 1}\n\n{broken\n{"b": 2}\n')
+    values = list(iter_call_logs(stream))
+    assert values[0] == {"a": 1} and values[2] == {"b": 2}
+    assert isinstance(values[1], ValueError) and "Line 3" in str(values[1])
+
+
+def test_concatenated_pretty_printed_objects(small_chunks):
+    stream = io.StringIO(json.dumps({"a": 1}, indent=2) + "\n" + json.dumps({"b": [2, 3]}, indent=2))
+    assert list(iter_call_logs(stream, jsonl=False)) == [{"a": 1}, {"b": [2, 3]}]
+
+
+def test_empty_input_yields_nothing():
+    assert list(iter_call_logs(io.StringIO("  \n "))) == []
+
+
+def test_valid_logs_are_compacted_and_everything_else_left_as_is():
+    error = ValueError("Line 4 is not valid JSON")
+    items = [
+        {"call_id": "a", "duration_seconds": "60", "participants": ["x"], "conversation": CONVERSATION},
+        {"call_id": "b"},
+        42,
+        error,
+        {"conversation": [{"role": "agent", "content": "Hi"}], "extra": "ignored"},
+        {"conversation": [{"role": "agent"}]},
+    ]
+    result = compact_call_logs(items, chunk_size=2)
+    assert result is items
+    assert isinstance(items[0], CompactCall) and isinstance(items[4], CompactCall)
+    assert items[1] == {"call_id": "b"} and items[2] == 42 and items[3] is error
+    assert items[5] == {"conversation": [{"role": "agent"}]}
+    assert items[0].duration_seconds == 60 and items[0].participants == ("x",)
+    assert items[4].call_id is None
+
+
+def test_compact_call_matches_the_pydantic_model():
+    data = {"call_id": "a", "date": "2025-01-06", "duration_seconds": 60, "participants": ["x", "y"], "conversation": CONVERSATION}
+    [compact] = compact_call_logs([dict(data)])
+    model = CallLogInput.model_validate(data)
+    assert json.loads(compact.to_json()) == json.loads(model.model_dump_json())
+    assert compact.text() == conversation_to_text(model.conversation)
+    assert compact.conversation == [(m.role, m.content) for m in model.conversation]
+
+
+def test_roles_are_interned():
+    role = "".join(["cust", "omer"])
+    [compact] = compact_call_logs([{"conversation": [{"role": role, "content": "hi"}]}])
+    assert compact.roles[0] is sys.intern("customer")
+
+
+@pytest.mark.parametrize("compact", ["true", "false"])
+def test_batch_results_do_not_depend_on_compact_ingest(fake_llm, monkeypatch, compact):
+    monkeypatch.setenv("BATCH_COMPACT_INGEST", compact)
+    get_settings.cache_clear()
+    body = [{"call_id": "a", "conversation": CONVERSATION}, {"conversation": CONVERSATION}, {"call_id": "c"}]
+    response = TestClient(app).post("/api/analyze-batch", json=body)
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line["index"])
+    assert [(line["call_id"], line["status"]) for line in lines] == [("a", "ok"), ("call_2", "ok"), ("c", "error")]
+    assert lines[2]["error"].startswith("Invalid call log")
+    assert lines[0]["result"]["purpose"]["purpose"] == "booking"
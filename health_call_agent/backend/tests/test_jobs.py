@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import analyze_call, get_job_queue
+from app.services import jobs as jobs_module
+from app.services.jobs import ITEM_ERROR, ITEM_OK, ITEM_PENDING, ITEM_RUNNING, JobQueue, JobStore
+
+CONVERSATION = [{"role": "customer", "content": "I want to book an appointment."}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    yield store
+    store.close()
+
+
+def calls(n: int) -> list[dict]:
+    return [{"call_id": f"c{i}", "conversation": CONVERSATION} for i in range(n)]
+
+
+def item(store: JobStore, job_id: str, idx: int) -> tuple[str, int]:
+    with store._lock:
+        return store._db.execute(
+            "SELECT status, attempts FROM job_items WHERE job_id = ? AND idx = ?", (job_id, idx)
+        ).fetchone()
+
+
+def test_released_item_is_not_claimed_before_its_delay(store, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jobs_module.time, "time", clock)
+    job_id, _ = store.create_job(calls(2), {})
+    assert store.claim()[:2] == (job_id, 0)
+    store.release(job_id, 0, delay=10)
+    assert store.claim()[:2] == (job_id, 1)
+    assert store.claim() is None
+    clock.now += 10
+    claimed = store.claim()
+    assert claimed[:2] == (job_id, 0) and claimed[4] == 2
+
+
+def test_refunded_release_gives_the_attempt_back(store):
+    job_id, _ = store.create_job(calls(1), {})
+    assert store.claim()[4] == 1
+    store.release(job_id, 0, refund=True)
+    assert item(store, job_id, 0) == (ITEM_PENDING, 0)
+    assert store.job_status(job_id)["status"] == "queued"
+    assert store.claim()[4] == 1
+
+
+def test_recover_requeues_interrupted_items_and_fails_exhausted_ones(store):
+    job_id, _ = store.create_job(calls(3), {})
+    for _ in range(3):
+        store.claim()
+    # Item 0 was already interrupted twice; the crash that just happened is its third attempt.
+    with store._lock, store._db:
+        store._db.execute("UPDATE job_items SET attempts = 3 WHERE job_id = ? AND idx = 0", (job_id,))
+    store.complete(job_id, 2, result="{}")
+    assert store.recover(max_attempts=3) == (1, 1)
+    assert item(store, job_id, 0)[0] == ITEM_ERROR
+    assert item(store, job_id, 1) == (ITEM_PENDING, 1)
+    assert item(store, job_id, 2)[0] == ITEM_OK
+    assert store.job_status(job_id)["failed"] == 1
+
+
+def test_invalid_items_are_failed_at_creation(store):
+    job_id, total = store.create_job([{"conversation": CONVERSATION}, {"x": 1}, ValueError("Line 3 is bad")], {})
+    status = store.job_status(job_id)
+    assert total == 3 and status["pending"] == 1 and status["failed"] == 2
+    assert status["status"] == "queued"
+    assert [row[2] for row in store.results(job_id, 0, 10)] == ["call_2", "call_3"]
+
+
+def test_retry_delay_doubles_up_to_the_cap(store):
+    queue = JobQueue(store, 1, retry_base_seconds=2, retry_max_seconds=5)
+    for attempts, upper in ((1, 2), (2, 4), (3, 5), (10, 5)):
+        for _ in range(20):
+            assert upper / 2 <= queue.retry_delay(attempts) <= upper
+
+
+def run_queue(store: JobStore, until, **kwargs) -> str:
+    """Submit one call to a started queue, wait (up to 5s) for `until(job_id)` and stop the queue."""
+
+    async def scenario():
+        queue = JobQueue(store, 2, **kwargs)
+        await queue.start()
+        job_id, _ = await queue.submit(calls(1))
+        for _ in range(500):
+            if until(job_id):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return job_id
+
+    return asyncio.run(scenario())
+
+
+def completed(store: JobStore):
+    return lambda job_id: store.job_status(job_id)["status"] == "completed"
+
+
+def test_failed_item_is_retried_after_a_backoff(store, fake_llm, monkeypatch):
+    attempted_at = []
+
+    async def flaky(call, **options):
+        attempted_at.append(asyncio.get_running_loop().time())
+        if len(attempted_at) == 1:
+            raise RuntimeError("503 UNAVAILABLE")
+        return await analyze_call(call, **options)
+
+    monkeypatch.setattr(jobs_module, "analyze_call", flaky)
+    job_id = run_queue(store, completed(store), retry_base_seconds=0.2)
+    assert item(store, job_id, 0) == (ITEM_OK, 2)
+    assert 0.1 <= attempted_at[1] - attempted_at[0] < 2
+
+
+def test_item_fails_after_max_attempts(store, monkeypatch):
+    async def failing(call, **options):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(jobs_module, "analyze_call", failing)
+    job_id = run_queue(store, completed(store), max_attempts=3, retry_base_seconds=0.01)
+    assert item(store, job_id, 0) == (ITEM_ERROR, 3)
+    assert store.results(job_id, 0, 10)[0][5] == "boom"
+
+
+def test_stopping_the_queue_does_not_use_up_an_attempt(store, monkeypatch):
+    started = []
+
+    async def hanging(call, **options):
+        started.append(call.call_id)
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(jobs_module, "analyze_call", hanging)
+    job_id = run_queue(store, lambda job_id: bool(started))
+    assert item(store, job_id, 0) == (ITEM_PENDING, 0)
+    assert store.recover(max_attempts=1) == (0, 0)
+
+
+def test_results_are_paged_in_completion_order(fake_llm):
+    client = TestClient(app)
+    body = calls(5)
+    created = client.post("/api/jobs", json=body)
+    assert created.status_code == 202 and created.json()["total"] == 5
+    job_id = created.json()["job_id"]
+    store = get_job_queue().store
+    for idx in (3, 0, 4, 1, 2):
+        store.complete(job_id, idx, error=f"e{idx}")
+
+    seen, cursor, done = [], 0, False
+    while not done:
+        page = client.get(f"/api/jobs/{job_id}/results", params={"cursor": cursor, "limit": 2}).json()
+        seen += [line["index"] for line in page["items"]]
+        cursor, done = page["next_cursor"], page["done"]
+    assert seen == [3, 0, 4, 1, 2]
+    again = client.get(f"/api/jobs/{job_id}/results", params={"cursor": cursor}).json()
+    assert again["items"] == [] and again["done"] and again["next_cursor"] == cursor
+    status = client.get(f"/api/jobs/{job_id}").json()
+    assert status["status"] == "completed" and status["failed"] == 5
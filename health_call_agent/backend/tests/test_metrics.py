@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.metrics import error_kind
+
+CALL = {"call_id": "m1", "conversation": [{"role": "customer", "content": "I want to book an appointment."}]}
+
+
+@pytest.fixture
+def client(fake_llm):
+    return TestClient(app)
+
+
+def sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_requests_are_labelled_by_route_template_and_status(client):
+    before = sample("call_analyzer_http_requests_total", route="/api/jobs/{job_id}", method="GET", status="404")
+    unmatched = sample("call_analyzer_http_requests_total", route="unmatched", method="GET", status="404")
+    for job_id in ("a", "b", "c"):
+        assert client.get(f"/api/jobs/{job_id}").status_code == 404
+    assert client.get("/no/such/path").status_code == 404
+    assert sample("call_analyzer_http_requests_total", route="/api/jobs/{job_id}", method="GET", status="404") == before + 3
+    assert sample("call_analyzer_http_requests_total", route="unmatched", method="GET", status="404") == unmatched + 1
+    assert REGISTRY.get_sample_value(
+        "call_analyzer_http_requests_total", {"route": "/api/jobs/a", "method": "GET", "status": "404"}
+    ) is None
+
+
+def test_latency_and_in_flight_for_an_analysis(client):
+    labels = {"route": "/api/analyze-call", "method": "POST"}
+    observed = sample("call_analyzer_http_request_duration_seconds_count", **labels)
+    ok = sample("call_analyzer_http_requests_total", status="200", **labels)
+    invalid = sample("call_analyzer_http_requests_total", status="422", **labels)
+    assert client.post("/api/analyze-call", json=CALL).status_code == 200
+    assert client.post("/api/analyze-call", json={"call_id": "x"}).status_code == 422
+    assert sample("call_analyzer_http_request_duration_seconds_count", **labels) == observed + 2
+    assert sample("call_analyzer_http_requests_total", status="200", **labels) == ok + 1
+    assert sample("call_analyzer_http_requests_total", status="422", **labels) == invalid + 1
+    assert sample("call_analyzer_http_requests_in_flight", route="/api/analyze-call") == 0
+
+
+def test_streamed_response_leaves_nothing_in_flight(client):
+    response = client.post("/api/analyze-stream", json=CALL)
+    assert response.status_code == 200 and "event: done" in response.text
+    assert sample("call_analyzer_http_requests_in_flight", route="/api/analyze-stream") == 0
+
+
+def test_node_and_model_metrics_are_recorded(client):
+    nodes = sample("call_analyzer_node_duration_seconds_count", node="classify_purpose")
+    attempts = sample("call_analyzer_model_attempts_total", model="fake-a")
+    prompt_tokens = sample("call_analyzer_model_tokens_total", model="fake-a", kind="prompt")
+    assert client.post("/api/analyze-call", json={**CALL, "call_id": "m2"}).status_code == 200
+    assert sample("call_analyzer_node_duration_seconds_count", node="classify_purpose") == nodes + 1
+    assert sample("call_analyzer_model_attempts_total", model="fake-a") == attempts + 3
+    assert sample("call_analyzer_model_tokens_total", model="fake-a", kind="prompt") > prompt_tokens
+
+
+def test_metrics_endpoint_serves_the_exposition_format(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "call_analyzer_http_requests_total" in response.text
+
+
+def test_error_kinds():
+    assert error_kind(Exception("429 RESOURCE_EXHAUSTED (client-side rate limit): m")) == "rate_limited"
+    assert error_kind(Exception("429 RESOURCE_EXHAUSTED")) == "quota"
+    assert error_kind(Exception("404 NOT_FOUND models/x")) == "not_found"
+    assert error_kind(Exception("400 INVALID_ARGUMENT")) == "invalid_argument"
+    assert error_kind(TimeoutError("timed out")) == "other"
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.agents.ratelimit import RateLimiter, RateLimitExceeded
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_requests_bucket_delays_once_empty():
+    clock = Clock()
+    limiter = RateLimiter(rpm=60, clock=clock)
+    for _ in range(60):
+        assert limiter.reserve("m", 0).delay == 0
+    # 1 request per second refill: the 61st waits 1s, the 62nd (queued behind it) 2s.
+    assert limiter.reserve("m", 0).delay == pytest.approx(1.0)
+    assert limiter.reserve("m", 0).delay == pytest.approx(2.0)
+    clock.now += 2.0
+    assert limiter.reserve("m", 0).delay == pytest.approx(1.0)
+
+
+def test_token_bucket_reserve_cancel_and_settle():
+    clock = Clock()
+    limiter = RateLimiter(tpm=6000, clock=clock)
+    first = limiter.reserve("m", 4000)
+    assert first.tokens == 4000 and first.delay == 0
+    # 2000 tokens left; 3000 more are 1000 short at 100 tokens/s.
+    assert limiter.try_reserve("m", 3000) is None
+    second = limiter.reserve("m", 3000)
+    assert second.delay == pytest.approx(10.0)
+    limiter.cancel(second)
+    # The provider reported 1000 tokens for the first call: 3000 are given back.
+    limiter.settle(first, 1000)
+    assert limiter.reserve("m", 5000).delay == 0
+    assert limiter.stats()["models"]["m"]["acquired"] == 3
+
+
+def test_oversized_request_is_charged_at_most_the_capacity_wait():
+    limiter = RateLimiter(tpm=1000, clock=Clock())
+    assert limiter.reserve("m", 5000).delay == 0
+
+
+def test_reservation_beyond_max_wait_is_rejected():
+    clock = Clock()
+    limiter = RateLimiter(rpm=1, max_wait_seconds=30, clock=clock)
+    limiter.reserve("m", 0)
+    with pytest.raises(RateLimitExceeded, match="RESOURCE_EXHAUSTED"):
+        limiter.reserve("m", 0)
+    assert limiter.stats()["models"]["m"]["rejected"] == 1
+
+
+def test_model_limits_override_defaults():
+    limiter = RateLimiter(rpm=1, model_limits={"fast": (100, 0)}, clock=Clock())
+    for _ in range(50):
+        assert limiter.reserve("fast", 0).delay == 0
+    limiter.reserve("slow", 0)
+    assert limiter.prefer_available(["slow", "fast"], 0) == ["fast", "slow"]
+
+
+def test_cancelled_waiter_returns_its_capacity():
+    limiter = RateLimiter(rpm=60)
+
+    async def scenario():
+        for _ in range(60):
+            await limiter.aacquire("m", 0)
+        waiter = asyncio.create_task(limiter.aacquire("m", 0))
+        await asyncio.sleep(0.01)
+        assert limiter.stats()["models"]["m"]["queue_depth"] == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.stats()["models"]["m"]["queue_depth"] == 0
+
+    asyncio.run(scenario())
+    # The cancelled reservation was refunded, so the next one only waits for the refill already due.
+    assert limiter.reserve("m", 0).delay < 1.0
+
+
+def test_try_reserve_takes_nothing_when_budget_is_short():
+    clock = Clock()
+    limiter = RateLimiter(rpm=2, clock=clock)
+    assert limiter.try_reserve("m", 0).delay == 0
+    assert limiter.try_reserve("m", 0).delay == 0
+    assert limiter.try_reserve("m", 0) is None
+    stats = limiter.stats()["models"]["m"]
+    assert stats["acquired"] == 2
+    assert stats["waited"] == 0 and stats["wait_seconds_total"] == 0
+    assert stats["requests_available"] == 0
+
+
+def test_concurrent_try_reserve_never_overbooks():
+    limiter = RateLimiter(rpm=50, clock=Clock())
+    barrier = threading.Barrier(8)
+    granted = []
+
+    def worker():
+        barrier.wait()
+        for _ in range(20):
+            if limiter.try_reserve("m", 0) is not None:
+                granted.append(1)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = limiter.stats()["models"]["m"]
+    assert len(granted) == stats["acquired"] == 50
+    assert stats["waited"] == 0 and stats["queue_depth"] == 0
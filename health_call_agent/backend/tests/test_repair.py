@@ -0,0 +1,52 @@
+import pytest
+
+from app.agents.repair import JSONRepairError, coerce_to_model, extract_json_object, parse_json_response
+from app.schemas import ActionPlanResult
+
+
+def test_valid_json_is_not_repaired():
+    assert parse_json_response('{"purpose": "booking"}') == ({"purpose": "booking"}, False)
+
+
+def test_fenced_json_is_not_repaired():
+    assert parse_json_response('```json\n{"purpose": "booking"}\n```') == ({"purpose": "booking"}, False)
+
+
+def test_python_style_object_is_repaired():
+    data, repaired = parse_json_response("Sure: {'purpose': 'booking', confidence: 'high', ok: True, x: None,}")
+    assert repaired
+    assert data == {"purpose": "booking", "confidence": "high", "ok": True, "x": None}
+
+
+def test_string_values_are_left_alone():
+    text = '{"summary": "Caller said: None, thanks, ok: True", note: "a, }", items: [1, 2,],}'
+    data, _ = parse_json_response(text)
+    assert data == {"summary": "Caller said: None, thanks, ok: True", "note": "a, }", "items": [1, 2]}
+
+
+def test_apostrophes_inside_double_quotes_survive():
+    data, _ = parse_json_response("""{"summary": "The caller's slot wasn't free", 'owner': 'Front desk',}""")
+    assert data == {"summary": "The caller's slot wasn't free", "owner": "Front desk"}
+
+
+def test_truncated_object_is_closed():
+    assert extract_json_object('text {"a": [1, {"b": "x}') == '{"a": [1, {"b": "x}"}]}'
+    data, repaired = parse_json_response('{"steps": ["Call back", "Book')
+    assert repaired
+    assert data == {"steps": ["Call back", "Book"]}
+
+
+def test_no_object_raises():
+    with pytest.raises(JSONRepairError):
+        parse_json_response("I could not analyze this call.")
+
+
+def test_coerce_converts_types_and_keys():
+    plan = coerce_to_model(
+        {"Goal": "Book", "steps": "- Call back\n- Confirm", "Owner": ["Front", "desk"], "success criteria": 1},
+        ActionPlanResult,
+    )
+    assert plan.goal == "Book"
+    assert plan.steps == ["Call back", "Confirm"]
+    assert plan.owner == "Front; desk"
+    assert plan.success_criteria == "1"
@@ -0,0 +1,81 @@
+from app.agents.router import CLOSED, HALF_OPEN, OPEN, ModelRouter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+MODELS = ["primary", "fallback-1", "fallback-2"]
+
+
+def test_primary_stays_first_and_unsampled_keep_configured_order():
+    router = ModelRouter(clock=Clock())
+    router.record_success("fallback-2", 0.1)
+    # A faster fallback does not take over while the primary is healthy.
+    assert router.order(MODELS) == ["primary", "fallback-2", "fallback-1"]
+    router.record_success("primary", 2.0)
+    assert router.order(MODELS)[0] == "primary"
+
+
+def test_sampled_fallbacks_are_ordered_by_latency():
+    router = ModelRouter(clock=Clock())
+    router.record_success("fallback-1", 0.9)
+    router.record_success("fallback-2", 0.2)
+    assert router.order(MODELS) == ["primary", "fallback-2", "fallback-1"]
+
+
+def test_failed_primary_loses_its_place_and_one_unsampled_model_is_probed():
+    router = ModelRouter(failure_threshold=3, clock=Clock())
+    router.record_success("primary", 0.3)
+    router.record_success("fallback-2", 0.5)
+    router.record_failure("primary", RuntimeError("timeout"))
+    # The unsampled fallback is probed once, ahead of the measured models.
+    assert router.order(MODELS) == ["fallback-1", "primary", "fallback-2"]
+    # While that probe is out, other requests try it last.
+    assert router.order(MODELS) == ["primary", "fallback-2", "fallback-1"]
+    router.record_success("primary", 0.3)
+    assert router.order(MODELS) == ["primary", "fallback-2", "fallback-1"]
+
+
+def test_quota_error_opens_circuit_until_cooldown_then_probes_once():
+    clock = Clock()
+    router = ModelRouter(cooldown_seconds=30, clock=clock)
+    router.record_failure("primary", RuntimeError("429 RESOURCE_EXHAUSTED"))
+    assert router.snapshot()["models"]["primary"]["state"] == OPEN
+    assert "primary" not in router.order(MODELS)
+    clock.now += 30
+    assert router.order(MODELS)[0] == "primary"
+    assert router.snapshot()["models"]["primary"]["state"] == HALF_OPEN
+    assert router.order(MODELS)[0] != "primary"
+    router.record_success("primary", 0.4)
+    assert router.snapshot()["models"]["primary"]["state"] == CLOSED
+
+
+def test_failed_probe_reopens_circuit():
+    clock = Clock()
+    router = ModelRouter(cooldown_seconds=10, clock=clock)
+    router.record_failure("primary", RuntimeError("429"))
+    clock.now += 10
+    router.order(MODELS)
+    router.record_failure("primary", RuntimeError("timeout"))
+    assert router.snapshot()["models"]["primary"]["state"] == OPEN
+
+
+def test_open_models_are_used_when_nothing_else_is_left():
+    clock = Clock()
+    router = ModelRouter(clock=clock)
+    for name in reversed(MODELS):
+        router.record_failure(name, RuntimeError("429"))
+        clock.now += 1
+    # Longest open first: it is the closest to its cooldown.
+    assert router.order(MODELS) == list(reversed(MODELS))
+
+
+def test_fixed_order_when_not_adaptive():
+    router = ModelRouter(adaptive=False, clock=Clock())
+    router.record_failure("primary", RuntimeError("429"))
+    assert router.order(MODELS) == MODELS
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.agents import arun_analysis
+from app.agents.prompts import ACTION_PLAN_SYSTEM, FAILURE_REASON_SYSTEM, PURPOSE_CLASSIFY_SYSTEM
+from app.agents.rules import DEFAULT_RULES_PATH, Rule, RuleSet
+from app.config import get_settings
+
+ARGS = ("test-key", ["fake-a", "fake-b"], 25, 0)
+
+
+@pytest.fixture(scope="module")
+def rules():
+    return RuleSet.from_file(DEFAULT_RULES_PATH)
+
+
+def test_obvious_call_fills_both_stages(rules):
+    text = "customer: I'd like to book an appointment.\nagent: Sorry, our system is down at the moment."
+    update = rules.classify(text)
+    assert update["purpose_label"] == "booking"
+    assert update["purpose_result"]["confidence"] == "high"
+    failure = update["failure_reason_result"]
+    assert failure["reason_category"] == "system_failure"
+    assert failure["evidence"] == ["Sorry, our system is down at the moment."]
+
+
+def test_matching_is_case_insensitive_and_word_anchored(rules):
+    assert rules.classify("customer: BOOK AN APPOINTMENT please")["purpose_label"] == "booking"
+    assert rules.classify("customer: rebook an appointment") == {}
+
+
+def test_ambiguous_stage_is_left_to_the_llm(rules):
+    text = "customer: I want to book an appointment, and I want to file a complaint."
+    assert "purpose_result" not in rules.classify(text)
+
+
+def test_single_hold_phrase_is_not_enough_for_wait_time(rules):
+    assert rules.classify("agent: The waiting time is about ten minutes.") == {}
+    text = "agent: All doctors are busy. The waiting time is about an hour."
+    assert rules.classify(text)["failure_reason_result"]["reason_category"] == "wait_time"
+
+
+def test_repeated_pattern_counts_as_one_signal():
+    rules = RuleSet([Rule("failure_reason", "wait_time", ("hold on", "queue"), {}, min_signals=2)])
+    assert rules.classify("hold on\nhold on\nhold on") == {}
+    assert rules.classify("hold on, you are in the queue")["failure_reason_result"]["reason_category"] == "wait_time"
+
+
+def test_min_matches_applies_per_stage():
+    rules = RuleSet([Rule("purpose", "booking", ("book",), {})], min_matches=2)
+    assert rules.classify("book") == {}
+    assert rules.classify("book, book")["purpose_label"] == "booking"
+
+
+def test_offsets_stay_valid_when_lowercasing_changes_length():
+    rules = RuleSet([Rule("failure_reason", "system_failure", ("system is down",), {})])
+    text = "customer: İstanbul office\nagent: SYSTEM IS DOWN"
+    assert rules.classify(text)["failure_reason_result"]["evidence"] == ["SYSTEM IS DOWN"]
+
+
+def test_fast_path_skips_the_matching_nodes(fake_llm, monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    get_settings.cache_clear()
+    text = "customer: I'd like to book an appointment.\nagent: Sorry, our system is down at the moment."
+    result = asyncio.run(arun_analysis(text, *ARGS))
+    assert fake_llm == [ACTION_PLAN_SYSTEM]
+    assert result["meta"]["skipped_nodes"] == ["classify_purpose", "analyze_failure_reason"]
+    assert result["purpose"]["summary"] == "Caller wanted to book or schedule an appointment."
+
+
+def test_unmatched_call_runs_every_node(fake_llm, monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    get_settings.cache_clear()
+    result = asyncio.run(arun_analysis("customer: What are your opening hours?", *ARGS))
+    assert fake_llm == [PURPOSE_CLASSIFY_SYSTEM, FAILURE_REASON_SYSTEM, ACTION_PLAN_SYSTEM]
+    assert result["meta"]["skipped_nodes"] == []
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from app.config import get_settings
+from app.schemas import CallLogInput
+from app.services import analyze_call, get_similarity_index
+from app.services.similarity import SimilarityIndex
+
+TEMPLATE = (
+    "agent: Thank you for calling City Clinic, this is {agent} speaking. How can I help you today?\n"
+    "customer: Hi, my name is {name}. I would like to book an appointment with the cardiologist for {day}.\n"
+    "agent: Let me check the schedule for you. Unfortunately our booking system is down at the moment.\n"
+    "customer: That is frustrating, I have been trying to reach you all morning about this appointment.\n"
+    "agent: I understand. Could you please call back in an hour, or we can call you once it is working again.\n"
+    "customer: Please call me back on the number ending {digits}. Thank you for your help.\n"
+)
+OTHER = (
+    "agent: Good afternoon, pharmacy desk. customer: I was charged twice for my prescription refill last week "
+    "and nobody has answered my emails about the refund. agent: I am sorry to hear that, I will raise a complaint "
+    "with billing and they will contact you within three working days."
+)
+
+
+def transcript(name="Priya Singh", agent="Anita", day="Monday", digits="4821"):
+    return TEMPLATE.format(name=name, agent=agent, day=day, digits=digits)
+
+
+@pytest.fixture
+def index():
+    return SimilarityIndex(max_entries=4, num_perm=128, bands=16, threshold=0.8)
+
+
+def test_near_duplicate_is_found_and_unrelated_text_is_not(index):
+    index.add(index.signature(transcript()), "ns", "key-1")
+    match = index.nearest(index.signature(transcript(name="Rahul Kumar", digits="1193")), "ns")
+    assert match is not None and match[0] == "key-1" and match[1] >= 0.8
+    assert index.nearest(index.signature(OTHER), "ns") is None
+
+
+def test_identical_text_has_similarity_one(index):
+    index.add(index.signature(transcript()), "ns", "key-1")
+    assert index.nearest(index.signature(transcript()), "ns") == ("key-1", 1.0)
+
+
+def test_namespaces_are_separate(index):
+    index.add(index.signature(transcript()), "graph", "key-1")
+    assert index.nearest(index.signature(transcript()), "fused") is None
+
+
+def test_best_match_wins(index):
+    index.add(index.signature(transcript(name="Rahul Kumar", day="Friday")), "ns", "far")
+    index.add(index.signature(transcript(day="Friday")), "ns", "near")
+    assert index.nearest(index.signature(transcript()), "ns")[0] == "near"
+
+
+def test_oldest_entry_is_evicted(index):
+    index.add(index.signature(transcript()), "ns", "first")
+    for word in ("alpha", "bravo", "charlie", "delta"):
+        index.add(index.signature(f"{word} {OTHER}"), "ns", word)
+    assert index.nearest(index.signature(transcript()), "ns") is None
+    stats = index.stats()
+    assert stats["entries"] == 4
+    assert stats["evictions"] == 1
+
+
+def test_re_adding_a_key_replaces_its_entry(index):
+    index.add(index.signature(transcript()), "ns", "key-1")
+    index.add(index.signature(OTHER), "ns", "other")
+    for _ in range(5):
+        index.add(index.signature(transcript(day="Friday")), "ns", "key-1")
+    stats = index.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 0
+    assert index.nearest(index.signature(OTHER), "ns") == ("other", 1.0)
+    assert index.nearest(index.signature(transcript(day="Friday")), "ns") == ("key-1", 1.0)
+    # The replaced signature's band keys were dropped: each entry sits in exactly `bands` buckets.
+    assert sum(len(slots) for slots in index._buckets.values()) == 2 * index.bands
+
+
+def test_evicted_key_can_be_added_again(index):
+    for word in ("alpha", "bravo", "charlie", "delta", "echo"):
+        index.add(index.signature(f"{word} {OTHER}"), "ns", word)
+    index.add(index.signature(f"alpha {OTHER}"), "ns", "alpha")
+    assert index.stats()["entries"] == 4 and index.stats()["evictions"] == 2
+    assert index.nearest(index.signature(f"alpha {OTHER}"), "ns") == ("alpha", 1.0)
+
+
+def test_text_without_words_has_no_signature(index):
+    assert index.signature(" \n ") is None
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        SimilarityIndex(num_perm=100, bands=16)
+
+
+def test_near_duplicate_call_reuses_cached_analysis(fake_llm, monkeypatch):
+    monkeypatch.setenv("SIMILAR_CACHE_ENABLED", "true")
+    monkeypatch.setenv("SIMILAR_CACHE_THRESHOLD", "0.8")
+    get_settings.cache_clear()
+
+    def call(call_id, text):
+        turns = [dict(zip(("role", "content"), line.split(": ", 1))) for line in text.splitlines()]
+        return CallLogInput.model_validate({"call_id": call_id, "conversation": turns})
+
+    async def scenario():
+        first = await analyze_call(call("a", transcript()))
+        second = await analyze_call(call("b", transcript(name="Rahul Kumar", digits="1193")))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert len(fake_llm) == 3
+    assert first.meta.similarity is None and not first.meta.cached
+    assert second.meta.cached and second.meta.similarity >= 0.8
+    assert second.call_id == "b"
+    assert get_similarity_index().stats()["hits"] == 1
+
+
+def test_bypassing_the_cache_does_not_index_a_call_twice(fake_llm, monkeypatch):
+    monkeypatch.setenv("SIMILAR_CACHE_ENABLED", "true")
+    get_settings.cache_clear()
+    turns = [dict(zip(("role", "content"), line.split(": ", 1))) for line in transcript().splitlines()]
+    call = CallLogInput.model_validate({"call_id": "a", "conversation": turns})
+
+    async def scenario():
+        for _ in range(3):
+            await analyze_call(call, bypass_cache=True)
+
+    asyncio.run(scenario())
+    stats = get_similarity_index().stats()
+    assert stats["entries"] == 1 and stats["stores"] == 3
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.agents import arun_analysis
+from app.agents.nodes import check_speculation
+from app.agents.prompts import (
+    ACTION_PLAN_SYSTEM,
+    FAILURE_REASON_SYSTEM,
+    PURPOSE_CLASSIFY_SYSTEM,
+    SPECULATIVE_FAILURE_SYSTEM,
+)
+from app.config import get_settings
+from benchmarks.fake_llm import CANNED_RESPONSES
+
+ARGS = ("test-key", ["fake-a", "fake-b"], 25, 0)
+TEXT = "customer: I want to book an appointment.\nagent: Our system is down at the moment."
+
+
+def speculations(outcome: str) -> float:
+    return REGISTRY.get_sample_value("call_analyzer_speculations_total", {"outcome": outcome}) or 0.0
+
+
+def test_agreed_speculation_skips_the_serial_failure_analysis(fake_llm):
+    agreed = speculations("agreed")
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="parallel"))
+    assert sorted(fake_llm[:2]) == sorted([PURPOSE_CLASSIFY_SYSTEM, SPECULATIVE_FAILURE_SYSTEM])
+    assert fake_llm[2:] == [ACTION_PLAN_SYSTEM]
+    assert result["meta"]["pipeline"] == "parallel"
+    assert result["meta"]["speculation"] == "agreed"
+    assert result["failure_reason"]["reason_category"] == "system_failure"
+    assert speculations("agreed") == agreed + 1
+
+
+def test_mismatched_speculation_is_rerun_serially(fake_llm, monkeypatch):
+    monkeypatch.setitem(
+        CANNED_RESPONSES,
+        SPECULATIVE_FAILURE_SYSTEM,
+        {**CANNED_RESPONSES[FAILURE_REASON_SYSTEM], "purpose": "complaint", "reason_category": "wait_time"},
+    )
+    rerun = speculations("rerun")
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline="parallel"))
+    assert fake_llm[2:] == [FAILURE_REASON_SYSTEM, ACTION_PLAN_SYSTEM]
+    assert result["meta"]["speculation"] == "rerun"
+    # The serial analysis replaces the speculative one.
+    assert result["failure_reason"]["reason_category"] == "system_failure"
+    assert result["purpose"]["purpose"] == "booking"
+    assert speculations("rerun") == rerun + 1
+
+
+def test_purpose_labels_are_compared_loosely():
+    assert check_speculation({"inferred_purpose": " Booking ", "purpose_label": "booking"}) == {"speculation": "agreed"}
+    assert check_speculation({"inferred_purpose": "other", "purpose_label": "booking"}) == {"speculation": "rerun"}
+    assert check_speculation({"purpose_label": "booking"}) == {}
+
+
+def test_fast_path_purpose_skips_speculation(fake_llm, monkeypatch):
+    monkeypatch.setenv("FAST_PATH_ENABLED", "true")
+    get_settings.cache_clear()
+    text = "customer: I'd like to book an appointment.\nagent: Let me look into what went wrong."
+    result = asyncio.run(arun_analysis(text, *ARGS, pipeline="parallel"))
+    assert fake_llm == [FAILURE_REASON_SYSTEM, ACTION_PLAN_SYSTEM]
+    assert result["meta"]["skipped_nodes"] == ["classify_purpose"]
+    assert result["meta"]["speculation"] is None
+
+
+@pytest.mark.parametrize("pipeline", ["graph", "parallel"])
+def test_pipelines_agree_on_the_result(fake_llm, pipeline):
+    result = asyncio.run(arun_analysis(TEXT, *ARGS, pipeline=pipeline))
+    assert result["purpose"] == CANNED_RESPONSES[PURPOSE_CLASSIFY_SYSTEM]
+    assert result["failure_reason"] == CANNED_RESPONSES[FAILURE_REASON_SYSTEM]
+    assert result["action_plan"] == CANNED_RESPONSES[ACTION_PLAN_SYSTEM]
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from app.services import analyze_batch, get_stats_store
+from app.services.stats import StatsStore, duration_bucket, fact_key
+
+
+def fact(call_id, transcript="hello", day="2025-01-06", purpose="booking", reason="system_failure", duration=60):
+    return (fact_key(call_id, transcript), call_id, day, purpose, "high", reason, "front desk", duration)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = StatsStore(str(tmp_path / "stats.sqlite3"), flush_rows=100)
+    yield store
+    store.close()
+
+
+def test_append_reports_full_buffer_and_flush_writes_it(store):
+    store.flush_rows = 2
+    assert store.append(fact("a")) is False
+    assert store.append(fact("b")) is True
+    assert store.stats()["facts"] == 0
+    assert store.flush() == 2
+    assert store.stats()["facts"] == 2
+    assert store.stats()["buffered"] == 0
+
+
+def test_rollup_counts_and_duration_stats(store):
+    for i, duration in enumerate([10, 20, 30, 40]):
+        store.append(fact(f"b{i}", duration=duration))
+    store.append(fact("c0", purpose="complaint", duration=None))
+    result = store.query(group_by=["purpose"], percentiles=[50])
+    groups = {g["key"]["purpose"]: g for g in result["groups"]}
+    assert result["total_calls"] == 5
+    assert groups["booking"]["calls"] == 4
+    assert groups["booking"]["duration_seconds"]["count"] == 4
+    assert groups["booking"]["duration_seconds"]["mean"] == 25.0
+    # Rank 2 of 4 is the 15-20s bucket's only call: its upper bound.
+    assert groups["booking"]["duration_seconds"]["p50"] == 20.0
+    assert groups["complaint"]["duration_seconds"] == {"count": 0, "mean": None, "p50": None}
+
+
+def test_periods_and_filters(store):
+    store.append(fact("a", day="2025-01-06"))  # Monday
+    store.append(fact("b", day="2025-01-12"))  # Sunday, same ISO week
+    store.append(fact("c", day="2025-02-03", reason="wait_time"))
+    weeks = store.query(period="week", percentiles=[])
+    assert [(g["key"]["period"], g["calls"]) for g in weeks["groups"]] == [("2025-01-06", 2), ("2025-02-03", 1)]
+    months = store.query(period="month", filters={"reason_category": "WAIT_TIME"}, percentiles=[])
+    assert [(g["key"]["period"], g["calls"]) for g in months["groups"]] == [("2025-02", 1)]
+    assert store.query(start="2025-01-07", end="2025-01-31")["total_calls"] == 1
+
+
+def test_total_counts_every_matching_call_beyond_the_limit(store):
+    for i, purpose in enumerate(["booking", "booking", "booking", "complaint", "complaint", "support"]):
+        store.append(fact(f"l{i}", purpose=purpose))
+    store.append(fact("other", day="2025-03-03"))
+    result = store.query(group_by=["purpose"], end="2025-01-31", limit=1, percentiles=[])
+    assert [(g["key"]["purpose"], g["calls"]) for g in result["groups"]] == [("booking", 3)]
+    assert result["total_calls"] == 6
+    assert store.query(filters={"purpose": "nothing"})["total_calls"] == 0
+
+
+def test_reanalyzed_call_replaces_its_fact(store):
+    store.append(fact("a", purpose="booking", duration=30))
+    store.flush()
+    store.append(fact("a", purpose="complaint", duration=90))
+    store.append(fact("a", purpose="support", duration=120))
+    result = store.query(group_by=["purpose"])
+    assert result["total_calls"] == 1
+    assert [(g["key"]["purpose"], g["duration_seconds"]["mean"]) for g in result["groups"]] == [("support", 120.0)]
+    assert store.stats()["rollup_rows"] == 1
+
+
+def test_reused_call_ids_with_other_transcripts_are_kept_apart(store):
+    # Two uploads numbered call_1.. by position: same ids, different calls.
+    for transcript in ("first upload", "second upload"):
+        for i in range(3):
+            store.append(fact(f"call_{i + 1}", transcript=f"{transcript} {i}"))
+        store.flush()
+    assert store.query()["total_calls"] == 6
+
+
+def test_anonymous_facts_are_always_added(store):
+    store.append(fact(None))
+    store.append(fact(None))
+    assert store.query()["total_calls"] == 2
+
+
+def test_duration_bucket_edges():
+    assert duration_bucket(0) == 0
+    assert duration_bucket(5) == 0
+    assert duration_bucket(6) == 1
+    assert duration_bucket(10_000) == 21
+
+
+def test_batches_of_positional_calls_are_all_recorded(fake_llm):
+    calls = [
+        {"conversation": [{"role": "customer", "content": f"Upload {upload}, call {i}: book a visit."}]}
+        for upload in range(2)
+        for i in range(3)
+    ]
+
+    async def scenario():
+        for start in (0, 3):
+            async for item in analyze_batch(calls[start : start + 3], 3):
+                assert item.status == "ok"
+                assert item.call_id.startswith("call_")
+
+    asyncio.run(scenario())
+    assert get_stats_store().query()["total_calls"] == 6
@@ -3,12 +3,15 @@ Streamlit frontend for Health Call Agent.
 Upload or paste call log JSON, then view purpose and failure reason analysis.
 """
 
+import hashlib
 import json
 import os
 import requests
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 
+from requests.adapters import HTTPAdapter
+
 # Load .env from frontend directory first (so BACKEND_URL is set)
 _env_path = Path(__file__).resolve().parent / ".env"
 if _env_path.exists():
@@ -26,6 +29,33 @@ BACKEND_URL = (os.getenv("BACKEND_URL") or _DEFAULT_BACKEND).strip().rstrip("/")
 if not BACKEND_URL.startswith("http"):
     BACKEND_URL = _DEFAULT_BACKEND
 REQUEST_TIMEOUT_SECONDS = int(os.getenv("BACKEND_TIMEOUT_SECONDS", "180"))
+# "Analyze all": calls in flight at once (default), and the most the slider allows
+ANALYZE_CONCURRENCY = int(os.getenv("ANALYZE_CONCURRENCY", "4"))
+ANALYZE_MAX_CONCURRENCY = max(1, int(os.getenv("ANALYZE_MAX_CONCURRENCY", "16")))
+# Session state: analysis results by call key, kept across reruns
+RESULTS_STATE_KEY = "analysis_results"
+
+
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """One HTTP session per server process, with a connection pool sized for the concurrent calls."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=ANALYZE_MAX_CONCURRENCY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def call_key(idx: int, call: dict) -> str:
+    """Session-state key of a call: its id plus a hash of its conversation."""
+    call_id = call.get("call_id") or f"call_{idx+1}"
+    conversation = json.dumps(call.get("conversation", []), sort_keys=True, ensure_ascii=False)
+    return f"{call_id}:{hashlib.sha256(conversation.encode('utf-8')).hexdigest()[:16]}"
+
+
+def stored_results() -> dict:
+    """Analysis results of this browser session, by `call_key`."""
+    return st.session_state.setdefault(RESULTS_STATE_KEY, {})
 
 
 def load_sample_data():
@@ -55,13 +85,17 @@ def validate_conversation(data) -> tuple[bool, str]:
     return True, ""
 
 
-def analyze_single(conversation: list, call_id: str | None = None) -> dict | None:
-    """Call backend /api/analyze-call and return result or None on error."""
+def analyze_single(session: requests.Session, conversation: list, call_id: str | None = None) -> dict:
+    """Call backend /api/analyze-call and return the result.
+
+    Runs on worker threads, so it does not call Streamlit: errors come back as
+    {"_quota_exhausted": True} or {"_error": message, "_detail": response body}.
+    """
     payload = {"conversation": conversation}
     if call_id:
         payload["call_id"] = call_id
     try:
-        r = requests.post(
+        r = session.post(
             f"{BACKEND_URL}/api/analyze-call",
             json=payload,
             timeout=REQUEST_TIMEOUT_SECONDS,
@@ -72,18 +106,228 @@ def analyze_single(conversation: list, call_id: str | None = None) -> dict | Non
             except Exception:
                 detail = r.text
             if "quota" in detail.lower() or "rate limit" in detail.lower() or "resource_exhausted" in detail.lower():
-                st.error("Gemini quota/rate limit exceeded. Wait and retry, or use another API key/project.")
                 return {"_quota_exhausted": True}
         r.raise_for_status()
         return r.json()
+    except requests.exceptions.RequestException as e:
+        response = getattr(e, "response", None)
+        return {"_error": f"API error: {e}", "_detail": response.text if response is not None else None}
+
+
+def _parse_sse(lines):
+    """Yield (event, data) pairs from Server-Sent Events text lines."""
+    event, data_lines = "message", []
+    for line in lines:
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+    if data_lines:
+        yield event, json.loads("\n".join(data_lines))
+
+
+def analyze_stream(conversation: list, call_id: str | None, on_stage) -> dict | None:
+    """Call backend /api/analyze-stream, calling on_stage(stage, data) as each stage arrives.
+
+    Returns the assembled result, or None on error.
+    """
+    payload = {"conversation": conversation}
+    if call_id:
+        payload["call_id"] = call_id
+    result = {"call_id": call_id}
+    try:
+        with get_http_session().post(
+            f"{BACKEND_URL}/api/analyze-stream",
+            json=payload,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            stream=True,
+        ) as r:
+            r.raise_for_status()
+            for event, data in _parse_sse(r.iter_lines(decode_unicode=True)):
+                if event == "error":
+                    detail = data.get("detail", "")
+                    if "quota" in detail.lower() or "rate limit" in detail.lower():
+                        st.error("Gemini quota/rate limit exceeded. Wait and retry, or use another API key/project.")
+                        return {"_quota_exhausted": True}
+                    st.error(detail or "Analysis failed.")
+                    return None
+                if event == "done":
+                    result["meta"] = data.get("meta")
+                    continue
+                result[event] = data.get("result")
+                on_stage(event, data)
     except requests.exceptions.RequestException as e:
         st.error(f"API error: {e}")
-        if hasattr(e, "response") and e.response is not None:
-            try:
-                st.code(e.response.text)
-            except Exception:
-                pass
         return None
+    return result
+
+
+def render_purpose(p: dict):
+    st.markdown("#### Purpose")
+    st.write(f"**{p.get('purpose', '—')}** (confidence: {p.get('confidence', '—')})")
+    st.write(p.get("summary", ""))
+
+
+def render_failure_reason(fr: dict):
+    st.markdown("#### Why purpose was not achieved")
+    st.write(f"**Category:** {fr.get('reason_category', '—')}")
+    st.write(f"**Explanation:** {fr.get('explanation', '')}")
+    if fr.get("evidence"):
+        st.write("**Evidence:**")
+        for e in fr["evidence"]:
+            st.write(f"- {e}")
+    st.write(f"**Recommendation:** {fr.get('recommendation', '')}")
+
+
+def render_action_plan(ap: dict):
+    st.markdown("#### Actionable Plan")
+    st.write(f"**Goal:** {ap.get('goal', '')}")
+    st.write(f"**Owner:** {ap.get('owner', '')}")
+    steps = ap.get("steps", []) or []
+    if steps:
+        st.write("**Steps:**")
+        for i, step in enumerate(steps, start=1):
+            st.write(f"{i}. {step}")
+    st.write(f"**Success Criteria:** {ap.get('success_criteria', '')}")
+
+
+STAGE_RENDERERS = {
+    "purpose": render_purpose,
+    "failure_reason": render_failure_reason,
+    "action_plan": render_action_plan,
+}
+
+
+def render_result(result: dict):
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        render_purpose(result.get("purpose", {}))
+    with col2:
+        render_failure_reason(result.get("failure_reason", {}))
+    with col3:
+        render_action_plan(result.get("action_plan", {}))
+
+
+def analyze_streaming(valid_calls: list):
+    """Analyze calls one by one, rendering each stage as soon as the backend streams it.
+
+    Calls already in session state are shown from there instead of being re-requested.
+    """
+    results = stored_results()
+    st.divider()
+    st.subheader("Results")
+    for idx, call in valid_calls:
+        call_id = call.get("call_id") or f"call_{idx+1}"
+        key = call_key(idx, call)
+        if key in results:
+            with st.expander(f"📋 {call_id}", expanded=True):
+                render_result(results[key])
+                with st.expander("View conversation"):
+                    st.json(call)
+            continue
+        with st.expander(f"📋 {call_id}", expanded=True):
+            columns = st.columns(3)
+            slots = {}
+            for column, stage in zip(columns, STAGE_RENDERERS):
+                slots[stage] = column.empty()
+                slots[stage].info(f"Waiting for {stage.replace('_', ' ')}...")
+
+            def on_stage(stage, data):
+                renderer = STAGE_RENDERERS.get(stage)
+                if renderer is None:
+                    return
+                with slots[stage].container():
+                    renderer(data.get("result") or {})
+                    st.caption(f"Ready after {data.get('elapsed_ms', 0) / 1000:.1f}s")
+
+            result = analyze_stream(call.get("conversation", []), call_id, on_stage)
+            if result and result.get("_quota_exhausted"):
+                st.warning("Stopped remaining calls to avoid repeated quota errors.")
+                return
+            if not result:
+                st.warning("Analysis failed for this call.")
+            else:
+                results[key] = result
+            with st.expander("View conversation"):
+                st.json(call)
+
+
+def analyze_concurrently(valid_calls: list, concurrency: int) -> dict:
+    """Analyze the calls not yet in session state, `concurrency` at a time, storing each result as it completes.
+
+    Returns this run's errors by call key. After a quota error, calls not yet sent are cancelled.
+    """
+    results = stored_results()
+    pending = {}
+    for idx, call in valid_calls:
+        key = call_key(idx, call)
+        if key not in results:
+            pending.setdefault(key, (call.get("call_id") or f"call_{idx+1}", call))
+    failed = {}
+    if not pending:
+        return failed
+
+    session = get_http_session()
+    progress = st.progress(0.0, text=f"Analyzing {len(pending)} call(s)...")
+    quota_exhausted = False
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(analyze_single, session, call.get("conversation", []), call_id): key
+            for key, (call_id, call) in pending.items()
+        }
+        not_done = set(futures)
+        finished = 0
+        while not_done:
+            done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                result = {"_error": "Not sent after a quota error."} if future.cancelled() else future.result()
+                if result.get("_quota_exhausted") and not quota_exhausted:
+                    quota_exhausted = True
+                    for other in not_done:
+                        other.cancel()
+                if result.get("_quota_exhausted") or result.get("_error"):
+                    failed[key] = result
+                else:
+                    results[key] = result
+                finished += 1
+                progress.progress(finished / len(pending), text=f"Analyzed {finished} of {len(pending)} call(s)")
+    progress.empty()
+    if quota_exhausted:
+        st.error("Gemini quota/rate limit exceeded. Wait and retry, or use another API key/project.")
+        st.warning("Stopped remaining calls to avoid repeated quota errors.")
+    return failed
+
+
+def render_results(valid_calls: list, failed: dict):
+    """Show each call's stored result, or its error from this run."""
+    results = stored_results()
+    keyed = [(idx, call, call_key(idx, call)) for idx, call in valid_calls]
+    keyed = [(idx, call, key) for idx, call, key in keyed if key in results or key in failed]
+    if not keyed:
+        return
+    st.divider()
+    st.subheader("Results")
+    for idx, call, key in keyed:
+        call_id = call.get("call_id") or f"call_{idx+1}"
+        with st.expander(f"📋 {call_id}", expanded=True):
+            if key in results:
+                render_result(results[key])
+            else:
+                error = failed[key]
+                if error.get("_error"):
+                    st.error(error["_error"])
+                if error.get("_detail"):
+                    st.code(error["_detail"])
+                st.warning("Analysis failed for this call.")
+            with st.expander("View conversation"):
+                st.json(call)
 
 
 def main():
@@ -179,63 +423,36 @@ def main():
     if not valid_calls:
         st.stop()
 
-    st.success(f"Ready to analyze {len(valid_calls)} call(s).")
-    if st.button("Analyze all", type="primary"):
-        results = []
-        progress = st.progress(0)
-        stop_due_to_quota = False
-        for i, (idx, call) in enumerate(valid_calls):
-            if stop_due_to_quota:
-                break
-            progress.progress((i + 1) / len(valid_calls), text=f"Analyzing call {i + 1}...")
-            conversation = call.get("conversation", [])
-            call_id = call.get("call_id") or f"call_{idx+1}"
-            result = analyze_single(conversation, call_id)
-            if result and result.get("_quota_exhausted"):
-                stop_due_to_quota = True
-                results.append((call_id, call, None))
-                st.warning("Stopped remaining calls to avoid repeated quota errors.")
-                break
-            results.append((call_id, call, result))
-            time.sleep(1.2)
-        progress.empty()
-
-        st.divider()
-        st.subheader("Results")
-        for call_id, call, result in results:
-            with st.expander(f"📋 {call_id}", expanded=True):
-                if result:
-                    col1, col2, col3 = st.columns(3)
-                    with col1:
-                        st.markdown("#### Purpose")
-                        p = result.get("purpose", {})
-                        st.write(f"**{p.get('purpose', '—')}** (confidence: {p.get('confidence', '—')})")
-                        st.write(p.get("summary", ""))
-                    with col2:
-                        st.markdown("#### Why purpose was not achieved")
-                        fr = result.get("failure_reason", {})
-                        st.write(f"**Category:** {fr.get('reason_category', '—')}")
-                        st.write(f"**Explanation:** {fr.get('explanation', '')}")
-                        if fr.get("evidence"):
-                            st.write("**Evidence:**")
-                            for e in fr["evidence"]:
-                                st.write(f"- {e}")
-                        st.write(f"**Recommendation:** {fr.get('recommendation', '')}")
-                    with col3:
-                        st.markdown("#### Actionable Plan")
-                        ap = result.get("action_plan", {})
-                        st.write(f"**Goal:** {ap.get('goal', '')}")
-                        st.write(f"**Owner:** {ap.get('owner', '')}")
-                        steps = ap.get("steps", []) or []
-                        if steps:
-                            st.write("**Steps:**")
-                            for i, step in enumerate(steps, start=1):
-                                st.write(f"{i}. {step}")
-                        st.write(f"**Success Criteria:** {ap.get('success_criteria', '')}")
-                else:
-                    st.warning("Analysis failed for this call.")
-                with st.expander("View conversation"):
-                    st.json(call)
+    results = stored_results()
+    analyzed = sum(call_key(idx, call) in results for idx, call in valid_calls)
+    ready = f"Ready to analyze {len(valid_calls)} call(s)."
+    if analyzed:
+        ready += f" {analyzed} already analyzed in this session and won't be re-requested."
+    st.success(ready)
+    stream_results = st.checkbox(
+        "Show results progressively",
+        value=False,
+        help="Stream purpose, failure reason and action plan as each stage finishes, one call at a time "
+        "(slower than analyzing calls in parallel).",
+    )
+    concurrency = st.slider(
+        "Calls in parallel",
+        min_value=1,
+        max_value=ANALYZE_MAX_CONCURRENCY,
+        value=min(max(1, ANALYZE_CONCURRENCY), ANALYZE_MAX_CONCURRENCY),
+        disabled=stream_results,
+        help="How many calls are sent to the backend at once when results are not streamed.",
+    )
+    col_analyze, col_clear = st.columns([1, 5])
+    analyze_clicked = col_analyze.button("Analyze all", type="primary")
+    if col_clear.button("Clear results", disabled=not results):
+        results.clear()
+        st.rerun()
+    if analyze_clicked and stream_results:
+        analyze_streaming(valid_calls)
+    else:
+        failed = analyze_concurrently(valid_calls, concurrency) if analyze_clicked else {}
+        render_results(valid_calls, failed)
 
 
 if __name__ == "__main__":